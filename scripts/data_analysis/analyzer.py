@@ -113,6 +113,34 @@ def build_window_metrics(daily_df, latest_date):
     return pd.DataFrame(rows)
 
 
+def build_market_window_metrics(market_df, latest_date=None):
+    """Market-wide 7/30/90-day windows from the date-sorted aggregate table."""
+    if market_df is None or market_df.empty:
+        return pd.DataFrame()
+
+    dates = pd.to_datetime(market_df["日期"]).values
+    latest_date = pd.Timestamp(latest_date) if latest_date is not None else pd.Timestamp(dates[-1])
+    end = dates.searchsorted(latest_date.to_datetime64(), side="right")
+
+    rows = []
+    for days in WINDOW_DAYS:
+        start_date = latest_date - timedelta(days=days - 1)
+        start = dates.searchsorted(start_date.to_datetime64(), side="left")
+        part = market_df.iloc[start:end]
+        company_counts = part["回购公司数"]
+        rows.append(
+            {
+                "窗口": f"{days}天",
+                "回购总额": part["回购总额(港元)"].sum(),
+                "回购天数": len(part),
+                "日均公司数": company_counts.mean() if len(part) else None,
+                "单日最多公司数": int(company_counts.max()) if len(part) else 0,
+            }
+        )
+
+    return pd.DataFrame(rows)
+
+
 def latest_basic_snapshot(basic_df):
     if basic_df is None or basic_df.empty or "日期" not in basic_df.columns:
         return None
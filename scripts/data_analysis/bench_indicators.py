@@ -0,0 +1,87 @@
+"""
+Benchmark the vectorized indicators against the notebook implementations.
+
+Usage:
+    python scripts/data_analysis/bench_indicators.py [--length 20000] [--tickers 200]
+"""
+
+import argparse
+import time
+from functools import reduce
+
+import numpy as np
+import pandas as pd
+
+import indicators
+
+
+def notebook_ma(data, n):
+    return pd.Series(data).rolling(window=n).mean().dropna()
+
+
+def notebook_sma_cn(data, N=6, M=1):
+    return reduce(lambda x, y: x + [((N - M) * x[-1] + M * y) / N], data[1:], [data[0]])
+
+
+def notebook_ema(data, n):
+    return pd.Series(data).ewm(span=n, min_periods=n).mean().dropna()
+
+
+def _timed(func, *args, repeat=3, **kwargs):
+    best = float("inf")
+    result = None
+    for _ in range(repeat):
+        started = time.perf_counter()
+        result = func(*args, **kwargs)
+        best = min(best, time.perf_counter() - started)
+    return best, result
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark vectorized indicators against the notebook versions.")
+    parser.add_argument("--length", type=int, default=20000, help="Price points per ticker (default: 20000)")
+    parser.add_argument("--tickers", type=int, default=200, help="Tickers in the 2-D run (default: 200)")
+    args = parser.parse_args()
+
+    rng = np.random.default_rng(42)
+    prices = 100 + np.cumsum(rng.normal(0, 1, size=(args.length, args.tickers)), axis=0)
+    series = prices[:, 0]
+    series_list = series.tolist()
+
+    print(f"Single series, {args.length} points")
+    rows = [
+        ("MA(20)", lambda: notebook_ma(series_list, 20), lambda: indicators.sma(series, 20)),
+        ("EMA(12)", lambda: notebook_ema(series_list, 12), lambda: indicators.ema(series, 12)),
+        ("SMA(6,1)", lambda: notebook_sma_cn(series_list, 6, 1), lambda: indicators.sma_cn(series, 6, 1)),
+    ]
+    for label, old, new in rows:
+        old_time, old_result = _timed(old, repeat=1)
+        new_time, new_result = _timed(new)
+        new_values = new_result[~np.isnan(new_result)]
+        match = np.allclose(np.asarray(old_result, dtype=np.float64), new_values)
+        print(
+            f"  {label:<9} notebook {old_time * 1000:10.2f} ms  vectorized {new_time * 1000:8.2f} ms  "
+            f"speedup {old_time / new_time:8.1f}x  match={match}"
+        )
+
+    print(f"\n{args.tickers} tickers x {args.length} points")
+    loop_time, _ = _timed(
+        lambda: [notebook_ema(prices[:, col], 12) for col in range(args.tickers)],
+        repeat=1,
+    )
+    batch_time, _ = _timed(indicators.ema, prices, 12)
+    print(
+        f"  EMA(12)   per-ticker pandas {loop_time * 1000:8.2f} ms  one 2-D call {batch_time * 1000:8.2f} ms  "
+        f"speedup {loop_time / batch_time:6.1f}x"
+    )
+    for label, func in (
+        ("MACD", lambda: indicators.macd(prices)),
+        ("RSI(14)", lambda: indicators.rsi(prices, 14)),
+        ("KDJ(9)", lambda: indicators.kdj(prices + 1, prices - 1, prices)),
+    ):
+        elapsed, _ = _timed(func)
+        print(f"  {label:<9} {elapsed * 1000:8.2f} ms")
+
+
+if __name__ == "__main__":
+    main()
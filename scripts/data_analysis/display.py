@@ -492,3 +492,114 @@ def _build_trend_table(monthly_df, yearly_df, month_rows=6, year_rows=3):
             )
 
     return table
+
+
+def format_bytes(value):
+    """Formats a byte count with binary units."""
+    if value is None or pd.isna(value):
+        return "N/A"
+    for unit in ("B", "KB", "MB", "GB"):
+        if abs(value) < 1024:
+            return f"{value:.1f}{unit}" if unit != "B" else f"{value:.0f}{unit}"
+        value /= 1024
+    return f"{value:.1f}TB"
+
+
+def print_http_metrics(metrics, open_hosts=None):
+    """
+    Displays the HTTP request metrics collected during a command.
+    """
+    if not metrics or not metrics.get("requests"):
+        return
+
+    status_text = "  ".join(
+        f"{code}×{count}" for code, count in sorted(metrics["status_codes"].items(), key=lambda item: str(item[0]))
+    )
+    histogram_text = "  ".join(f"{label}:{count}" for label, count in metrics["latency_histogram"] if count)
+    latency_avg = metrics.get("latency_avg")
+    latency_max = metrics.get("latency_max")
+
+    table = Table(title="[bold cyan]HTTP 请求统计[/bold cyan]", box=SIMPLE, show_header=False, expand=True)
+    table.add_column(justify="left", style="cyan", no_wrap=True)
+    table.add_column(justify="left", overflow="fold")
+    table.add_row(
+        "请求/重试/失败",
+        f"{metrics['requests']} / {metrics['retries']} / {metrics['errors']}"
+        + (f" / 熔断跳过 {metrics['short_circuited']}" if metrics.get("short_circuited") else ""),
+    )
+    table.add_row("状态码", status_text or "N/A")
+    table.add_row("下载量", format_bytes(metrics.get("bytes")))
+    table.add_row(
+        "延迟",
+        f"avg {latency_avg:.3f}s / max {latency_max:.3f}s" if latency_avg is not None else "N/A",
+    )
+    table.add_row("延迟分布", histogram_text or "N/A")
+    if open_hosts:
+        table.add_row("熔断中", "[red]" + ", ".join(open_hosts) + "[/red]")
+    console.print(table)
+
+
+def print_market_aggregate(market_df, window_df, limit=10):
+    """
+    Displays market-wide buyback windows and the most recent daily totals.
+    """
+    latest_date = pd.Timestamp(market_df["日期"].max())
+    table = Table(
+        title=f"[bold cyan]全市场回购强度 (截至 {latest_date:%Y-%m-%d})[/bold cyan]",
+        box=ROUNDED,
+        header_style="bold magenta",
+    )
+    table.add_column("窗口", justify="center", style="cyan")
+    table.add_column("回购总额", justify="right", style="green")
+    table.add_column("回购天数", justify="center", style="blue")
+    table.add_column("日均公司数", justify="right", style="magenta")
+    table.add_column("单日最多公司数", justify="right", style="yellow")
+
+    for _, row in window_df.iterrows():
+        avg_companies = row["日均公司数"]
+        table.add_row(
+            str(row["窗口"]),
+            format_compact_currency(row["回购总额"]),
+            str(int(row["回购天数"])),
+            "N/A" if avg_companies is None or pd.isna(avg_companies) else f"{avg_companies:.1f}",
+            str(int(row["单日最多公司数"])),
+        )
+    console.print(table)
+
+    daily_table = Table(
+        title=f"[bold cyan]最近 {limit} 个回购日[/bold cyan]",
+        box=SIMPLE,
+        header_style="bold magenta",
+    )
+    daily_table.add_column("日期", justify="center", style="cyan")
+    daily_table.add_column("回购总额 (港元)", justify="right", style="green")
+    daily_table.add_column("回购公司数", justify="center", style="blue")
+    for _, row in market_df.tail(limit).iloc[::-1].iterrows():
+        daily_table.add_row(
+            str(pd.Timestamp(row["日期"]).date()),
+            format_currency(row["回购总额(港元)"]),
+            str(int(row["回购公司数"])),
+        )
+    console.print(daily_table)
+
+
+def print_stream_tick(snapshot, readings):
+    """
+    Prints one realtime quote line with provisional streaming indicator readings.
+    """
+    stats = readings.get("20日均值") or {}
+    mean, stdev = stats.get("mean"), stats.get("stdev")
+    price = _snapshot_value(snapshot, "最新价")
+    zscore = (price - mean) / stdev if price is not None and mean is not None and stdev else None
+    console.print(
+        f"[cyan]{pd.Timestamp.now():%H:%M:%S}[/cyan] "
+        f"[bold]{snapshot['股票代码']} {snapshot['股票名称']}[/bold] "
+        f"当前价 [bold]{format_price(price)}[/bold] "
+        f"涨跌幅 {format_change(_snapshot_value(snapshot, '涨跌幅'))}  "
+        f"EMA12 {format_price(readings.get('EMA12'))} "
+        f"EMA26 {format_price(readings.get('EMA26'))} "
+        f"SMA(6,1) {format_price(readings.get('SMA(6,1)'))}  "
+        f"20日 {format_price(mean)}±{format_price(stdev)} "
+        f"z {'N/A' if zscore is None else f'{zscore:+.2f}'}  "
+        f"52周 {format_price(readings.get('52周最低'))}-{format_price(readings.get('52周最高'))}"
+    )
@@ -2,6 +2,7 @@
 import argparse
 import re
 import sys
+import time
 from pathlib import Path
 from datetime import datetime
 
@@ -12,9 +13,19 @@ from rich.console import Console
 from rich.progress import BarColumn, Progress, TaskProgressColumn, TextColumn, TimeElapsedColumn, TimeRemainingColumn
 
 # Import custom display functions
-from analyzer import build_analysis_report, export_analysis_report
-from display import print_analysis_report, print_summary, print_data_view
-from quotes import load_basic_data, normalize_stock_code, update_basic_data
+import http_client
+from analyzer import build_analysis_report, build_market_window_metrics, export_analysis_report
+from display import (
+    print_analysis_report,
+    print_data_view,
+    print_http_metrics,
+    print_market_aggregate,
+    print_stream_tick,
+    print_summary,
+)
+from market import load_market_daily, rebuild_market_daily, update_market_daily
+from quotes import fetch_basic_snapshot, load_basic_data, normalize_stock_code, update_basic_data
+from streaming_indicators import DailyIndicatorSet
 
 # Initialize Rich Console
 console = Console()
@@ -80,21 +91,35 @@ def get_total_pages(soup):
 
 
 def scrape_page(session, url, retries=3, verbose=True):
-    """Fetches and parses a single page."""
+    """Fetches and parses a single page, backing off between failed attempts."""
     headers = {
         'User-Agent': 'Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/91.0.4472.124 Safari/537.36'
     }
-    for i in range(retries):
-        try:
-            response = session.get(url, headers=headers, timeout=10)
-            response.raise_for_status()
-            # The page is encoded in utf-8
-            response.encoding = 'utf-8'
-            return BeautifulSoup(response.text, 'lxml')
-        except requests.exceptions.RequestException as e:
-            if verbose:
-                console.print(f"[bold red]Error fetching {url} (attempt {i+1}/{retries}): {e}[/bold red]")
-    return None
+
+    def on_retry(attempt, attempts, exc, delay):
+        if verbose:
+            console.print(
+                f"[bold red]Error fetching {url} (attempt {attempt}/{attempts}): {exc}. "
+                f"Retrying in {delay:.1f}s[/bold red]"
+            )
+
+    try:
+        response = http_client.get(
+            session,
+            url,
+            headers=headers,
+            timeout=10,
+            policy=http_client.RetryPolicy(attempts=retries),
+            on_retry=on_retry,
+        )
+    except requests.exceptions.RequestException as e:
+        if verbose:
+            console.print(f"[bold red]Giving up on {url}: {e}[/bold red]")
+        return None
+
+    # The page is encoded in utf-8
+    response.encoding = 'utf-8'
+    return BeautifulSoup(response.text, 'lxml')
 
 
 def scrape_all_pages(stock_code, latest_date=None, verbose=True):
@@ -237,6 +262,7 @@ def update_stock_data(stock_code, verbose=True):
     if new_df.empty:
         if verbose:
             console.print("[yellow]No new data found. Using existing data.[/yellow]")
+        update_market_daily(stock_code, existing_df, verbose=verbose)
         return existing_df
 
     if verbose:
@@ -249,6 +275,7 @@ def update_stock_data(stock_code, verbose=True):
     combined_df.sort_values(by='日期', ascending=False, inplace=True)
     
     save_stock_data(combined_df, stock_code, verbose=verbose)
+    update_market_daily(stock_code, combined_df, verbose=verbose)
     return combined_df
 
 
@@ -379,6 +406,61 @@ def analyze_stock(stock_code, window="1y", should_update=True, should_export=Fal
             console.print(f"[green][OK][/green] Analysis exported to [bold]{file_path}[/bold]")
 
 
+def show_market_aggregate(should_rebuild=False, limit=10):
+    """Shows market-wide buyback windows served from the incremental aggregate table."""
+    market_df = rebuild_market_daily() if should_rebuild else load_market_daily()
+    if market_df.empty:
+        console.print(
+            "[bold red]Market aggregate is empty. Run fetch for some stocks or use --rebuild.[/bold red]"
+        )
+        return
+
+    window_df = build_market_window_metrics(market_df)
+    print_market_aggregate(market_df, window_df, limit)
+
+
+def load_indicator_state(stock_code):
+    """Restores streaming indicator state, bootstrapping once from cached daily basics."""
+    state_path = DATA_DIR / f"stream_{stock_code}.json"
+    state = DailyIndicatorSet.load(state_path)
+    if state is not None:
+        return state, state_path
+
+    state = DailyIndicatorSet()
+    basic_df = load_basic_data(stock_code)
+    today = datetime.now().strftime('%Y-%m-%d')
+    for _, row in basic_df.sort_values("日期").iterrows():
+        day = row["日期"].strftime('%Y-%m-%d')
+        if day < today and not pd.isna(row["最新价"]):
+            state.add_close(day, row["最新价"])
+    return state, state_path
+
+
+def watch_stock(stock_code, interval=60, count=None):
+    """Polls realtime quotes and prints incrementally updated indicators."""
+    stock_code = normalize_stock_code(stock_code)
+    state, state_path = load_indicator_state(stock_code)
+    ticks = 0
+    try:
+        while count is None or ticks < count:
+            if ticks:
+                time.sleep(interval)
+            ticks += 1
+            try:
+                snapshot = fetch_basic_snapshot(stock_code).iloc[0]
+            except Exception as exc:
+                console.print(f"[yellow]Quote update failed: {exc}[/yellow]")
+                continue
+            if pd.isna(snapshot["最新价"]):
+                continue
+
+            readings = state.update(pd.Timestamp(snapshot["日期"]).strftime('%Y-%m-%d'), snapshot["最新价"])
+            state.save(state_path)
+            print_stream_tick(snapshot, readings)
+    except KeyboardInterrupt:
+        console.print("[yellow]Watch stopped.[/yellow]")
+
+
 def main():
     """Main function to handle command-line arguments."""
     parser = argparse.ArgumentParser(
@@ -427,8 +509,32 @@ def main():
         help="Show update progress and cache logs before the analysis report.",
     )
 
+    # Aggregate command
+    parser_aggregate = subparsers.add_parser("aggregate", help="Show market-wide buyback windows across tracked stocks.")
+    parser_aggregate.add_argument(
+        "--rebuild",
+        action="store_true",
+        help="Rebuild the aggregate table from every cached stock CSV before reporting.",
+    )
+    parser_aggregate.add_argument("--limit", type=int, default=10, help="Number of recent days to display (default: 10)")
+
+    # Watch command
+    parser_watch = subparsers.add_parser("watch", help="Poll realtime quotes and update streaming indicators.")
+    parser_watch.add_argument("code", type=str, help="Stock code (e.g., 01810)")
+    parser_watch.add_argument("--interval", type=int, default=60, help="Seconds between quote polls (default: 60)")
+    parser_watch.add_argument("--count", type=int, help="Stop after this many polls (default: run until Ctrl+C)")
+
     args = parser.parse_args()
 
+    http_client.metrics.reset()
+    try:
+        run_command(parser, args)
+    finally:
+        print_http_metrics(http_client.metrics.snapshot(), http_client.circuit_breaker.open_hosts())
+
+
+def run_command(parser, args):
+    """Dispatches a parsed command."""
     if args.command == "fetch":
         update_stock_data(args.code)
     elif args.command == "view":
@@ -441,6 +547,10 @@ def main():
         show_summary(args.code, args.period, args.target_date)
     elif args.command == "analyze":
         analyze_stock(args.code, args.window, not args.no_update, args.export, args.verbose)
+    elif args.command == "aggregate":
+        show_market_aggregate(args.rebuild, args.limit)
+    elif args.command == "watch":
+        watch_stock(args.code, args.interval, args.count)
 
 if __name__ == "__main__":
     main()
@@ -0,0 +1,268 @@
+"""
+Cached columnar loader for yfinance financial statement CSVs.
+
+yfinance writes each statement as a wide CSV: one row per line item, one
+column per period end date. This module parses the income statement, balance
+sheet and cash flow files once into a float64 cube shaped
+(tickers, line items, periods) per frequency, caches it as `.npz`, and
+computes common ratios for every ticker and period in one vectorized call.
+
+Two layouts are recognized under the source directory:
+
+- `<TICKER>/income_stmt.csv`, `<TICKER>/balance_sheet.csv`, ... per ticker
+- `income_stmt.csv`, `balance_sheet.csv`, ... directly, for a single ticker
+  (as saved by `notebooks/yfinance/yfinance.ipynb`)
+
+Usage:
+    python scripts/data_analysis/financials.py notebooks/yfinance --ticker AAPL
+    python scripts/data_analysis/financials.py data/statements --frequency quarterly --sort fcf_margin
+"""
+
+import argparse
+import json
+from pathlib import Path
+
+import numpy as np
+import pandas as pd
+from rich.console import Console
+
+
+console = Console()
+CACHE_VERSION = 1
+STATEMENT_FILES = {
+    "annual": ("income_stmt.csv", "balance_sheet.csv", "cash_flow.csv"),
+    "quarterly": ("quarterly_income_stmt.csv", "quarterly_balance_sheet.csv", "quarterly_cash_flow.csv"),
+}
+
+
+class FinancialStatements:
+    """Array-backed statement values with O(1) ticker / line item / period lookups."""
+
+    def __init__(self, frequency, tickers, items, periods, values):
+        self.frequency = frequency
+        self.tickers = list(tickers)
+        self.items = list(items)
+        self.periods = list(periods)
+        self.values = values
+        self.ticker_index = {name: index for index, name in enumerate(self.tickers)}
+        self.item_index = {name: index for index, name in enumerate(self.items)}
+        self.period_index = {name: index for index, name in enumerate(self.periods)}
+
+    def __repr__(self):
+        return (
+            f"FinancialStatements({self.frequency!r}, tickers={len(self.tickers)}, "
+            f"items={len(self.items)}, periods={len(self.periods)})"
+        )
+
+    def value(self, ticker, item, period):
+        """Single value; NaN when the statement does not report it."""
+        return float(
+            self.values[self.ticker_index[ticker], self.item_index[item], self.period_index[str(period)[:10]]]
+        )
+
+    def item(self, item):
+        """(tickers, periods) array for one line item, all NaN if no ticker reports it."""
+        index = self.item_index.get(item)
+        if index is None:
+            return np.full((len(self.tickers), len(self.periods)), np.nan)
+        return self.values[:, index, :]
+
+    def ticker(self, ticker):
+        """Wide DataFrame for one ticker, in the original yfinance layout."""
+        return pd.DataFrame(self.values[self.ticker_index[ticker]], index=self.items, columns=self.periods)
+
+    def to_long(self, items=None):
+        """Long-format DataFrame (ticker, item, period, value) without missing values."""
+        item_names = list(items) if items is not None else self.items
+        item_positions = [self.item_index[name] for name in item_names]
+        cube = self.values[:, item_positions, :]
+        ticker_pos, item_pos, period_pos = np.nonzero(~np.isnan(cube))
+        return pd.DataFrame(
+            {
+                "ticker": np.asarray(self.tickers, dtype=object)[ticker_pos],
+                "item": np.asarray(item_names, dtype=object)[item_pos],
+                "period": pd.to_datetime(np.asarray(self.periods)[period_pos]),
+                "value": cube[ticker_pos, item_pos, period_pos],
+            }
+        )
+
+    def _first_available(self, *items):
+        result = self.item(items[0]).copy()
+        for name in items[1:]:
+            missing = np.isnan(result)
+            if not missing.any():
+                break
+            result[missing] = self.item(name)[missing]
+        return result
+
+    def ratios(self):
+        """
+        Common ratios for every (ticker, period), computed on whole arrays.
+
+        Quarterly flow items are not annualized, so `net_debt_to_ebitda` on
+        quarterly data is roughly four times the annual figure.
+        """
+        revenue = self._first_available("Total Revenue", "Operating Revenue")
+        operating_cash_flow = self.item("Operating Cash Flow")
+        free_cash_flow = self.item("Free Cash Flow").copy()
+        derived = np.isnan(free_cash_flow)
+        free_cash_flow[derived] = (operating_cash_flow + self.item("Capital Expenditure"))[derived]
+        equity = self._first_available("Stockholders Equity", "Common Stock Equity")
+        total_debt = self.item("Total Debt")
+        net_debt = self._first_available("Net Debt")
+        missing_net_debt = np.isnan(net_debt)
+        net_debt[missing_net_debt] = (total_debt - self.item("Cash And Cash Equivalents"))[missing_net_debt]
+
+        with np.errstate(divide="ignore", invalid="ignore"):
+            columns = {
+                "revenue": revenue,
+                "gross_margin": self.item("Gross Profit") / revenue,
+                "operating_margin": self.item("Operating Income") / revenue,
+                "net_margin": self.item("Net Income") / revenue,
+                "free_cash_flow": free_cash_flow,
+                "fcf_margin": free_cash_flow / revenue,
+                "debt_to_equity": total_debt / equity,
+                "net_debt_to_ebitda": net_debt / self.item("EBITDA"),
+                "liabilities_to_assets": self.item("Total Liabilities Net Minority Interest") / self.item("Total Assets"),
+                "current_ratio": self.item("Current Assets") / self.item("Current Liabilities"),
+                "return_on_equity": self.item("Net Income") / equity,
+            }
+
+        index = pd.MultiIndex.from_product(
+            [self.tickers, pd.to_datetime(self.periods)], names=["ticker", "period"]
+        )
+        frame = pd.DataFrame(
+            {name: np.where(np.isfinite(array), array, np.nan).ravel() for name, array in columns.items()},
+            index=index,
+        )
+        return frame.dropna(how="all")
+
+
+def _discover_files(source_dir, frequency, ticker):
+    """Maps ticker -> list of statement files present for the frequency."""
+    source_dir = Path(source_dir)
+    names = STATEMENT_FILES[frequency]
+    found = {}
+
+    flat = [source_dir / name for name in names if (source_dir / name).is_file()]
+    if flat:
+        found[(ticker or source_dir.name).upper()] = flat
+
+    for child in sorted(path for path in source_dir.iterdir() if path.is_dir()):
+        files = [child / name for name in names if (child / name).is_file()]
+        if files:
+            found[child.name.upper()] = files
+    return found
+
+
+def _signature(files_by_ticker):
+    return json.dumps(
+        [
+            [ticker, str(path), path.stat().st_mtime_ns, path.stat().st_size]
+            for ticker, files in sorted(files_by_ticker.items())
+            for path in files
+        ]
+    )
+
+
+def _read_statement(file_path):
+    df = pd.read_csv(file_path, index_col=0)
+    df.columns = [str(column)[:10] for column in df.columns]
+    df.index = df.index.astype(str)
+    df = df[~df.index.duplicated(keep="first")]
+    return df.apply(pd.to_numeric, errors="coerce")
+
+
+def _build_cube(frequency, files_by_ticker):
+    frames = {
+        ticker: [_read_statement(path) for path in files]
+        for ticker, files in files_by_ticker.items()
+    }
+    tickers = sorted(frames)
+    items = list(dict.fromkeys(item for parts in frames.values() for df in parts for item in df.index))
+    periods = sorted({period for parts in frames.values() for df in parts for period in df.columns})
+    item_index = {name: index for index, name in enumerate(items)}
+    period_index = {name: index for index, name in enumerate(periods)}
+
+    values = np.full((len(tickers), len(items), len(periods)), np.nan)
+    for ticker_pos, ticker in enumerate(tickers):
+        block = values[ticker_pos]
+        for df in frames[ticker]:
+            rows = np.fromiter((item_index[name] for name in df.index), dtype=np.intp, count=len(df.index))
+            cols = np.fromiter((period_index[name] for name in df.columns), dtype=np.intp, count=len(df.columns))
+            # The same item can appear in several statements (e.g. Net Income); keep the first reported value.
+            target = block[np.ix_(rows, cols)]
+            block[np.ix_(rows, cols)] = np.where(np.isnan(target), df.to_numpy(dtype=np.float64), target)
+    return FinancialStatements(frequency, tickers, items, periods, values)
+
+
+def load_statements(source_dir, frequency="annual", ticker=None, cache_dir=None, use_cache=True):
+    """
+    Loads every statement CSV under `source_dir` for `frequency`.
+
+    The parsed cube is cached as `statements_<frequency>.npz` in `cache_dir`
+    (default: `source_dir`) and reused while the source files are unchanged.
+    `ticker` names the single ticker of a flat layout (default: directory name).
+    """
+    if frequency not in STATEMENT_FILES:
+        raise ValueError(f"frequency must be one of {sorted(STATEMENT_FILES)}")
+
+    files_by_ticker = _discover_files(source_dir, frequency, ticker)
+    if not files_by_ticker:
+        raise FileNotFoundError(f"No {frequency} statement CSVs found under {source_dir}")
+
+    signature = _signature(files_by_ticker)
+    cache_path = Path(cache_dir or source_dir) / f"statements_{frequency}.npz"
+    if use_cache and cache_path.exists():
+        with np.load(cache_path, allow_pickle=False) as cached:
+            if int(cached["version"]) == CACHE_VERSION and str(cached["signature"]) == signature:
+                return FinancialStatements(
+                    frequency,
+                    cached["tickers"].tolist(),
+                    cached["items"].tolist(),
+                    cached["periods"].tolist(),
+                    cached["values"],
+                )
+
+    statements = _build_cube(frequency, files_by_ticker)
+    if use_cache:
+        cache_path.parent.mkdir(parents=True, exist_ok=True)
+        np.savez(
+            cache_path,
+            version=CACHE_VERSION,
+            signature=signature,
+            tickers=np.asarray(statements.tickers, dtype=str),
+            items=np.asarray(statements.items, dtype=str),
+            periods=np.asarray(statements.periods, dtype=str),
+            values=statements.values,
+        )
+    return statements
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Screen yfinance financial statement CSVs by common ratios.")
+    parser.add_argument("source_dir", type=Path, help="Directory with statement CSVs (flat or one folder per ticker)")
+    parser.add_argument("--frequency", choices=sorted(STATEMENT_FILES), default="annual", help="Statement frequency (default: annual)")
+    parser.add_argument("--ticker", help="Ticker name for a flat single-ticker directory")
+    parser.add_argument("--cache-dir", type=Path, help="Where to keep the parsed cache (default: source_dir)")
+    parser.add_argument("--no-cache", action="store_true", help="Parse the CSVs without reading or writing the cache")
+    parser.add_argument("--latest", action="store_true", help="Keep only the latest period per ticker")
+    parser.add_argument("--sort", default="fcf_margin", help="Ratio column to sort by (default: fcf_margin)")
+    args = parser.parse_args()
+
+    statements = load_statements(
+        args.source_dir, args.frequency, args.ticker, args.cache_dir, use_cache=not args.no_cache
+    )
+    ratios = statements.ratios()
+    if args.latest:
+        ratios = ratios.groupby(level="ticker").tail(1)
+    if args.sort in ratios.columns:
+        ratios = ratios.sort_values(args.sort, ascending=False)
+
+    console.print(f"[green][OK][/green] Loaded {statements!r}")
+    with pd.option_context("display.float_format", "{:,.4f}".format, "display.width", 200):
+        print(ratios.to_string())
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,220 @@
+"""
+Shared HTTP layer for the Eastmoney scrapers.
+
+Provides exponential backoff with full jitter, a per-host circuit breaker and
+request metrics (latency histogram, status codes, bytes, retries) that the
+CLI prints at the end of each command.
+"""
+
+import random
+import threading
+import time
+from collections import Counter
+from urllib.parse import urlsplit
+
+import requests
+
+
+RETRY_STATUS_CODES = {429, 500, 502, 503, 504}
+LATENCY_BUCKETS = (0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+
+
+class CircuitOpenError(requests.exceptions.RequestException):
+    """Raised when a host is short-circuited after repeated failures."""
+
+
+class RetryPolicy:
+    """
+    Exponential backoff with full jitter.
+
+    A server's Retry-After is honored as given rather than capped at
+    `max_delay`; retrying sooner only burns attempts and trips the breaker.
+    When it asks for more than `max_retry_after` seconds the request gives up.
+    """
+
+    def __init__(self, attempts=3, base_delay=0.5, max_delay=10.0, max_retry_after=60.0):
+        self.attempts = max(1, int(attempts))
+        self.base_delay = base_delay
+        self.max_delay = max_delay
+        self.max_retry_after = max_retry_after
+
+    def should_wait(self, retry_after):
+        """Whether a server-requested wait is short enough to retry after."""
+        return retry_after is None or retry_after <= self.max_retry_after
+
+    def delay(self, attempt, retry_after=None):
+        """Returns the sleep time before retry number `attempt` (1-based)."""
+        if retry_after is not None:
+            return retry_after
+        ceiling = min(self.max_delay, self.base_delay * (2 ** (attempt - 1)))
+        return random.uniform(0, ceiling)
+
+
+class CircuitBreaker:
+    """Per-host breaker: opens after consecutive failures, half-opens after a cooldown."""
+
+    def __init__(self, failure_threshold=5, reset_timeout=30.0):
+        self.failure_threshold = failure_threshold
+        self.reset_timeout = reset_timeout
+        self._lock = threading.Lock()
+        self._failures = {}
+        self._opened_at = {}
+
+    def allow(self, host):
+        with self._lock:
+            opened_at = self._opened_at.get(host)
+            if opened_at is None:
+                return True
+            # Half-open: let one probe through once the cooldown has elapsed.
+            if time.monotonic() - opened_at >= self.reset_timeout:
+                self._opened_at[host] = time.monotonic()
+                return True
+            return False
+
+    def record_success(self, host):
+        with self._lock:
+            self._failures.pop(host, None)
+            self._opened_at.pop(host, None)
+
+    def record_failure(self, host):
+        with self._lock:
+            failures = self._failures.get(host, 0) + 1
+            self._failures[host] = failures
+            if failures >= self.failure_threshold:
+                self._opened_at[host] = time.monotonic()
+                return True
+            return False
+
+    def open_hosts(self):
+        with self._lock:
+            return sorted(self._opened_at)
+
+
+class HttpMetrics:
+    """Thread-safe request counters collected over one CLI command."""
+
+    def __init__(self, buckets=LATENCY_BUCKETS):
+        self.buckets = tuple(buckets)
+        self._lock = threading.Lock()
+        self.reset()
+
+    def reset(self):
+        with self._lock:
+            self.requests = 0
+            self.retries = 0
+            self.errors = 0
+            self.short_circuited = 0
+            self.bytes_received = 0
+            self.latency_total = 0.0
+            self.latency_max = 0.0
+            self.status_codes = Counter()
+            self.latency_histogram = [0] * (len(self.buckets) + 1)
+
+    def observe(self, latency, status_code=None, size=0):
+        with self._lock:
+            self.requests += 1
+            self.latency_total += latency
+            self.latency_max = max(self.latency_max, latency)
+            self.bytes_received += size
+            if status_code is None:
+                self.errors += 1
+                self.status_codes["error"] += 1
+            else:
+                self.status_codes[status_code] += 1
+            for index, bound in enumerate(self.buckets):
+                if latency <= bound:
+                    self.latency_histogram[index] += 1
+                    break
+            else:
+                self.latency_histogram[-1] += 1
+
+    def record_retry(self):
+        with self._lock:
+            self.retries += 1
+
+    def record_short_circuit(self):
+        with self._lock:
+            self.short_circuited += 1
+
+    def snapshot(self):
+        with self._lock:
+            labels = [f"<={bound:g}s" for bound in self.buckets] + [f">{self.buckets[-1]:g}s"]
+            return {
+                "requests": self.requests,
+                "retries": self.retries,
+                "errors": self.errors,
+                "short_circuited": self.short_circuited,
+                "bytes": self.bytes_received,
+                "latency_avg": self.latency_total / self.requests if self.requests else None,
+                "latency_max": self.latency_max if self.requests else None,
+                "status_codes": dict(self.status_codes),
+                "latency_histogram": list(zip(labels, self.latency_histogram)),
+            }
+
+
+metrics = HttpMetrics()
+circuit_breaker = CircuitBreaker()
+default_policy = RetryPolicy()
+
+
+def _retry_after(response):
+    value = response.headers.get("Retry-After") if response is not None else None
+    if not value:
+        return None
+    try:
+        return max(0.0, float(value))
+    except ValueError:
+        return None
+
+
+def request(session, method, url, policy=None, on_retry=None, **kwargs):
+    """
+    Sends a request with retries, backoff and circuit breaking.
+
+    Returns the successful response or raises the last `requests` exception.
+    `on_retry(attempt, attempts, exc, delay)` is called before each backoff sleep.
+    """
+    policy = policy or default_policy
+    host = urlsplit(url).netloc
+    kwargs.setdefault("timeout", 10)
+
+    last_exc = None
+    for attempt in range(1, policy.attempts + 1):
+        if not circuit_breaker.allow(host):
+            metrics.record_short_circuit()
+            raise CircuitOpenError(f"Circuit open for {host}; skipping {url}")
+
+        response = None
+        started = time.perf_counter()
+        try:
+            response = session.request(method, url, **kwargs)
+            metrics.observe(time.perf_counter() - started, response.status_code, len(response.content))
+            response.raise_for_status()
+            circuit_breaker.record_success(host)
+            return response
+        except requests.exceptions.RequestException as exc:
+            if response is None:
+                metrics.observe(time.perf_counter() - started)
+            last_exc = exc
+            status_code = response.status_code if response is not None else None
+            if status_code is not None and status_code not in RETRY_STATUS_CODES:
+                # Client errors will not go away by retrying and say nothing about host health.
+                raise
+            if circuit_breaker.record_failure(host) or attempt == policy.attempts:
+                break
+
+            retry_after = _retry_after(response)
+            if not policy.should_wait(retry_after):
+                # The server wants a longer pause than this command is willing to wait.
+                break
+            delay = policy.delay(attempt, retry_after)
+            metrics.record_retry()
+            if on_retry is not None:
+                on_retry(attempt, policy.attempts, exc, delay)
+            time.sleep(delay)
+
+    raise last_exc
+
+
+def get(session, url, **kwargs):
+    return request(session, "GET", url, **kwargs)
@@ -0,0 +1,174 @@
+"""
+Vectorized technical indicators.
+
+Ported from `notebooks/market_indicators.ipynb`. Every function takes a 1-D
+price series or a 2-D array shaped (time, tickers), so one call computes the
+indicator for many tickers at once. Time runs along axis 0. pandas Series /
+DataFrame inputs are returned with the same index and columns.
+
+The exponential averages are first-order linear recurrences
+y[t] = decay * y[t-1] + gain * x[t]. When SciPy is installed they run through
+`scipy.signal.lfilter`; otherwise they are solved in blocks of matrix
+products with NumPy. Inputs are expected to be free of NaN values.
+"""
+
+import numpy as np
+import pandas as pd
+
+try:
+    from scipy.signal import lfilter
+except ImportError:  # SciPy is optional
+    lfilter = None
+
+
+def _as_array(values):
+    array = np.asarray(values, dtype=np.float64)
+    if array.ndim not in (1, 2):
+        raise ValueError("values must be a 1-D series or a 2-D (time, tickers) array")
+    return array
+
+
+def _wrap(like, result):
+    """Restores pandas index/columns when the input was a Series or DataFrame."""
+    if isinstance(like, pd.DataFrame):
+        return pd.DataFrame(result, index=like.index, columns=like.columns)
+    if isinstance(like, pd.Series):
+        return pd.Series(result, index=like.index, name=like.name)
+    return result
+
+
+def _recurrence(x, decay, gain, block=64):
+    """y[t] = decay * y[t-1] + gain * x[t] along axis 0, starting from y[-1] = 0."""
+    if lfilter is not None:
+        return lfilter([gain], [1.0, -decay], x, axis=0)
+
+    # Without SciPy, solve the recurrence block by block: inside a block it is a
+    # lower-triangular matrix product, and only the last row carries over.
+    y = np.empty_like(x)
+    steps = np.arange(min(block, len(x)))
+    lags = steps[:, None] - steps[None, :]
+    kernel = np.where(lags >= 0, gain * decay ** np.maximum(lags, 0), 0.0)
+    carry = decay ** (steps + 1)
+    previous = np.zeros(x.shape[1:])
+    for start in range(0, len(x), block):
+        chunk = x[start:start + block]
+        size = len(chunk)
+        y_chunk = kernel[:size, :size] @ chunk + np.multiply.outer(carry[:size], previous)
+        y[start:start + size] = y_chunk
+        previous = y_chunk[-1]
+    return y
+
+
+def _seeded_average(x, alpha):
+    """Exponential average seeded with the first value: y[0] = x[0]."""
+    if len(x) == 0:
+        return x.copy()
+    # Shifting by x[0] turns the seed into a zero initial state.
+    return x[0] + _recurrence(x - x[0], 1.0 - alpha, alpha)
+
+
+def _mask_warmup(result, n):
+    result[: max(n - 1, 0)] = np.nan
+    return result
+
+
+def sma(values, n):
+    """Simple moving average over `n` periods; the first n-1 rows are NaN."""
+    x = _as_array(values)
+    result = np.full_like(x, np.nan)
+    if n <= len(x):
+        csum = np.cumsum(x, axis=0)
+        result[n - 1] = csum[n - 1]
+        result[n:] = csum[n:] - csum[:-n]
+        result[n - 1:] /= n
+    return _wrap(values, result)
+
+
+def ema(values, n, adjust=True):
+    """
+    Exponential moving average with span `n` (alpha = 2 / (n + 1)).
+
+    `adjust=True` matches `Series.ewm(span=n, min_periods=n).mean()`, like the
+    notebook's `EMA`, with NaN for the first n-1 rows. `adjust=False` is the
+    recursive EMA used by Chinese charting software, seeded with the first value.
+    """
+    x = _as_array(values)
+    alpha = 2.0 / (n + 1)
+    if not adjust:
+        return _wrap(values, _seeded_average(x, alpha))
+
+    decay = 1.0 - alpha
+    numerator = _recurrence(x, decay, 1.0)
+    # Sum of weights 1 + decay + ... + decay**t, in closed form.
+    steps = np.arange(1, len(x) + 1, dtype=np.float64)
+    denominator = (1.0 - decay ** steps) / alpha
+    if x.ndim == 2:
+        denominator = denominator[:, None]
+    return _wrap(values, _mask_warmup(numerator / denominator, n))
+
+
+def sma_cn(values, n=6, m=1):
+    """Chinese-style SMA(X, N, M): y[t] = (M * x[t] + (N - M) * y[t-1]) / N, y[0] = x[0]."""
+    if not 0 < m <= n:
+        raise ValueError("sma_cn requires 0 < m <= n")
+    return _wrap(values, _seeded_average(_as_array(values), m / n))
+
+
+def macd(values, fast=12, slow=26, signal=9):
+    """MACD as (DIF, DEA, MACD bar), with the bar scaled by 2 as in Chinese software."""
+    x = _as_array(values)
+    dif = _seeded_average(x, 2.0 / (fast + 1)) - _seeded_average(x, 2.0 / (slow + 1))
+    dea = _seeded_average(dif, 2.0 / (signal + 1))
+    bar = 2.0 * (dif - dea)
+    return _wrap(values, dif), _wrap(values, dea), _wrap(values, bar)
+
+
+def rsi(values, n=14):
+    """RSI(N) = SMA(MAX(C - LC, 0), N, 1) / SMA(ABS(C - LC), N, 1) * 100."""
+    x = _as_array(values)
+    change = np.zeros_like(x)
+    change[1:] = x[1:] - x[:-1]
+    gain = _seeded_average(np.maximum(change, 0.0), 1.0 / n)
+    total = _seeded_average(np.abs(change), 1.0 / n)
+    with np.errstate(invalid="ignore", divide="ignore"):
+        result = np.where(total > 0, gain / total * 100.0, np.nan)
+    return _wrap(values, result)
+
+
+def _rolling_extreme(x, n, reducer):
+    """Rolling max/min over up to `n` rows; early rows use the history available."""
+    if len(x) == 0:
+        return x.copy()
+    # Padding with the first row leaves partial-window extremes unchanged.
+    pad = np.repeat(x[:1], n - 1, axis=0)
+    windows = np.lib.stride_tricks.sliding_window_view(np.concatenate([pad, x]), n, axis=0)
+    return reducer(windows, axis=-1)
+
+
+def hhv(values, n):
+    """Highest value over the last `n` periods."""
+    return _wrap(values, _rolling_extreme(_as_array(values), n, np.max))
+
+
+def llv(values, n):
+    """Lowest value over the last `n` periods."""
+    return _wrap(values, _rolling_extreme(_as_array(values), n, np.min))
+
+
+def kdj(high, low, close, n=9, m1=3, m2=3):
+    """
+    KDJ as (K, D, J).
+
+    RSV = (C - LLV(L, N)) / (HHV(H, N) - LLV(L, N)) * 100, K = SMA(RSV, M1, 1),
+    D = SMA(K, M2, 1), J = 3K - 2D. A flat range gives a neutral RSV of 50.
+    """
+    high, low, close_array = _as_array(high), _as_array(low), _as_array(close)
+    highest = _rolling_extreme(high, n, np.max)
+    lowest = _rolling_extreme(low, n, np.min)
+    price_range = highest - lowest
+    with np.errstate(invalid="ignore", divide="ignore"):
+        rsv = np.where(price_range > 0, (close_array - lowest) / price_range * 100.0, 50.0)
+    k = _seeded_average(rsv, 1.0 / m1)
+    d = _seeded_average(k, 1.0 / m2)
+    j = 3.0 * k - 2.0 * d
+    return _wrap(close, k), _wrap(close, d), _wrap(close, j)
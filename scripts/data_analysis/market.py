@@ -0,0 +1,186 @@
+"""
+Market-wide daily buyback aggregate.
+
+The aggregate table holds one row per date with the total HK buyback amount
+and the number of companies buying back across all tracked stocks. A small
+ledger records, per stock, the latest date already folded into the table so
+`update_stock_data` only has to add the newly scraped days.
+
+Both files are replaced atomically, ledger first with a pending marker. A
+marker left behind by an interrupted update means the table may or may not
+contain that stock's new days, so the next update rebuilds from the cached
+stock CSVs instead of folding the same days in twice.
+"""
+
+import json
+import os
+import re
+from pathlib import Path
+import sys
+
+import pandas as pd
+from rich.console import Console
+
+
+console = Console()
+APP_DIR = Path(sys.executable).parent if getattr(sys, "frozen", False) else Path(__file__).parent
+DATA_DIR = APP_DIR / "data"
+MARKET_DAILY_COLUMNS = ["日期", "回购总额(港元)", "回购公司数"]
+STOCK_FILE_PATTERN = re.compile(r"^\d{5}\.csv$")
+PENDING_KEY = "_pending"
+
+
+def market_daily_path():
+    return DATA_DIR / "market_daily.csv"
+
+
+def market_ledger_path():
+    return DATA_DIR / "market_daily_ledger.json"
+
+
+def load_market_daily():
+    """Loads the aggregate table sorted by date ascending."""
+    file_path = market_daily_path()
+    if not file_path.exists():
+        return pd.DataFrame(columns=MARKET_DAILY_COLUMNS)
+
+    df = pd.read_csv(file_path)
+    df["日期"] = pd.to_datetime(df["日期"]).dt.normalize()
+    df["回购总额(港元)"] = pd.to_numeric(df["回购总额(港元)"], errors="coerce").fillna(0)
+    df["回购公司数"] = pd.to_numeric(df["回购公司数"], errors="coerce").fillna(0).astype(int)
+    df.sort_values("日期", inplace=True)
+    df.reset_index(drop=True, inplace=True)
+    return df
+
+
+def _replace_file(path, write):
+    """Writes through a temp file next to `path` and swaps it in with os.replace."""
+    path.parent.mkdir(parents=True, exist_ok=True)
+    temp_path = path.with_name(path.name + ".tmp")
+    write(temp_path)
+    os.replace(temp_path, path)
+
+
+def save_market_daily(df):
+    output_df = df[MARKET_DAILY_COLUMNS].copy()
+    output_df["日期"] = pd.to_datetime(output_df["日期"]).dt.strftime("%Y-%m-%d")
+    _replace_file(market_daily_path(), lambda path: output_df.to_csv(path, index=False))
+
+
+def _load_ledger():
+    file_path = market_ledger_path()
+    if not file_path.exists():
+        return {}
+    with open(file_path, "r", encoding="utf-8") as f:
+        return json.load(f)
+
+
+def _save_ledger(ledger):
+    def write(path):
+        with open(path, "w", encoding="utf-8") as f:
+            json.dump(ledger, f, ensure_ascii=False, indent=2, sort_keys=True)
+
+    _replace_file(market_ledger_path(), write)
+
+
+def _stock_daily_amounts(buyback_df, after_date=None):
+    """Sums one stock's buyback records per date, keeping only dates after `after_date`."""
+    if buyback_df.empty or "日期" not in buyback_df.columns:
+        return pd.DataFrame(columns=MARKET_DAILY_COLUMNS)
+
+    dates = pd.to_datetime(buyback_df["日期"]).dt.normalize()
+    amounts = pd.to_numeric(buyback_df["回购总额(港元)"], errors="coerce").fillna(0)
+    if after_date is not None:
+        mask = dates > pd.Timestamp(after_date)
+        dates, amounts = dates[mask], amounts[mask]
+    if dates.empty:
+        return pd.DataFrame(columns=MARKET_DAILY_COLUMNS)
+
+    daily_df = amounts.groupby(dates).sum().rename("回购总额(港元)").reset_index()
+    daily_df.columns = ["日期", "回购总额(港元)"]
+    daily_df["回购公司数"] = 1
+    return daily_df
+
+
+def _merge_daily(market_df, additions):
+    if market_df.empty:
+        merged = additions
+    else:
+        merged = pd.concat([market_df, additions], ignore_index=True)
+    merged = merged.groupby("日期", as_index=False).agg(
+        {"回购总额(港元)": "sum", "回购公司数": "sum"}
+    )
+    merged["回购公司数"] = merged["回购公司数"].astype(int)
+    merged.sort_values("日期", inplace=True)
+    merged.reset_index(drop=True, inplace=True)
+    return merged
+
+
+def update_market_daily(stock_code, buyback_df, verbose=True):
+    """
+    Folds the days of `buyback_df` that are newer than the ledger entry for
+    `stock_code` into the aggregate table. A stock seen for the first time is
+    folded in full, so existing caches are picked up automatically.
+    """
+    ledger = _load_ledger()
+    if PENDING_KEY in ledger:
+        if verbose:
+            console.print(
+                f"[yellow]Previous market aggregate update for {ledger[PENDING_KEY]} was interrupted; "
+                f"rebuilding from cached stock data.[/yellow]"
+            )
+        rebuild_market_daily(verbose=verbose)
+        ledger = _load_ledger()
+
+    folded_through = ledger.get(stock_code)
+    additions = _stock_daily_amounts(buyback_df, folded_through)
+    if additions.empty:
+        return 0
+
+    market_df = _merge_daily(load_market_daily(), additions)
+    # Mark the fold as in progress before touching the table, then clear the
+    # mark together with the new ledger entry once the table is in place.
+    _save_ledger({**ledger, PENDING_KEY: stock_code})
+    save_market_daily(market_df)
+    ledger[stock_code] = additions["日期"].max().strftime("%Y-%m-%d")
+    _save_ledger(ledger)
+
+    if verbose:
+        console.print(
+            f"[green][OK][/green] Market aggregate updated with [bold]{len(additions)}[/bold] "
+            f"new day(s) from [bold]{stock_code}[/bold]"
+        )
+    return len(additions)
+
+
+def tracked_stock_files():
+    if not DATA_DIR.exists():
+        return []
+    return sorted(path for path in DATA_DIR.iterdir() if STOCK_FILE_PATTERN.match(path.name))
+
+
+def rebuild_market_daily(verbose=True):
+    """Rebuilds the aggregate table and ledger from every cached stock CSV."""
+    parts = []
+    ledger = {}
+    for file_path in tracked_stock_files():
+        stock_daily = _stock_daily_amounts(pd.read_csv(file_path))
+        if stock_daily.empty:
+            continue
+        parts.append(stock_daily)
+        ledger[file_path.stem] = stock_daily["日期"].max().strftime("%Y-%m-%d")
+
+    if parts:
+        market_df = _merge_daily(pd.DataFrame(columns=MARKET_DAILY_COLUMNS), pd.concat(parts, ignore_index=True))
+    else:
+        market_df = pd.DataFrame(columns=MARKET_DAILY_COLUMNS)
+    _save_ledger({PENDING_KEY: "rebuild"})
+    save_market_daily(market_df)
+    _save_ledger(ledger)
+
+    if verbose:
+        console.print(
+            f"[green][OK][/green] Market aggregate rebuilt from [bold]{len(ledger)}[/bold] stock(s) "
+            f"into [bold]{market_daily_path()}[/bold]"
+        )
+    return market_df
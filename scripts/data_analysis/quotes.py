@@ -6,6 +6,8 @@ import pandas as pd
 import requests
 from rich.console import Console
 
+import http_client
+
 
 console = Console()
 APP_DIR = Path(sys.executable).parent if getattr(sys, "frozen", False) else Path(__file__).parent
@@ -131,10 +133,11 @@ def fetch_basic_snapshot(stock_code, stock_name=None):
     }
 
     with requests.Session() as session:
-        page_response = session.get(quote_page, headers=headers, timeout=10)
-        page_response.raise_for_status()
+        # The quote page only primes cookies; retry it like the API call itself.
+        http_client.get(session, quote_page, headers=headers, timeout=10)
 
-        api_response = session.get(
+        api_response = http_client.get(
+            session,
             "https://push2.eastmoney.com/api/qt/stock/get",
             headers=headers,
             params={
@@ -143,7 +146,6 @@ def fetch_basic_snapshot(stock_code, stock_name=None):
             },
             timeout=10,
         )
-        api_response.raise_for_status()
         payload = api_response.json()
 
     if payload.get("rc") != 0 or not isinstance(payload.get("data"), dict):
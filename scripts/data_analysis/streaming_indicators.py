@@ -0,0 +1,274 @@
+"""
+Incremental indicator state for realtime monitoring.
+
+Each indicator takes O(1) work per new value (amortized for rolling max/min)
+and can be dumped with `to_dict()` and restored with `indicator_from_dict()`,
+so a restarted process resumes without replaying price history. `peek(value)`
+returns what the indicator would read if `value` were added, without
+committing it; this is how an unfinished intraday bar is shown.
+
+The recursive averages use the same definitions as `indicators.py`
+(`ema(..., adjust=False)` and `sma_cn`), seeded with the first value.
+"""
+
+import json
+import math
+from collections import deque
+from pathlib import Path
+
+
+class StreamingEMA:
+    """Recursive EMA with span `n`, seeded with the first value."""
+
+    kind = "ema"
+
+    def __init__(self, n, value=None, count=0):
+        self.n = n
+        self.alpha = 2.0 / (n + 1)
+        self.value = value
+        self.count = count
+
+    def peek(self, x):
+        if self.value is None:
+            return float(x)
+        return self.value + self.alpha * (x - self.value)
+
+    def update(self, x):
+        self.value = self.peek(x)
+        self.count += 1
+        return self.value
+
+    def to_dict(self):
+        return {"kind": self.kind, "n": self.n, "value": self.value, "count": self.count}
+
+    @classmethod
+    def from_dict(cls, data):
+        return cls(data["n"], data["value"], data["count"])
+
+
+class StreamingSMACN(StreamingEMA):
+    """Chinese-style SMA(X, N, M): y = (M * x + (N - M) * y') / N."""
+
+    kind = "sma_cn"
+
+    def __init__(self, n, m=1, value=None, count=0):
+        if not 0 < m <= n:
+            raise ValueError("sma_cn requires 0 < m <= n")
+        super().__init__(n, value, count)
+        self.m = m
+        self.alpha = m / n
+
+    def to_dict(self):
+        data = super().to_dict()
+        data["m"] = self.m
+        return data
+
+    @classmethod
+    def from_dict(cls, data):
+        return cls(data["n"], data["m"], data["value"], data["count"])
+
+
+class RollingStats:
+    """Mean and sample standard deviation over the last `window` values."""
+
+    kind = "rolling_stats"
+
+    def __init__(self, window, values=None):
+        self.window = window
+        self.values = deque(values or (), maxlen=window)
+        # Welford-style running moments, kept exact under eviction.
+        self.mean = 0.0
+        self.m2 = 0.0
+        for index, value in enumerate(self.values, start=1):
+            delta = value - self.mean
+            self.mean += delta / index
+            self.m2 += delta * (value - self.mean)
+
+    def _moments_after(self, x):
+        count = len(self.values)
+        if count < self.window:
+            new_count = count + 1
+            delta = x - self.mean
+            mean = self.mean + delta / new_count
+            m2 = self.m2 + delta * (x - mean)
+            return new_count, mean, m2
+
+        oldest = self.values[0]
+        mean = self.mean + (x - oldest) / count
+        m2 = self.m2 + (x - oldest) * (x - mean + oldest - self.mean)
+        return count, mean, max(m2, 0.0)
+
+    @staticmethod
+    def _result(count, mean, m2):
+        stdev = math.sqrt(m2 / (count - 1)) if count > 1 else None
+        return {"mean": mean if count else None, "stdev": stdev, "count": count}
+
+    def peek(self, x):
+        return self._result(*self._moments_after(x))
+
+    def update(self, x):
+        count, self.mean, self.m2 = self._moments_after(x)
+        self.values.append(float(x))
+        return self._result(count, self.mean, self.m2)
+
+    def current(self):
+        return self._result(len(self.values), self.mean, self.m2)
+
+    def to_dict(self):
+        return {"kind": self.kind, "window": self.window, "values": list(self.values)}
+
+    @classmethod
+    def from_dict(cls, data):
+        return cls(data["window"], data["values"])
+
+
+class RollingExtreme:
+    """Rolling max (or min) over the last `window` values using a monotonic deque."""
+
+    kind = "rolling_extreme"
+
+    def __init__(self, window, mode="max", count=0, candidates=None):
+        if mode not in ("max", "min"):
+            raise ValueError("mode must be 'max' or 'min'")
+        self.window = window
+        self.mode = mode
+        self.count = count
+        # (position, value) pairs with values strictly decreasing for max, increasing for min.
+        self.candidates = deque(tuple(item) for item in (candidates or ()))
+
+    def _dominates(self, a, b):
+        return a >= b if self.mode == "max" else a <= b
+
+    def _pick(self, a, b):
+        return max(a, b) if self.mode == "max" else min(a, b)
+
+    def peek(self, x):
+        # After adding x, positions <= count - window fall out; only the front
+        # two candidates can be affected by that eviction.
+        oldest_kept = self.count - self.window + 1
+        for position, value in list(self.candidates)[:2]:
+            if position >= oldest_kept:
+                return self._pick(value, x)
+        return float(x)
+
+    def update(self, x):
+        x = float(x)
+        while self.candidates and self._dominates(x, self.candidates[-1][1]):
+            self.candidates.pop()
+        self.candidates.append((self.count, x))
+        self.count += 1
+        while self.candidates[0][0] <= self.count - 1 - self.window:
+            self.candidates.popleft()
+        return self.candidates[0][1]
+
+    def current(self):
+        return self.candidates[0][1] if self.candidates else None
+
+    def to_dict(self):
+        return {
+            "kind": self.kind,
+            "window": self.window,
+            "mode": self.mode,
+            "count": self.count,
+            "candidates": [list(item) for item in self.candidates],
+        }
+
+    @classmethod
+    def from_dict(cls, data):
+        return cls(data["window"], data["mode"], data["count"], data["candidates"])
+
+
+INDICATOR_TYPES = {
+    cls.kind: cls for cls in (StreamingEMA, StreamingSMACN, RollingStats, RollingExtreme)
+}
+
+
+def indicator_from_dict(data):
+    return INDICATOR_TYPES[data["kind"]].from_dict(data)
+
+
+def default_indicators():
+    """Daily-close indicators used by the realtime watch command."""
+    return {
+        "EMA12": StreamingEMA(12),
+        "EMA26": StreamingEMA(26),
+        "SMA(6,1)": StreamingSMACN(6, 1),
+        "20日均值": RollingStats(20),
+        "52周最高": RollingExtreme(250, "max"),
+        "52周最低": RollingExtreme(250, "min"),
+    }
+
+
+class DailyIndicatorSet:
+    """
+    Feeds realtime prices into daily-close indicators.
+
+    Prices for the current trading date stay pending and are shown through
+    `peek`; the last price of a date is committed once a later date arrives.
+    """
+
+    def __init__(self, indicators=None, pending_date=None, pending_price=None, committed_date=None):
+        self.indicators = indicators if indicators is not None else default_indicators()
+        self.pending_date = pending_date
+        self.pending_price = pending_price
+        self.committed_date = committed_date
+
+    def _commit_pending(self):
+        if self.pending_date is None:
+            return
+        for indicator in self.indicators.values():
+            indicator.update(self.pending_price)
+        self.committed_date = self.pending_date
+        self.pending_date = None
+        self.pending_price = None
+
+    def update(self, day, price):
+        """Records `price` for ISO date string `day` and returns provisional readings."""
+        if self.committed_date is not None and day <= self.committed_date:
+            return self.readings(price)
+        if self.pending_date is not None and day > self.pending_date:
+            self._commit_pending()
+        self.pending_date = day
+        self.pending_price = float(price)
+        return self.readings(price)
+
+    def add_close(self, day, price):
+        """Commits a historical daily close, e.g. when bootstrapping from cached basics."""
+        self.update(day, price)
+        self._commit_pending()
+
+    def readings(self, price):
+        return {name: indicator.peek(price) for name, indicator in self.indicators.items()}
+
+    def to_dict(self):
+        return {
+            "pending_date": self.pending_date,
+            "pending_price": self.pending_price,
+            "committed_date": self.committed_date,
+            "indicators": {name: indicator.to_dict() for name, indicator in self.indicators.items()},
+        }
+
+    @classmethod
+    def from_dict(cls, data):
+        return cls(
+            {name: indicator_from_dict(item) for name, item in data["indicators"].items()},
+            data.get("pending_date"),
+            data.get("pending_price"),
+            data.get("committed_date"),
+        )
+
+    def save(self, file_path):
+        file_path = Path(file_path)
+        file_path.parent.mkdir(parents=True, exist_ok=True)
+        temp_path = file_path.with_suffix(file_path.suffix + ".tmp")
+        with open(temp_path, "w", encoding="utf-8") as f:
+            json.dump(self.to_dict(), f, ensure_ascii=False)
+        temp_path.replace(file_path)
+
+    @classmethod
+    def load(cls, file_path):
+        file_path = Path(file_path)
+        if not file_path.exists():
+            return None
+        with open(file_path, "r", encoding="utf-8") as f:
+            return cls.from_dict(json.load(f))
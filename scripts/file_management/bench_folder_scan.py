@@ -0,0 +1,94 @@
+"""
+文件夹扫描基准测试：对比原 os.walk + Path.exists() + Path.stat() 实现与 scandir 引擎
+
+用法:
+    python bench_folder_scan.py --files 100000
+    python bench_folder_scan.py --files 1000000 --workers 1 8 32 --keep /tmp/scan_tree
+"""
+
+import argparse
+import os
+import shutil
+import tempfile
+import time
+from pathlib import Path
+
+from folder_scanner import scan_folder
+
+
+def legacy_folder_stats(folder_path: Path) -> dict:
+    """原 FolderMonitor.get_folder_stats 的扫描逻辑"""
+    total_size = 0
+    file_count = 0
+    folder_count = 0
+    largest_file = {'name': '', 'size': 0}
+    for root, dirs, files in os.walk(folder_path):
+        folder_count += len(dirs)
+        for filename in files:
+            file_count += 1
+            filepath = Path(root) / filename
+            if filepath.exists():
+                file_size = filepath.stat().st_size
+                total_size += file_size
+                if file_size > largest_file['size']:
+                    largest_file = {'name': str(filepath.relative_to(folder_path)), 'size': file_size}
+    return {'total_size': total_size, 'file_count': file_count, 'folder_count': folder_count,
+            'largest_file': largest_file}
+
+
+def build_tree(root: Path, files: int, files_per_dir: int = 200, fanout: int = 16):
+    """生成合成目录树：每个目录 files_per_dir 个小文件，目录按 fanout 分层"""
+    dir_count = max(1, files // files_per_dir)
+    created = 0
+    for index in range(dir_count):
+        parts = []
+        value = index
+        while True:
+            parts.append(f"d{value % fanout:02d}")
+            value //= fanout
+            if value == 0:
+                break
+        directory = root.joinpath(*parts)
+        directory.mkdir(parents=True, exist_ok=True)
+        for number in range(min(files_per_dir, files - created)):
+            with open(directory / f"f{number:04d}.dat", 'wb') as f:
+                f.write(b'x' * (number % 64))
+        created += files_per_dir
+        if created >= files:
+            break
+
+
+def timed(func, *args, **kwargs):
+    started = time.perf_counter()
+    result = func(*args, **kwargs)
+    return time.perf_counter() - started, result
+
+
+def main():
+    parser = argparse.ArgumentParser(description="文件夹扫描基准测试")
+    parser.add_argument("--files", type=int, default=100000, help="合成文件数量 (默认: 100000)")
+    parser.add_argument("--workers", type=int, nargs='+', default=[1, 4, 16], help="scandir 引擎线程数列表")
+    parser.add_argument("--keep", help="在指定路径生成并保留目录树，已存在时直接复用")
+    args = parser.parse_args()
+
+    root = Path(args.keep) if args.keep else Path(tempfile.mkdtemp(prefix='scan_bench_'))
+    try:
+        if not root.exists() or not any(root.iterdir()):
+            root.mkdir(parents=True, exist_ok=True)
+            elapsed, _ = timed(build_tree, root, args.files)
+            print(f"生成 {args.files} 个文件用时 {elapsed:.1f}s: {root}")
+
+        legacy_time, legacy = timed(legacy_folder_stats, root)
+        print(f"os.walk + exists + stat : {legacy_time:8.3f}s  文件 {legacy['file_count']}  大小 {legacy['total_size']}")
+        for workers in args.workers:
+            elapsed, stats = timed(scan_folder, root, workers=workers)
+            same = (stats['file_count'], stats['total_size'], stats['folder_count']) == (
+                legacy['file_count'], legacy['total_size'], legacy['folder_count'])
+            print(f"scandir workers={workers:<3}     : {elapsed:8.3f}s  加速 {legacy_time / elapsed:5.2f}x  结果一致={same}")
+    finally:
+        if not args.keep:
+            shutil.rmtree(root, ignore_errors=True)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,73 @@
+"""
+近似重复查找基准测试：多索引哈希与两两比较
+
+随机生成 64 位哈希（模拟 pHash），其中一部分是其他哈希翻转 1 位得到的近似副本。
+两两比较只在较小的规模上计时，再按 O(N^2) 估算到目标规模。
+
+用法:
+    python bench_image_hash.py --count 1000000
+    python bench_image_hash.py --count 1000000 --threshold 4
+"""
+
+import argparse
+import time
+
+import numpy as np
+
+from image_hash import MultiIndexHash, popcount
+
+
+def build_hashes(count: int, near: int, seed: int = 1) -> np.ndarray:
+    """生成 count 个随机哈希，最后 near 个是前 near 个各翻转 1 位的副本"""
+    rng = np.random.default_rng(seed)
+    hashes = rng.integers(0, 1 << 63, count, dtype=np.uint64) << np.uint64(1)
+    hashes |= rng.integers(0, 2, count, dtype=np.uint64)
+    bits = rng.integers(0, 64, near).astype(np.uint64)
+    hashes[count - near:] = hashes[:near] ^ (np.uint64(1) << bits)
+    return hashes
+
+
+def brute_force_pairs(hashes: np.ndarray, threshold: int, block: int = 1024) -> int:
+    found = 0
+    for start in range(0, len(hashes), block):
+        distances = popcount(hashes[start:start + block, None] ^ hashes[None, :])
+        found += int((distances <= threshold).sum())
+    # 去掉自身，每对计算了两次
+    return (found - len(hashes)) // 2
+
+
+def timed(func, *args):
+    started = time.perf_counter()
+    result = func(*args)
+    return time.perf_counter() - started, result
+
+
+def main():
+    parser = argparse.ArgumentParser(description="近似重复查找基准测试")
+    parser.add_argument("--count", type=int, default=1000000, help="哈希数量 (默认: 1000000)")
+    parser.add_argument("--threshold", type=int, default=3, help="最大汉明距离 (默认: 3)")
+    parser.add_argument("--brute-count", type=int, default=20000, help="两两比较实测的规模 (默认: 20000)")
+    args = parser.parse_args()
+
+    near = max(1, args.count // 200)
+    hashes = build_hashes(args.count, near)
+
+    build_time, index = timed(MultiIndexHash, hashes)
+    pairs_time, (i, j, distances) = timed(index.pairs, args.threshold)
+    print(f"{args.count} 个哈希，阈值 {args.threshold}，植入近似副本 {near} 对")
+    print(f"  多索引哈希: 建索引 {build_time:7.3f}s  查找全部相似对 {pairs_time:7.3f}s  找到 {len(i)} 对")
+
+    queries = hashes[-1000:]
+    query_time, _ = timed(lambda: [index.query(int(value), args.threshold) for value in queries])
+    print(f"  单个查询  : 平均 {query_time / len(queries) * 1000:7.3f}ms")
+
+    sample = hashes[:args.brute_count]
+    brute_time, brute_found = timed(brute_force_pairs, sample, args.threshold)
+    estimate = brute_time * (args.count / len(sample)) ** 2
+    _, (sample_i, _, _) = timed(MultiIndexHash(sample).pairs, args.threshold)
+    assert len(sample_i) == brute_found, "多索引哈希结果与两两比较不一致"
+    print(f"  两两比较  : {len(sample)} 个实测 {brute_time:7.3f}s，估算 {args.count} 个约 {estimate:9.1f}s")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,134 @@
+"""
+按年份整理基准测试：对比原实现（iterdir + 两次 stat + 串行 shutil.move）与 scandir 单次 stat + 并行 os.rename
+
+另外测试大量同名文件进入同一年份文件夹时的冲突处理：逐个 exists 探测与内存文件名索引。
+
+用法:
+    python bench_organize.py --files 100000
+    python bench_organize.py --files 100000 --workers 1 8 32 --dir /mnt/nas/bench
+    python bench_organize.py --files 0 --collisions 5000
+"""
+
+import argparse
+import os
+import shutil
+import tempfile
+import time
+from datetime import datetime
+from pathlib import Path
+
+from loguru import logger
+
+from organize_files_by_year import FileOrganizerByYear
+
+
+def legacy_organize(source_folder: Path):
+    """原 scan_and_organize_files 的核心逻辑"""
+
+    def get_file_year(file_path: Path) -> int:
+        return datetime.fromtimestamp(file_path.stat().st_mtime).year
+
+    all_files = [f for f in source_folder.iterdir() if f.is_file()]
+    file_groups = {}
+    for file_path in all_files:
+        file_groups.setdefault(get_file_year(file_path), []).append(file_path.name)
+
+    for file_path in all_files:
+        year = get_file_year(file_path)
+        year_folder = source_folder / str(year)
+        year_folder.mkdir(exist_ok=True)
+        destination = year_folder / file_path.name
+        counter = 1
+        while destination.exists():
+            destination = year_folder / f"{file_path.stem}_{counter}{file_path.suffix}"
+            counter += 1
+        shutil.move(str(file_path), str(destination))
+    return file_groups
+
+
+def build_folder(root: Path, files: int, years: int = 10):
+    """生成平铺的文件夹：文件 mtime 均匀分布在最近 years 年"""
+    root.mkdir(parents=True, exist_ok=True)
+    now = time.time()
+    for number in range(files):
+        path = root / f"IMG_{number:06d}.jpg"
+        with open(path, 'wb') as f:
+            f.write(b'x' * (number % 64))
+        mtime = now - (number % years) * 366 * 86400
+        os.utime(path, (mtime, mtime))
+
+
+def legacy_collisions(folder: Path, count: int):
+    """原 move_file 的冲突处理：同一个文件名重复 count 次，每次从 _1 开始逐个 exists 探测"""
+    folder.mkdir(parents=True, exist_ok=True)
+    for _ in range(count):
+        destination = folder / "IMG_0001.JPG"
+        counter = 1
+        while destination.exists():
+            destination = folder / f"IMG_0001_{counter}.JPG"
+            counter += 1
+        destination.touch()
+
+
+def indexed_collisions(organizer: FileOrganizerByYear, count: int):
+    """文件名索引：冲突在内存中解决"""
+    year_folder = organizer.create_year_folder(2000)
+    for _ in range(count):
+        name = organizer._claim_destination("IMG_0001.JPG", year_folder)
+        open(os.path.join(organizer._folder_paths[year_folder], name), 'wb').close()
+
+
+def timed(func, *args, **kwargs):
+    started = time.perf_counter()
+    result = func(*args, **kwargs)
+    return time.perf_counter() - started, result
+
+
+def bench_flat(base: Path, files: int, worker_counts):
+    source = base / 'legacy'
+    elapsed, _ = timed(build_folder, source, files)
+    print(f"生成 {files} 个文件用时 {elapsed:.1f}s: {base}")
+    legacy_time, _ = timed(legacy_organize, source)
+    print(f"iterdir + 2x stat + shutil.move : {legacy_time:8.3f}s")
+
+    for workers in worker_counts:
+        source = base / f'workers_{workers}'
+        build_folder(source, files)
+        organizer = FileOrganizerByYear(str(source), workers=workers)
+        logger.remove()
+        elapsed, groups = timed(organizer.scan_and_organize_files)
+        moved = organizer.stats['moved_files']
+        print(f"scandir + os.rename workers={workers:<3}: {elapsed:8.3f}s  加速 {legacy_time / elapsed:5.2f}x  "
+              f"移动 {moved}/{files}")
+
+
+def main():
+    parser = argparse.ArgumentParser(description="按年份整理基准测试")
+    parser.add_argument("--files", type=int, default=100000, help="合成文件数量 (默认: 100000)")
+    parser.add_argument("--workers", type=int, nargs='+', default=[1, 8], help="并行移动线程数列表")
+    parser.add_argument("--collisions", type=int, default=2000, help="同名文件数量，0 表示不测试 (默认: 2000)")
+    parser.add_argument("--dir", help="在指定目录下生成测试文件夹（默认系统临时目录）")
+    args = parser.parse_args()
+
+    # 基准测试只关心耗时，关闭逐文件日志
+    logger.remove()
+
+    base = Path(tempfile.mkdtemp(prefix='organize_bench_', dir=args.dir))
+    try:
+        if args.files:
+            bench_flat(base, args.files, args.workers)
+
+        if args.collisions:
+            legacy_time, _ = timed(legacy_collisions, base / 'collisions_legacy' / '2000', args.collisions)
+            print(f"{args.collisions} 个同名文件 exists 探测 : {legacy_time:8.3f}s")
+            organizer = FileOrganizerByYear(str(base / 'collisions_indexed'))
+            organizer.source_folder.mkdir()
+            logger.remove()
+            elapsed, _ = timed(indexed_collisions, organizer, args.collisions)
+            print(f"{args.collisions} 个同名文件 文件名索引 : {elapsed:8.3f}s  加速 {legacy_time / elapsed:5.2f}x")
+    finally:
+        shutil.rmtree(base, ignore_errors=True)
+
+
+if __name__ == "__main__":
+    main()
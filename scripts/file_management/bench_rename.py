@@ -0,0 +1,112 @@
+"""
+图片重命名基准测试：对比原实现（逐个 exists 检查 + 冲突时经 temp_ 名称覆盖）与置换式重命名计划
+
+测试文件夹中的图片大部分已经编号：
+- gaps:   删除 1% 的文件，后面的文件整体前移（链）
+- insert: 在中间插入 1% 的新文件，后面的文件整体后移（链的方向相反，原实现会覆盖文件）
+
+用法:
+    python bench_rename.py --files 100000
+    python bench_rename.py --files 100000 --dir /mnt/nas/bench
+"""
+
+import argparse
+import os
+import random
+import shutil
+import tempfile
+import time
+from pathlib import Path
+
+from loguru import logger
+
+from rename_images import ImageRenamer
+from rename_planner import plan_renames
+
+
+def legacy_rename(renamer: ImageRenamer, folder: Path):
+    """原 rename_images_in_folder 的映射生成和执行逻辑"""
+    image_files = renamer.get_image_files_in_folder(folder)
+    padding = renamer.calculate_padding(len(image_files))
+    rename_mapping = []
+    for number, file_path in enumerate(image_files, renamer.start_number):
+        expected_name = renamer.generate_new_name(number, padding, file_path.suffix)
+        if file_path.name != expected_name:
+            rename_mapping.append((file_path, expected_name))
+
+    for old_path, new_name in rename_mapping:
+        new_path = old_path.parent / new_name
+        if new_path.exists() and new_path != old_path:
+            temp_path = old_path.parent / f"temp_{new_name}"
+            old_path.rename(temp_path)
+            temp_path.rename(new_path)
+        else:
+            old_path.rename(new_path)
+    return len(rename_mapping)
+
+
+def build_folder(folder: Path, files: int, scenario: str, seed: int = 1):
+    """生成已编号的文件夹，按场景删除或插入 1% 的文件"""
+    folder.mkdir(parents=True)
+    # 位数按最终文件数确定，只有编号需要移动的文件才会被重命名
+    padding = len(str(files - files // 100 if scenario == 'gaps' else files + files // 100))
+    names = [f"{number:0{padding}d}.jpg" for number in range(1, files + 1)]
+    picked = set(random.Random(seed).sample(range(files), files // 100))
+    if scenario == 'gaps':
+        names = [name for index, name in enumerate(names) if index not in picked]
+    else:
+        # 数字后带字母的名称在自然排序中紧跟在该数字之后
+        names += [f"{index + 1:0{padding}d}a.jpg" for index in picked]
+    for name in names:
+        with open(folder / name, 'wb') as f:
+            f.write(name.encode())
+    return len(names)
+
+
+def timed(func, *args):
+    started = time.perf_counter()
+    result = func(*args)
+    return time.perf_counter() - started, result
+
+
+def main():
+    parser = argparse.ArgumentParser(description="图片重命名基准测试")
+    parser.add_argument("--files", type=int, default=100000, help="每个文件夹的图片数量 (默认: 100000)")
+    parser.add_argument("--dir", help="在指定目录下生成测试文件夹（默认系统临时目录）")
+    args = parser.parse_args()
+
+    base = Path(tempfile.mkdtemp(prefix='rename_bench_', dir=args.dir))
+    try:
+        for scenario in ('gaps', 'insert'):
+            legacy_folder = base / f'{scenario}_legacy'
+            planned_folder = base / f'{scenario}_planned'
+            count = build_folder(legacy_folder, args.files, scenario)
+            build_folder(planned_folder, args.files, scenario)
+
+            renamer = ImageRenamer(str(base))
+            # 基准测试只关心耗时，关闭逐文件日志
+            logger.remove()
+
+            legacy_time, renamed = timed(legacy_rename, renamer, legacy_folder)
+            legacy_left = len(os.listdir(legacy_folder))
+            print(f"[{scenario}] {count} 个文件，需重命名 {renamed} 个")
+            print(f"  exists + temp_ 覆盖 : {legacy_time:8.3f}s  剩余文件 {legacy_left} (丢失 {count - legacy_left})")
+
+            image_files = renamer.get_image_files_in_folder(planned_folder)
+            padding = renamer.calculate_padding(len(image_files))
+            mapping = {path.name: renamer.generate_new_name(number, padding, path.suffix)
+                       for number, path in enumerate(image_files, renamer.start_number)}
+            mapping = {old: new for old, new in mapping.items() if old != new}
+            plan_time, plan = timed(plan_renames, mapping, set(os.listdir(planned_folder)))
+
+            planned_time, stats = timed(renamer.rename_images_in_folder, planned_folder)
+            planned_left = len(os.listdir(planned_folder))
+            print(f"  置换式重命名计划    : {planned_time:8.3f}s  剩余文件 {planned_left} (丢失 {count - planned_left})  "
+                  f"加速 {legacy_time / planned_time:5.2f}x")
+            print(f"  其中生成计划        : {plan_time:8.3f}s  rename {len(plan.operations)} 次，环 {plan.cycles} 个")
+    finally:
+        shutil.rmtree(base, ignore_errors=True)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,93 @@
+"""
+体积历史基准测试：对比 deque[dict[datetime]] 线性扫描与 SizeHistory 环形数组 + 二分查找
+
+用法:
+    python bench_size_history.py [--entries 10080] [--ticks 200]
+"""
+
+import argparse
+import time
+import tracemalloc
+from collections import deque
+from datetime import datetime, timedelta
+
+from folder_history import SizeHistory
+
+PERIODS = (60, 3600, 43200, 86400)
+
+
+def build_legacy(entries: int, start: datetime) -> deque:
+    history = deque(maxlen=entries)
+    for index in range(entries):
+        history.append({'timestamp': start + timedelta(minutes=index), 'size': 10**9 + index * 4096})
+    return history
+
+
+def build_arrays(entries: int, start: datetime) -> SizeHistory:
+    history = SizeHistory(entries)
+    base = start.timestamp()
+    for index in range(entries):
+        history.append(base + index * 60, 10**9 + index * 4096)
+    return history
+
+
+def legacy_tick(history: deque, now: datetime) -> list:
+    """原 get_historical_growth 的查找逻辑，返回每个时间段找到的记录"""
+    found = []
+    for seconds in PERIODS:
+        target_time = now - timedelta(seconds=seconds)
+        closest_record = None
+        min_time_diff = float('inf')
+        for record in history:
+            time_diff = abs((record['timestamp'] - target_time).total_seconds())
+            if time_diff < min_time_diff:
+                min_time_diff = time_diff
+                closest_record = record
+        found.append(closest_record)
+    return found
+
+
+def array_tick(history: SizeHistory, now: float) -> list:
+    return [history.nearest(now - seconds) for seconds in PERIODS]
+
+
+def measure_memory(builder, entries: int, start: datetime):
+    tracemalloc.start()
+    history = builder(entries, start)
+    current, _ = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    return current, history
+
+
+def main():
+    parser = argparse.ArgumentParser(description="体积历史基准测试")
+    parser.add_argument("--entries", type=int, default=24 * 60 * 7, help="历史记录条数 (默认: 一周分钟级 10080)")
+    parser.add_argument("--ticks", type=int, default=200, help="模拟的监控周期数 (默认: 200)")
+    args = parser.parse_args()
+
+    start = datetime(2026, 1, 1)
+    legacy_memory, legacy = measure_memory(build_legacy, args.entries, start)
+    array_memory, arrays = measure_memory(build_arrays, args.entries, start)
+    print(f"内存: deque[dict] {legacy_memory / 1024:,.0f} KB  环形数组 {array_memory / 1024:,.0f} KB  "
+          f"减少 {legacy_memory / array_memory:.1f}x")
+
+    now = start + timedelta(minutes=args.entries)
+    started = time.perf_counter()
+    for _ in range(args.ticks):
+        legacy_found = legacy_tick(legacy, now)
+    legacy_time = (time.perf_counter() - started) / args.ticks
+
+    now_ts = now.timestamp()
+    started = time.perf_counter()
+    for _ in range(args.ticks):
+        array_found = array_tick(arrays, now_ts)
+    array_time = (time.perf_counter() - started) / args.ticks
+    # 两种查找应当找到同样的记录
+    assert [record['size'] for record in legacy_found] == [record[1] for record in array_found], \
+        "二分查找与线性扫描的结果不一致"
+    print(f"每周期查询: 线性扫描 {legacy_time * 1000:.3f} ms  二分查找 {array_time * 1000:.4f} ms  "
+          f"加速 {legacy_time / array_time:,.0f}x")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,263 @@
+"""
+照片、视频的拍摄时间提取
+
+只读取文件头部字节，不解码图像：
+- JPEG：APP1 段中的 EXIF，依次取 DateTimeOriginal、DateTimeDigitized、DateTime
+- TIFF 及基于 TIFF 的 RAW（DNG/NEF/CR2/ARW 等）：直接解析 IFD
+- MP4/MOV/3GP 等 ISO BMFF 容器：逐个读取 box 头部定位 moov/mvhd，取创建时间
+- 以上都没有时，从文件名中识别日期（IMG_20210503_123456、2021-05-03 12.34.56 等）
+
+结果缓存在 SQLite 中，键为 (路径, 大小, mtime)，文件未变化时重复运行不再读取文件。
+HEIC 的 EXIF 存放在 item 中，解析代价较高，目前只按文件名识别。
+"""
+
+import os
+import re
+import sqlite3
+import struct
+import threading
+from datetime import datetime, timedelta, timezone
+from typing import BinaryIO, Optional, Tuple
+
+from loguru import logger
+
+
+MEDIA_EXTENSIONS = {
+    '.jpg', '.jpeg', '.jpe', '.tif', '.tiff', '.dng', '.nef', '.cr2', '.arw', '.orf', '.rw2', '.pef', '.srw',
+    '.mp4', '.m4v', '.mov', '.3gp', '.3g2', '.heic', '.heif',
+}
+
+# JPEG 中 EXIF 之前的段一般很小，超过这个范围仍未找到就放弃
+JPEG_SCAN_LIMIT = 256 * 1024
+EXIF_DATE_TAGS = (0x9003, 0x9004)  # DateTimeOriginal, DateTimeDigitized（位于 Exif 子 IFD）
+IFD0_DATE_TAG = 0x0132             # DateTime
+EXIF_IFD_POINTER = 0x8769
+QUICKTIME_EPOCH = datetime(1904, 1, 1, tzinfo=timezone.utc)
+
+FILENAME_DATE = re.compile(
+    r'(?<!\d)((?:19|20)\d{2})[-_.]?(0[1-9]|1[0-2])[-_.]?(0[1-9]|[12]\d|3[01])(?!\d)'
+)
+
+
+def _parse_exif_datetime(raw: bytes) -> Optional[datetime]:
+    text = raw.split(b'\x00', 1)[0].decode('ascii', 'ignore').strip()
+    try:
+        return datetime.strptime(text[:19], '%Y:%m:%d %H:%M:%S')
+    except ValueError:
+        return None
+
+
+def _tiff_datetime(data: bytes) -> Optional[datetime]:
+    """解析 TIFF 结构（EXIF 段内容或 TIFF 文件头部）中的拍摄时间"""
+    if len(data) < 8:
+        return None
+    if data[:2] == b'II':
+        endian = '<'
+    elif data[:2] == b'MM':
+        endian = '>'
+    else:
+        return None
+
+    def read_ifd(offset: int) -> dict:
+        entries = {}
+        if offset + 2 > len(data):
+            return entries
+        count = struct.unpack_from(endian + 'H', data, offset)[0]
+        for index in range(count):
+            position = offset + 2 + index * 12
+            if position + 12 > len(data):
+                break
+            tag, kind, number = struct.unpack_from(endian + 'HHI', data, position)
+            entries[tag] = (kind, number, position + 8)
+        return entries
+
+    def ascii_value(entry) -> Optional[datetime]:
+        kind, number, value_position = entry
+        if kind != 2:
+            return None
+        if number <= 4:
+            start = value_position
+        else:
+            start = struct.unpack_from(endian + 'I', data, value_position)[0]
+        return _parse_exif_datetime(data[start:start + number])
+
+    ifd0 = read_ifd(struct.unpack_from(endian + 'I', data, 4)[0])
+    if EXIF_IFD_POINTER in ifd0:
+        exif_offset = struct.unpack_from(endian + 'I', data, ifd0[EXIF_IFD_POINTER][2])[0]
+        exif_ifd = read_ifd(exif_offset)
+        for tag in EXIF_DATE_TAGS:
+            if tag in exif_ifd:
+                value = ascii_value(exif_ifd[tag])
+                if value is not None:
+                    return value
+    if IFD0_DATE_TAG in ifd0:
+        return ascii_value(ifd0[IFD0_DATE_TAG])
+    return None
+
+
+def _jpeg_datetime(f: BinaryIO) -> Optional[datetime]:
+    """按段读取 JPEG，只读到 APP1(EXIF) 为止"""
+    f.seek(2)
+    while f.tell() < JPEG_SCAN_LIMIT:
+        header = f.read(4)
+        if len(header) < 4 or header[0] != 0xFF:
+            return None
+        marker, length = header[1], struct.unpack('>H', header[2:])[0]
+        # SOS 之后是压缩数据，不会再有 EXIF
+        if marker == 0xDA:
+            return None
+        if marker == 0xE1:
+            segment = f.read(length - 2)
+            if segment[:6] == b'Exif\x00\x00':
+                return _tiff_datetime(segment[6:])
+        else:
+            f.seek(length - 2, os.SEEK_CUR)
+    return None
+
+
+def _read_box_header(f: BinaryIO, end: int) -> Optional[Tuple[bytes, int, int]]:
+    """读取一个 box 头部，返回 (类型, 内容起点, box 终点)"""
+    start = f.tell()
+    if start + 8 > end:
+        return None
+    header = f.read(8)
+    if len(header) < 8:
+        return None
+    size, kind = struct.unpack('>I4s', header)
+    if size == 1:
+        size = struct.unpack('>Q', f.read(8))[0]
+    elif size == 0:
+        size = end - start
+    if size < 8:
+        return None
+    return kind, f.tell(), start + size
+
+
+def _quicktime_datetime(f: BinaryIO, file_size: int) -> Optional[datetime]:
+    """跳读顶层 box 找到 moov，再在其中找 mvhd，只读取 box 头部和 mvhd 本身"""
+    f.seek(0)
+    end = file_size
+    while True:
+        box = _read_box_header(f, end)
+        if box is None:
+            return None
+        kind, body, box_end = box
+        if kind == b'moov':
+            end = box_end
+            f.seek(body)
+            continue
+        if kind == b'mvhd':
+            version = f.read(1)
+            f.seek(3, os.SEEK_CUR)
+            if version == b'\x01':
+                seconds = struct.unpack('>Q', f.read(8))[0]
+            else:
+                seconds = struct.unpack('>I', f.read(4))[0]
+            if seconds == 0:
+                return None
+            # mvhd 记录的是 UTC，转换为本地时间
+            return (QUICKTIME_EPOCH + timedelta(seconds=seconds)).astimezone().replace(tzinfo=None)
+        f.seek(box_end)
+
+
+def filename_datetime(name: str) -> Optional[datetime]:
+    """从文件名中识别日期"""
+    for match in FILENAME_DATE.finditer(name):
+        try:
+            return datetime(int(match.group(1)), int(match.group(2)), int(match.group(3)))
+        except ValueError:
+            continue
+    return None
+
+
+def metadata_datetime(path: str, file_size: int) -> Optional[datetime]:
+    """按文件头的魔数选择解析器，读取元数据中的拍摄时间"""
+    with open(path, 'rb') as f:
+        head = f.read(12)
+        if head[:2] == b'\xff\xd8':
+            return _jpeg_datetime(f)
+        if head[:4] in (b'II*\x00', b'MM\x00*'):
+            f.seek(0)
+            # IFD 通常在文件开头附近，读取前 256KB 足够
+            return _tiff_datetime(f.read(JPEG_SCAN_LIMIT))
+        if head[4:8] in (b'ftyp', b'moov', b'mdat', b'wide', b'free', b'skip'):
+            return _quicktime_datetime(f, file_size)
+    return None
+
+
+def capture_datetime(path: str, file_size: int) -> Tuple[Optional[datetime], str]:
+    """
+    获取拍摄时间
+
+    Returns:
+        (时间, 来源)，来源为 metadata / filename / none
+    """
+    name = os.path.basename(path)
+    if os.path.splitext(name)[1].lower() in MEDIA_EXTENSIONS:
+        try:
+            value = metadata_datetime(path, file_size)
+        except (OSError, struct.error, ValueError, OverflowError) as e:
+            logger.debug(f"无法读取元数据 {path}: {e}")
+            value = None
+        if value is not None:
+            return value, 'metadata'
+    value = filename_datetime(name)
+    if value is not None:
+        return value, 'filename'
+    return None, 'none'
+
+
+class CaptureDateCache:
+    """以 (路径, 大小, mtime) 为键的拍摄时间缓存，未识别出时间的结果也会缓存"""
+
+    COMMIT_EVERY = 500
+
+    def __init__(self, db_path: str):
+        os.makedirs(os.path.dirname(os.path.abspath(db_path)), exist_ok=True)
+        self.db_path = db_path
+        self._lock = threading.Lock()
+        self._pending = 0
+        self.hits = 0
+        self.misses = 0
+        self._conn = sqlite3.connect(db_path, check_same_thread=False)
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.execute("PRAGMA synchronous=NORMAL")
+        self._conn.execute("""
+            CREATE TABLE IF NOT EXISTS capture_dates (
+                path TEXT PRIMARY KEY,
+                size INTEGER NOT NULL,
+                mtime_ns INTEGER NOT NULL,
+                captured REAL,
+                source TEXT NOT NULL
+            )
+        """)
+        self._conn.commit()
+
+    def lookup(self, path: str, size: int, mtime_ns: int) -> Tuple[Optional[datetime], str]:
+        """查询缓存，未命中或文件已变化时读取文件头并写回缓存"""
+        with self._lock:
+            row = self._conn.execute(
+                "SELECT size, mtime_ns, captured, source FROM capture_dates WHERE path = ?", (path,)
+            ).fetchone()
+        if row is not None and row[0] == size and row[1] == mtime_ns:
+            self.hits += 1
+            return (datetime.fromtimestamp(row[2]) if row[2] is not None else None), row[3]
+
+        self.misses += 1
+        value, source = capture_datetime(path, size)
+        with self._lock:
+            self._conn.execute(
+                "INSERT OR REPLACE INTO capture_dates (path, size, mtime_ns, captured, source) "
+                "VALUES (?, ?, ?, ?, ?)",
+                (path, size, mtime_ns, value.timestamp() if value is not None else None, source),
+            )
+            self._pending += 1
+            if self._pending >= self.COMMIT_EVERY:
+                self._conn.commit()
+                self._pending = 0
+        return value, source
+
+    def close(self):
+        with self._lock:
+            self._conn.commit()
+            self._conn.close()
@@ -0,0 +1,135 @@
+"""
+分阶段查找内容相同的文件
+
+大部分文件在前两个阶段就被排除，只有头尾都相同的文件才会完整读取：
+1. 按文件大小分组，大小唯一的文件不可能重复，不读取内容
+2. 对同大小的文件计算头部和尾部各 sample_bytes 的哈希
+3. 头尾哈希仍然相同的文件分块计算完整哈希
+
+第 2、3 阶段的哈希在线程池中并行计算（hashlib 计算时释放 GIL）。
+不大于 2 × sample_bytes 的文件在第 2 阶段已读完全部内容，不再进入第 3 阶段。
+"""
+
+import hashlib
+import os
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from typing import Dict, Iterable, List, Optional, Tuple
+
+from loguru import logger
+
+
+class DuplicateFinder:
+    """按 大小 → 头尾哈希 → 完整哈希 逐步缩小候选范围"""
+
+    def __init__(self, workers: int = 8, sample_bytes: int = 64 * 1024, chunk_bytes: int = 1024 * 1024):
+        """
+        Args:
+            workers: 计算哈希的线程数
+            sample_bytes: 第 2 阶段读取的头部、尾部字节数
+            chunk_bytes: 完整哈希时每次读取的字节数
+        """
+        self.workers = workers
+        self.sample_bytes = sample_bytes
+        self.chunk_bytes = chunk_bytes
+        self._lock = threading.Lock()
+        self.stats = {
+            'files': 0,
+            'size_candidates': 0,
+            'partial_hashed': 0,
+            'full_hashed': 0,
+            'bytes_read': 0,
+            'errors': 0,
+        }
+
+    def _add_read(self, key: str, amount: int):
+        with self._lock:
+            self.stats[key] += 1
+            self.stats['bytes_read'] += amount
+
+    def partial_hash(self, path: str, size: int) -> Optional[bytes]:
+        """头部和尾部的哈希；小文件直接是完整内容的哈希"""
+        digest = hashlib.blake2b(digest_size=16)
+        try:
+            with open(path, 'rb') as f:
+                if size <= 2 * self.sample_bytes:
+                    data = f.read()
+                    digest.update(data)
+                    read = len(data)
+                else:
+                    head = f.read(self.sample_bytes)
+                    f.seek(-self.sample_bytes, os.SEEK_END)
+                    tail = f.read(self.sample_bytes)
+                    digest.update(head)
+                    digest.update(tail)
+                    read = len(head) + len(tail)
+        except OSError as e:
+            logger.warning(f"无法读取文件 {path}: {e}")
+            with self._lock:
+                self.stats['errors'] += 1
+            return None
+        self._add_read('partial_hashed', read)
+        return digest.digest()
+
+    def full_hash(self, path: str) -> Optional[bytes]:
+        """分块读取整个文件计算哈希，缓冲区复用，不一次载入内存"""
+        digest = hashlib.blake2b(digest_size=32)
+        buffer = bytearray(self.chunk_bytes)
+        view = memoryview(buffer)
+        read = 0
+        try:
+            with open(path, 'rb', buffering=0) as f:
+                while True:
+                    count = f.readinto(buffer)
+                    if not count:
+                        break
+                    digest.update(view[:count])
+                    read += count
+        except OSError as e:
+            logger.warning(f"无法读取文件 {path}: {e}")
+            with self._lock:
+                self.stats['errors'] += 1
+            return None
+        self._add_read('full_hashed', read)
+        return digest.digest()
+
+    def _refine(self, executor: ThreadPoolExecutor, groups: List[List[Tuple[str, int]]],
+                hasher) -> List[List[Tuple[str, int]]]:
+        """对每组候选计算哈希，按 (组, 哈希) 重新分组，只保留仍有多个文件的组"""
+        items = [(index, path, size) for index, group in enumerate(groups) for path, size in group]
+        digests = executor.map(lambda item: hasher(item[1], item[2]), items)
+        refined: Dict[Tuple[int, bytes], List[Tuple[str, int]]] = {}
+        for (index, path, size), digest in zip(items, digests):
+            if digest is not None:
+                refined.setdefault((index, digest), []).append((path, size))
+        return [group for group in refined.values() if len(group) > 1]
+
+    def find(self, files: Iterable[Tuple[str, int]]) -> List[List[str]]:
+        """
+        查找重复文件
+
+        Args:
+            files: (路径, 大小) 序列；同一组内的顺序与输入顺序一致，调用方可借此决定保留哪一个
+
+        Returns:
+            重复文件组列表，每组至少两个路径
+        """
+        by_size: Dict[int, List[Tuple[str, int]]] = {}
+        for path, size in files:
+            self.stats['files'] += 1
+            # 空文件内容都相同，但去重没有意义
+            if size > 0:
+                by_size.setdefault(size, []).append((path, size))
+        groups = [group for group in by_size.values() if len(group) > 1]
+        self.stats['size_candidates'] = sum(len(group) for group in groups)
+        if not groups:
+            return []
+
+        with ThreadPoolExecutor(max_workers=self.workers, thread_name_prefix='hash') as executor:
+            groups = self._refine(executor, groups, self.partial_hash)
+            small = [group for group in groups if group[0][1] <= 2 * self.sample_bytes]
+            large = [group for group in groups if group[0][1] > 2 * self.sample_bytes]
+            if large:
+                large = self._refine(executor, large, lambda path, size: self.full_hash(path))
+
+        return [[path for path, _ in group] for group in small + large]
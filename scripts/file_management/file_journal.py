@@ -0,0 +1,265 @@
+"""
+批量移动、重命名的预写日志
+
+每行一条 JSON 记录：
+- begin  任务开始，记录工具名和源文件夹
+- plan   计划执行的操作 (id, src, dst)，一批操作写完后 fsync 一次，之后才开始执行
+- copied 跨设备移动已把完整副本替换到目标位置，记录源文件的大小和 mtime，fsync 后才删除源文件
+- done   操作已完成，累计 sync_every 条或下一批计划写入时一起 fsync
+- end    任务正常结束
+- undone 已按日志撤销
+
+中断后重新运行时，已计划但未记录完成的操作按文件系统的实际状态处理：
+源在、目标不在则重新执行；源不在、目标在说明已完成，只补记录；
+两者都在时，如果记录过 copied 且两边的大小、mtime 与记录一致，说明只差删除源文件，补删后记为完成；
+其余两者都在或都不在的情况跳过并报错。
+同一文件夹内的操作按 id 顺序串行执行，因此恢复时也按 id 顺序处理。
+这一判断要求名称不被复用：如果后续操作会把文件移入某个操作腾出的名称（重命名的链和环），
+该操作的完成记录必须在下一步执行前 fsync（complete(sync=True)）。
+
+撤销按相反顺序把已完成的操作逆向执行一遍（dst -> src）。
+"""
+
+import json
+import os
+import threading
+import time
+from typing import Callable, Dict, List, NamedTuple, Optional, Set, Tuple
+
+from loguru import logger
+
+
+# 跨文件系统复制后允许的 mtime 误差
+MTIME_TOLERANCE_NS = 2 * 10**9
+
+
+class JournalState(NamedTuple):
+    """从日志文件读出的任务状态"""
+    header: Dict
+    operations: Dict[int, Tuple[str, str]]
+    done: Set[int]
+    copied: Dict[int, Tuple[int, int]]
+    finished: bool
+    undone: bool
+
+    @property
+    def pending(self) -> List[Tuple[int, str, str]]:
+        return [(op_id, src, dst) for op_id, (src, dst) in sorted(self.operations.items())
+                if op_id not in self.done]
+
+
+def load_journal(path: str) -> Optional[JournalState]:
+    """读取日志，文件不存在时返回 None；崩溃时写了一半的最后一行会被忽略"""
+    if not os.path.exists(path):
+        return None
+    header: Dict = {}
+    operations: Dict[int, Tuple[str, str]] = {}
+    done: Set[int] = set()
+    copied: Dict[int, Tuple[int, int]] = {}
+    finished = undone = False
+    with open(path, 'r', encoding='utf-8', errors='surrogateescape') as f:
+        for line in f:
+            try:
+                record = json.loads(line)
+            except ValueError:
+                logger.warning(f"忽略日志中不完整的记录: {line[:80]!r}")
+                continue
+            op = record.get('op')
+            if op == 'begin':
+                header = record
+            elif op == 'plan':
+                operations[record['id']] = (record['src'], record['dst'])
+            elif op == 'copied':
+                copied[record['id']] = (record['size'], record['mtime_ns'])
+            elif op == 'done':
+                done.add(record['id'])
+            elif op == 'end':
+                finished = True
+            elif op == 'undone':
+                undone = True
+    return JournalState(header, operations, done, copied, finished, undone)
+
+
+class OperationJournal:
+    """可在多个线程间共享的预写日志"""
+
+    def __init__(self, path: str, sync_every: int = 1024):
+        """
+        Args:
+            path: 日志文件路径
+            sync_every: 累计多少条完成记录 fsync 一次
+        """
+        self.path = path
+        self.sync_every = sync_every
+        self._lock = threading.Lock()
+        self._file = None
+        self._next_id = 0
+        self._unsynced = 0
+
+    def _write(self, record: Dict):
+        self._file.write(json.dumps(record, ensure_ascii=False) + '\n')
+
+    def _sync(self):
+        self._file.flush()
+        os.fsync(self._file.fileno())
+        self._unsynced = 0
+
+    def begin(self, tool: str, source: str):
+        """开始新任务，覆盖同路径的旧日志"""
+        directory = os.path.dirname(os.path.abspath(self.path))
+        os.makedirs(directory, exist_ok=True)
+        with self._lock:
+            self._file = open(self.path, 'w', encoding='utf-8', errors='surrogateescape')
+            self._write({'op': 'begin', 'tool': tool, 'source': source, 'time': time.time()})
+            self._sync()
+
+    def reopen(self, state: JournalState):
+        """继续写入未完成任务的日志，先截掉崩溃时写了一半的最后一行"""
+        with open(self.path, 'rb+') as f:
+            data = f.read()
+            if data and not data.endswith(b'\n'):
+                f.truncate(data.rfind(b'\n') + 1)
+        with self._lock:
+            self._file = open(self.path, 'a', encoding='utf-8', errors='surrogateescape')
+            self._next_id = max(state.operations, default=-1) + 1
+
+    def plan(self, operations: List[Tuple[str, str]]) -> List[int]:
+        """写入一批计划操作并 fsync，返回各操作的 id"""
+        with self._lock:
+            ids = list(range(self._next_id, self._next_id + len(operations)))
+            self._next_id += len(operations)
+            for op_id, (src, dst) in zip(ids, operations):
+                self._write({'op': 'plan', 'id': op_id, 'src': src, 'dst': dst})
+            self._sync()
+        return ids
+
+    def complete(self, op_id: int, sync: bool = False):
+        """
+        记录操作已完成
+
+        Args:
+            op_id: plan 返回的操作 id
+            sync: 立即 fsync。后续操作会把文件移入这个操作腾出的名称时必须使用：
+                名称被复用后，恢复时无法再从文件是否存在判断这个操作是否已执行
+        """
+        with self._lock:
+            self._write({'op': 'done', 'id': op_id})
+            self._unsynced += 1
+            if sync or self._unsynced >= self.sync_every:
+                self._sync()
+
+    def copied(self, op_id: int, size: int, mtime_ns: int):
+        """记录跨设备移动已把副本替换到目标位置，立即 fsync，之后才能删除源文件"""
+        with self._lock:
+            self._write({'op': 'copied', 'id': op_id, 'size': size, 'mtime_ns': mtime_ns})
+            self._sync()
+
+    def finish(self):
+        """任务正常结束"""
+        with self._lock:
+            self._write({'op': 'end', 'time': time.time()})
+            self._sync()
+            self._file.close()
+            self._file = None
+
+    def close(self):
+        """任务中断时关闭，保留未完成状态以便恢复"""
+        with self._lock:
+            if self._file is not None:
+                self._sync()
+                self._file.close()
+                self._file = None
+
+
+def _copy_matches(src: str, dst: str, size: int, mtime_ns: int) -> bool:
+    """源文件在复制后没有变化，目标是同样大小和修改时间的副本"""
+    try:
+        src_status, dst_status = os.stat(src), os.stat(dst)
+    except OSError:
+        return False
+    # 目标所在的文件系统可能只保存到秒（FAT 为 2 秒），mtime 允许这一误差
+    return (src_status.st_size == size and src_status.st_mtime_ns == mtime_ns
+            and dst_status.st_size == size and abs(dst_status.st_mtime_ns - mtime_ns) < MTIME_TOLERANCE_NS)
+
+
+def recover(state: JournalState, journal: OperationJournal,
+            move: Callable[[str, str, int], None]) -> Tuple[int, int, int]:
+    """
+    处理上次中断时已计划但未确认完成的操作
+
+    Args:
+        state: load_journal 读出的任务状态
+        journal: 已 reopen 的日志，用于补写完成记录
+        move: 重新执行操作的函数，参数为 (src, dst, op_id)
+
+    Returns:
+        (重新执行数, 已完成补记数, 无法判断跳过数)
+    """
+    redone = confirmed = conflicts = 0
+    for op_id, src, dst in state.pending:
+        src_exists, dst_exists = os.path.lexists(src), os.path.lexists(dst)
+        if src_exists and not dst_exists:
+            try:
+                move(src, dst, op_id)
+            except OSError as e:
+                logger.error(f"恢复操作失败 {src} -> {dst}: {e}")
+                conflicts += 1
+                continue
+            redone += 1
+        elif dst_exists and not src_exists:
+            confirmed += 1
+        elif op_id in state.copied and _copy_matches(src, dst, *state.copied[op_id]):
+            try:
+                os.unlink(src)
+            except OSError as e:
+                logger.error(f"删除已复制的源文件失败 {src}: {e}")
+                conflicts += 1
+                continue
+            logger.info(f"已复制到目标，补删源文件: {src}")
+            confirmed += 1
+        else:
+            logger.error(f"无法判断操作状态，跳过: {src} -> {dst}")
+            conflicts += 1
+            continue
+        journal.complete(op_id)
+    return redone, confirmed, conflicts
+
+
+def undo_journal(path: str, move: Callable[[str, str], None], dry_run: bool = False) -> Tuple[int, int]:
+    """
+    按相反顺序撤销日志中已完成的操作
+
+    Returns:
+        (撤销数, 跳过数)
+    """
+    state = load_journal(path)
+    if state is None:
+        raise FileNotFoundError(f"日志不存在: {path}")
+    if state.undone:
+        raise ValueError(f"日志记录的任务已经撤销过: {path}")
+
+    undone = skipped = 0
+    for op_id in sorted(state.done, reverse=True):
+        src, dst = state.operations[op_id]
+        if not os.path.lexists(dst) or os.path.lexists(src):
+            logger.warning(f"文件已变化，跳过撤销: {dst} -> {src}")
+            skipped += 1
+            continue
+        if dry_run:
+            logger.info(f"[试运行] 撤销: {dst} -> {src}")
+        else:
+            try:
+                move(dst, src)
+            except OSError as e:
+                logger.error(f"撤销失败 {dst} -> {src}: {e}")
+                skipped += 1
+                continue
+            logger.info(f"撤销: {dst} -> {src}")
+        undone += 1
+
+    if not dry_run:
+        with open(path, 'a', encoding='utf-8') as f:
+            f.write(json.dumps({'op': 'undone', 'time': time.time()}) + '\n')
+            f.flush()
+            os.fsync(f.fileno())
+    return undone, skipped
@@ -0,0 +1,199 @@
+"""
+文件移动引擎
+
+同一文件系统内直接 os.rename；跨设备（EXDEV）时在内核中复制数据：
+优先 os.copy_file_range，不支持时用 os.sendfile，都不可用时才回退到用户态读写。
+
+跨设备复制先写入目标旁的临时文件，复制元数据（mtime 等）后可选地比较两边的
+哈希，确认无误再原子替换到目标位置并删除源文件，中途失败不会丢失源文件。
+替换和删除源文件之间会调用 on_copied 回调，调用方可以先记录"已复制"，
+在两者之间崩溃时据此判断目标是完整的副本，只需补删源文件。
+同时进行的复制数量有上限，rename 不受限制。
+"""
+
+import errno
+import hashlib
+import os
+import shutil
+import threading
+import time
+from typing import Callable, Dict, Optional
+
+from loguru import logger
+
+
+# copy_file_range / sendfile 不支持当前文件组合时返回的错误
+_FALLBACK_ERRNOS = {errno.EXDEV, errno.ENOSYS, errno.EINVAL, errno.EOPNOTSUPP, errno.ENOTSUP, errno.EBADF}
+
+
+def file_digest(path: str, chunk_bytes: int = 1024 * 1024) -> bytes:
+    """分块计算文件的 blake2b 哈希"""
+    digest = hashlib.blake2b(digest_size=32)
+    buffer = bytearray(chunk_bytes)
+    view = memoryview(buffer)
+    with open(path, 'rb', buffering=0) as f:
+        while True:
+            count = f.readinto(buffer)
+            if not count:
+                break
+            digest.update(view[:count])
+    return digest.digest()
+
+
+class TransferEngine:
+    """rename 优先、跨设备时零拷贝复制的文件移动，线程安全"""
+
+    def __init__(self, max_parallel: int = 4, verify: bool = False, chunk_bytes: int = 64 * 1024 * 1024):
+        """
+        Args:
+            max_parallel: 同时进行的跨设备复制数
+            verify: 删除源文件前是否比较两边的哈希
+            chunk_bytes: 每次系统调用复制的字节数
+        """
+        self.max_parallel = max_parallel
+        self.verify = verify
+        self.chunk_bytes = chunk_bytes
+        self._slots = threading.BoundedSemaphore(max_parallel)
+        self._lock = threading.Lock()
+        self._active = 0
+        self._busy_since = 0.0
+        self.stats: Dict[str, float] = {
+            'renamed': 0,
+            'copied': 0,
+            'verified': 0,
+            'bytes_copied': 0,
+            # 至少有一个复制在进行的累计时间，用于计算总吞吐
+            'copy_seconds': 0.0,
+        }
+
+    def move(self, source: str, destination: str, on_copied: Optional[Callable[[int, int], None]] = None):
+        """
+        移动文件，调用方负责分配未被占用的目标文件名
+
+        目标已存在时的行为取决于平台和路径：同设备 rename 在 POSIX 上覆盖、在 Windows 上报错，
+        跨设备复制总是替换目标，因此不能依赖它来检测冲突。
+
+        Args:
+            source: 源文件路径
+            destination: 目标文件路径
+            on_copied: 跨设备复制时，目标已替换到位、删除源文件之前调用，参数为源文件的
+                (大小, mtime_ns)；回调抛出异常时保留源文件
+        """
+        try:
+            os.rename(source, destination)
+        except OSError as e:
+            if e.errno != errno.EXDEV:
+                raise
+        else:
+            with self._lock:
+                self.stats['renamed'] += 1
+            return
+
+        with self._slots:
+            self._begin()
+            try:
+                started = time.perf_counter()
+                size = self._copy_across(source, destination, on_copied)
+                elapsed = time.perf_counter() - started
+            finally:
+                self._end()
+        with self._lock:
+            self.stats['copied'] += 1
+            self.stats['bytes_copied'] += size
+        logger.debug(f"跨设备复制 {source} -> {destination}: {size / 1024 / 1024:.1f} MB, "
+                     f"{size / 1024 / 1024 / elapsed if elapsed > 0 else 0:.1f} MB/s")
+
+    def _begin(self):
+        with self._lock:
+            if self._active == 0:
+                self._busy_since = time.perf_counter()
+            self._active += 1
+
+    def _end(self):
+        with self._lock:
+            self._active -= 1
+            if self._active == 0:
+                self.stats['copy_seconds'] += time.perf_counter() - self._busy_since
+
+    def _copy_across(self, source: str, destination: str,
+                     on_copied: Optional[Callable[[int, int], None]] = None) -> int:
+        if os.path.islink(source) or not os.path.isfile(source):
+            # 符号链接和特殊文件交给 shutil.move 处理
+            shutil.move(source, destination)
+            return 0
+
+        temporary = destination + '.part'
+        try:
+            with open(source, 'rb', buffering=0) as src, open(temporary, 'wb', buffering=0) as dst:
+                status = os.fstat(src.fileno())
+                size = status.st_size
+                self._copy_data(src.fileno(), dst.fileno(), size)
+                os.fsync(dst.fileno())
+            shutil.copystat(source, temporary)
+            if self.verify:
+                if file_digest(source) != file_digest(temporary):
+                    raise OSError(errno.EIO, f"复制校验失败: {source}")
+                with self._lock:
+                    self.stats['verified'] += 1
+            os.replace(temporary, destination)
+        except BaseException:
+            if os.path.lexists(temporary):
+                os.unlink(temporary)
+            raise
+        if on_copied is not None:
+            on_copied(size, status.st_mtime_ns)
+        os.unlink(source)
+        return size
+
+    def _copy_data(self, src_fd: int, dst_fd: int, size: int):
+        """在内核中复制数据：copy_file_range → sendfile → 用户态读写"""
+        offset = 0
+        if hasattr(os, 'copy_file_range'):
+            try:
+                while offset < size:
+                    count = os.copy_file_range(src_fd, dst_fd, min(self.chunk_bytes, size - offset), offset, offset)
+                    if count == 0:
+                        break
+                    offset += count
+                if offset >= size:
+                    return
+            except OSError as e:
+                if e.errno not in _FALLBACK_ERRNOS:
+                    raise
+
+        # copy_file_range 使用显式偏移，不移动文件位置，这里从已复制处继续
+        os.lseek(dst_fd, offset, os.SEEK_SET)
+        if hasattr(os, 'sendfile'):
+            try:
+                while offset < size:
+                    count = os.sendfile(dst_fd, src_fd, offset, min(self.chunk_bytes, size - offset))
+                    if count == 0:
+                        break
+                    offset += count
+                if offset >= size:
+                    return
+            except OSError as e:
+                if e.errno not in _FALLBACK_ERRNOS:
+                    raise
+
+        os.lseek(src_fd, offset, os.SEEK_SET)
+        os.lseek(dst_fd, offset, os.SEEK_SET)
+        while True:
+            data = os.read(src_fd, 1024 * 1024)
+            if not data:
+                break
+            view = memoryview(data)
+            while view:
+                view = view[os.write(dst_fd, view):]
+
+    def report(self) -> str:
+        """跨设备复制的汇总"""
+        stats = self.stats
+        megabytes = stats['bytes_copied'] / 1024 / 1024
+        seconds = stats['copy_seconds']
+        throughput = megabytes / seconds if seconds > 0 else 0.0
+        text = (f"同设备重命名 {stats['renamed']} 个，跨设备复制 {stats['copied']} 个 "
+                f"({megabytes:.1f} MB，用时 {seconds:.1f}s，{throughput:.1f} MB/s，并发上限 {self.max_parallel})")
+        if self.verify:
+            text += f"，校验 {stats['verified']} 个"
+        return text
@@ -0,0 +1,117 @@
+"""
+文件夹占用明细
+
+在扫描的同一遍遍历中收集：
+- 指定深度以内每个目录的子树总大小和文件数
+- 最大的 N 个文件、直接内容最大的 N 个目录（有界最小堆，内存与文件数无关）
+- 按扩展名汇总的大小和文件数
+
+每个扫描线程持有自己的 UsageBreakdown，结束后合并，无需加锁。
+"""
+
+import heapq
+import os
+from typing import Any, Dict, List, Optional, Tuple
+
+
+class UsageBreakdown:
+    """单个子树的占用明细，可合并"""
+
+    __slots__ = ('root', 'depth', 'top_n', 'directories', 'top_files', 'top_dirs', 'extensions')
+
+    def __init__(self, root: str, depth: int, top_n: int):
+        self.root = root
+        self.depth = depth
+        self.top_n = top_n
+        # 相对路径 -> [子树大小, 子树文件数]，只记录 depth 层以内的目录
+        self.directories: Dict[str, List[int]] = {}
+        self.top_files: List[Tuple[int, str]] = []
+        self.top_dirs: List[Tuple[int, str]] = []
+        # 小写扩展名（无扩展名为空串）-> [大小, 文件数]
+        self.extensions: Dict[str, List[int]] = {}
+
+    def _push(self, heap: List[Tuple[int, str]], size: int, path: str):
+        if len(heap) < self.top_n:
+            heapq.heappush(heap, (size, path))
+        elif size > heap[0][0]:
+            heapq.heapreplace(heap, (size, path))
+
+    def add_file(self, path: str, name: str, size: int):
+        self._push(self.top_files, size, path)
+        extension = os.path.splitext(name)[1].lower()
+        totals = self.extensions.get(extension)
+        if totals is None:
+            self.extensions[extension] = [size, 1]
+        else:
+            totals[0] += size
+            totals[1] += 1
+
+    def add_directory(self, path: str, direct_size: int, direct_files: int):
+        """登记一个目录的直接内容，累加到 depth 层以内的各级祖先目录"""
+        if direct_files:
+            self._push(self.top_dirs, direct_size, path)
+        if path == self.root:
+            return
+        parts = os.path.relpath(path, self.root).split(os.sep)
+        for level in range(1, min(len(parts), self.depth) + 1):
+            key = '/'.join(parts[:level])
+            totals = self.directories.get(key)
+            if totals is None:
+                self.directories[key] = [direct_size, direct_files]
+            else:
+                totals[0] += direct_size
+                totals[1] += direct_files
+
+    def merge(self, other: 'UsageBreakdown'):
+        for key, (size, count) in other.directories.items():
+            totals = self.directories.setdefault(key, [0, 0])
+            totals[0] += size
+            totals[1] += count
+        for key, (size, count) in other.extensions.items():
+            totals = self.extensions.setdefault(key, [0, 0])
+            totals[0] += size
+            totals[1] += count
+        for size, path in other.top_files:
+            self._push(self.top_files, size, path)
+        for size, path in other.top_dirs:
+            self._push(self.top_dirs, size, path)
+
+    def _relative(self, path: str) -> str:
+        relative = os.path.relpath(path, self.root)
+        return '.' if relative == '.' else relative.replace(os.sep, '/')
+
+    def report(self) -> Dict[str, Any]:
+        """
+        汇总为普通字典，附加在扫描结果的 breakdown 字段中
+
+        directories 保留全部深度以内的目录，供相邻两次扫描比较增长；
+        其余列表按大小降序排列。
+        """
+        extensions = sorted(self.extensions.items(), key=lambda item: item[1][0], reverse=True)
+        return {
+            'depth': self.depth,
+            'directories': {key: size for key, (size, _) in self.directories.items()},
+            'top_files': [{'name': self._relative(path), 'size': size}
+                          for size, path in sorted(self.top_files, reverse=True)],
+            'top_dirs': [{'name': self._relative(path), 'size': size}
+                         for size, path in sorted(self.top_dirs, reverse=True)],
+            'extensions': [{'extension': extension or '(无)', 'size': size, 'count': count}
+                           for extension, (size, count) in extensions[:self.top_n]],
+        }
+
+
+def fastest_growing(previous: Optional[Dict[str, int]], current: Dict[str, int],
+                    top_n: int) -> List[Dict[str, Any]]:
+    """
+    比较相邻两次扫描的目录大小，返回增长最多的子树
+
+    新出现的目录按从 0 开始计算增长，深度以内的各级目录一起参与排序。
+    """
+    if previous is None:
+        return []
+    changes = []
+    for key, size in current.items():
+        delta = size - previous.get(key, 0)
+        if delta > 0:
+            changes.append((delta, key))
+    return [{'name': key, 'size_change': delta} for delta, key in heapq.nlargest(top_n, changes)]
@@ -0,0 +1,294 @@
+"""
+文件夹体积历史数据
+
+SizeHistory 用两个定长数组（秒级时间戳、体积）组成环形缓冲区，
+按时间有序追加，最近记录查询使用二分查找，每次查询 O(log n)。
+
+HistoryStore 把采样持久化到 SQLite，并自动汇总为分钟、小时、天三级数据：
+原始采样保留 1 天，分钟级 7 天，小时级 90 天，天级永久保留。
+长时间跨度的查询直接读取对应粒度的汇总表，而不是原始采样。
+"""
+
+import os
+import sqlite3
+import threading
+import time
+from array import array
+from typing import List, Optional, Tuple
+
+
+class SizeHistory:
+    """时间有序的体积记录环形缓冲区"""
+
+    def __init__(self, capacity: int):
+        self.capacity = capacity
+        self._times = array('d', bytes(8 * capacity))
+        self._sizes = array('q', bytes(8 * capacity))
+        self._start = 0
+        self._count = 0
+
+    def __len__(self) -> int:
+        return self._count
+
+    def __bool__(self) -> bool:
+        return self._count > 0
+
+    def _physical(self, index: int) -> int:
+        return (self._start + index) % self.capacity
+
+    def append(self, timestamp: float, size: int):
+        """追加一条记录；时钟回拨时沿用上一条时间戳，保证时间有序"""
+        if self._count:
+            timestamp = max(timestamp, self._times[self._physical(self._count - 1)])
+        if self._count < self.capacity:
+            position = self._physical(self._count)
+            self._count += 1
+        else:
+            position = self._start
+            self._start = (self._start + 1) % self.capacity
+        self._times[position] = timestamp
+        self._sizes[position] = size
+
+    def record(self, index: int) -> Tuple[float, int]:
+        """按逻辑下标（0 为最旧）取出 (时间戳, 体积)"""
+        if index < 0:
+            index += self._count
+        if not 0 <= index < self._count:
+            raise IndexError(index)
+        position = self._physical(index)
+        return self._times[position], self._sizes[position]
+
+    def latest(self) -> Optional[Tuple[float, int]]:
+        return self.record(self._count - 1) if self._count else None
+
+    def _lower_bound(self, timestamp: float) -> int:
+        """第一个时间戳 >= timestamp 的逻辑下标"""
+        low, high = 0, self._count
+        times, start, capacity = self._times, self._start, self.capacity
+        while low < high:
+            middle = (low + high) // 2
+            if times[(start + middle) % capacity] < timestamp:
+                low = middle + 1
+            else:
+                high = middle
+        return low
+
+    def nearest(self, timestamp: float) -> Optional[Tuple[float, int]]:
+        """查找时间上最接近 timestamp 的记录"""
+        if not self._count:
+            return None
+        index = self._lower_bound(timestamp)
+        candidates = [i for i in (index - 1, index) if 0 <= i < self._count]
+        return min((self.record(i) for i in candidates), key=lambda item: abs(item[0] - timestamp))
+
+    def memory_bytes(self) -> int:
+        return self._times.buffer_info()[1] * self._times.itemsize + \
+            self._sizes.buffer_info()[1] * self._sizes.itemsize
+
+
+class HistoryStore:
+    """
+    基于 SQLite 的多粒度体积历史，按监控根目录和体积口径区分
+
+    不同口径（文件大小、抽样估算、磁盘占用）记录在各自的序列中，
+    切换口径后的增长统计不会拿两种量相减。
+    """
+
+    MODES = ('apparent', 'approximate', 'allocated')
+
+    RAW_RETENTION = 86400
+    # (粒度秒数, 保留秒数)，None 表示永久保留
+    ROLLUPS = ((60, 7 * 86400), (3600, 90 * 86400), (86400, None))
+    PRUNE_INTERVAL = 3600
+
+    def __init__(self, db_path: str, root: str, mode: str = 'apparent'):
+        """
+        Args:
+            db_path: SQLite 数据库路径
+            root: 监控的根目录
+            mode: 体积口径，apparent / approximate / allocated
+        """
+        if mode not in self.MODES:
+            raise ValueError(f"不支持的体积口径: {mode}")
+        db_dir = os.path.dirname(os.path.abspath(db_path))
+        os.makedirs(db_dir, exist_ok=True)
+        self.db_path = db_path
+        self.root = str(root)
+        self.mode = mode
+        self._lock = threading.Lock()
+        self._last_prune = 0.0
+        self._conn = sqlite3.connect(db_path, check_same_thread=False)
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.execute("PRAGMA synchronous=NORMAL")
+        self._migrate()
+        self._conn.executescript("""
+            CREATE TABLE IF NOT EXISTS samples (
+                root TEXT NOT NULL,
+                mode TEXT NOT NULL DEFAULT 'apparent',
+                ts REAL NOT NULL,
+                size INTEGER NOT NULL,
+                file_count INTEGER
+            );
+            CREATE INDEX IF NOT EXISTS idx_samples_root_mode_ts ON samples (root, mode, ts);
+            CREATE TABLE IF NOT EXISTS rollups (
+                root TEXT NOT NULL,
+                mode TEXT NOT NULL DEFAULT 'apparent',
+                resolution INTEGER NOT NULL,
+                bucket INTEGER NOT NULL,
+                first_ts REAL NOT NULL,
+                first_size INTEGER NOT NULL,
+                last_ts REAL NOT NULL,
+                last_size INTEGER NOT NULL,
+                min_size INTEGER NOT NULL,
+                max_size INTEGER NOT NULL,
+                sample_count INTEGER NOT NULL,
+                PRIMARY KEY (root, mode, resolution, bucket)
+            ) WITHOUT ROWID;
+        """)
+        self._conn.commit()
+
+    def _migrate(self):
+        """旧版数据库没有 mode 列：原有记录归入 apparent 序列"""
+        columns = {row[1] for row in self._conn.execute("PRAGMA table_info(samples)")}
+        if columns and 'mode' not in columns:
+            self._conn.executescript("""
+                ALTER TABLE samples ADD COLUMN mode TEXT NOT NULL DEFAULT 'apparent';
+                DROP INDEX IF EXISTS idx_samples_root_ts;
+            """)
+        columns = {row[1] for row in self._conn.execute("PRAGMA table_info(rollups)")}
+        if columns and 'mode' not in columns:
+            # 主键变化，只能重建汇总表
+            self._conn.executescript("""
+                ALTER TABLE rollups RENAME TO rollups_old;
+                CREATE TABLE rollups (
+                    root TEXT NOT NULL,
+                    mode TEXT NOT NULL DEFAULT 'apparent',
+                    resolution INTEGER NOT NULL,
+                    bucket INTEGER NOT NULL,
+                    first_ts REAL NOT NULL,
+                    first_size INTEGER NOT NULL,
+                    last_ts REAL NOT NULL,
+                    last_size INTEGER NOT NULL,
+                    min_size INTEGER NOT NULL,
+                    max_size INTEGER NOT NULL,
+                    sample_count INTEGER NOT NULL,
+                    PRIMARY KEY (root, mode, resolution, bucket)
+                ) WITHOUT ROWID;
+                INSERT INTO rollups (root, resolution, bucket, first_ts, first_size, last_ts, last_size,
+                                     min_size, max_size, sample_count)
+                    SELECT root, resolution, bucket, first_ts, first_size, last_ts, last_size,
+                           min_size, max_size, sample_count FROM rollups_old;
+                DROP TABLE rollups_old;
+            """)
+        self._conn.commit()
+
+    def add_sample(self, timestamp: float, size: int, file_count: Optional[int] = None):
+        """写入一条原始采样，并同步更新各级汇总"""
+        with self._lock:
+            self._conn.execute(
+                "INSERT INTO samples (root, mode, ts, size, file_count) VALUES (?, ?, ?, ?, ?)",
+                (self.root, self.mode, timestamp, size, file_count),
+            )
+            for resolution, _ in self.ROLLUPS:
+                self._conn.execute(
+                    """
+                    INSERT INTO rollups (root, mode, resolution, bucket, first_ts, first_size, last_ts, last_size,
+                                         min_size, max_size, sample_count)
+                    VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?, 1)
+                    ON CONFLICT (root, mode, resolution, bucket) DO UPDATE SET
+                        last_ts = excluded.last_ts,
+                        last_size = excluded.last_size,
+                        min_size = MIN(min_size, excluded.min_size),
+                        max_size = MAX(max_size, excluded.max_size),
+                        sample_count = sample_count + 1
+                    """,
+                    (self.root, self.mode, resolution, int(timestamp // resolution), timestamp, size,
+                     timestamp, size, size, size),
+                )
+            self._conn.commit()
+            if timestamp - self._last_prune >= self.PRUNE_INTERVAL:
+                self._prune(timestamp)
+
+    def _prune(self, now: float):
+        self._conn.execute("DELETE FROM samples WHERE root = ? AND mode = ? AND ts < ?",
+                           (self.root, self.mode, now - self.RAW_RETENTION))
+        for resolution, retention in self.ROLLUPS:
+            if retention is not None:
+                self._conn.execute(
+                    "DELETE FROM rollups WHERE root = ? AND mode = ? AND resolution = ? AND bucket < ?",
+                    (self.root, self.mode, resolution, int((now - retention) // resolution)),
+                )
+        self._conn.commit()
+        self._last_prune = now
+
+    def _sources_for_age(self, age: float) -> List[Optional[int]]:
+        """按时间跨度选择数据源，None 表示原始采样；结果从细到粗排列"""
+        sources: List[Optional[int]] = [None] if age <= self.RAW_RETENTION else []
+        for resolution, retention in self.ROLLUPS:
+            if sources or retention is None or age <= retention:
+                sources.append(resolution)
+        return sources
+
+    def _nearest_in(self, source: Optional[int], timestamp: float) -> Optional[Tuple[float, int]]:
+        if source is None:
+            before = self._conn.execute(
+                "SELECT ts, size FROM samples WHERE root = ? AND mode = ? AND ts <= ? ORDER BY ts DESC LIMIT 1",
+                (self.root, self.mode, timestamp),
+            ).fetchone()
+            after = self._conn.execute(
+                "SELECT ts, size FROM samples WHERE root = ? AND mode = ? AND ts >= ? ORDER BY ts ASC LIMIT 1",
+                (self.root, self.mode, timestamp),
+            ).fetchone()
+        else:
+            bucket = int(timestamp // source)
+            before = self._conn.execute(
+                "SELECT last_ts, last_size FROM rollups WHERE root = ? AND mode = ? AND resolution = ? AND bucket <= ? "
+                "ORDER BY bucket DESC LIMIT 1",
+                (self.root, self.mode, source, bucket),
+            ).fetchone()
+            after = self._conn.execute(
+                "SELECT last_ts, last_size FROM rollups WHERE root = ? AND mode = ? AND resolution = ? AND bucket >= ? "
+                "ORDER BY bucket ASC LIMIT 1",
+                (self.root, self.mode, source, bucket),
+            ).fetchone()
+        candidates = [row for row in (before, after) if row is not None]
+        if not candidates:
+            return None
+        return min(candidates, key=lambda row: abs(row[0] - timestamp))
+
+    def nearest(self, timestamp: float, now: Optional[float] = None) -> Optional[Tuple[float, int]]:
+        """
+        查找最接近 timestamp 的记录 (时间戳, 体积)
+
+        近一天读原始采样，更久远的按跨度读取分钟/小时/天级汇总。
+        """
+        now = time.time() if now is None else now
+        with self._lock:
+            for source in self._sources_for_age(now - timestamp):
+                record = self._nearest_in(source, timestamp)
+                if record is not None:
+                    return record
+        return None
+
+    def recent_samples(self, since: float) -> List[Tuple[float, int]]:
+        """
+        读取 since 之后的历史，用于重启后预热内存中的 SizeHistory
+
+        原始采样覆盖的时间段直接使用原始数据，更早的部分用分钟级汇总补齐。
+        """
+        with self._lock:
+            raw = self._conn.execute(
+                "SELECT ts, size FROM samples WHERE root = ? AND mode = ? AND ts >= ? ORDER BY ts",
+                (self.root, self.mode, since),
+            ).fetchall()
+            raw_start = raw[0][0] if raw else float('inf')
+            minutes = self._conn.execute(
+                "SELECT last_ts, last_size FROM rollups WHERE root = ? AND mode = ? AND resolution = 60 "
+                "AND last_ts >= ? AND last_ts < ? ORDER BY bucket",
+                (self.root, self.mode, since, raw_start),
+            ).fetchall()
+        return minutes + raw
+
+    def close(self):
+        with self._lock:
+            self._conn.close()
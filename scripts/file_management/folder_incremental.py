@@ -0,0 +1,426 @@
+"""
+增量文件夹扫描
+
+为每个目录保存快照（直接文件的总大小、文件数、子目录、最大文件、目录 mtime），
+每次只重新扫描发生变化的目录，总量由缓存的快照汇总得到。
+
+变化检测有两种方式：
+- Linux 下优先使用 inotify，只处理收到事件的目录，无需逐个 stat 目录
+- 其他平台或 inotify 不可用时，比较每个目录的 mtime（每个目录一次 stat）
+
+注意：目录 mtime 只在条目增删改名时变化，原地追加写入的文件不会改变目录 mtime，
+因此 mtime 模式需要配合定期全量扫描（full_rescan_every）兜底。
+"""
+
+import ctypes
+import ctypes.util
+import errno
+import os
+import struct
+import sys
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from typing import Any, Callable, Dict, Optional, Set, Tuple
+
+from loguru import logger
+
+from folder_throttle import IOBudget
+
+
+class DirSnapshot:
+    """单个目录的直接内容汇总（不含子目录内容）"""
+
+    __slots__ = ('mtime_ns', 'size', 'file_count', 'folder_count', 'subdirs',
+                 'largest_name', 'largest_size', 'error_count')
+
+    def __init__(self, mtime_ns: int):
+        self.mtime_ns = mtime_ns
+        self.size = 0
+        self.file_count = 0
+        self.folder_count = 0
+        self.subdirs: Tuple[str, ...] = ()
+        self.largest_name = ''
+        self.largest_size = 0
+        self.error_count = 0
+
+
+def read_directory(path: str, budget: Optional[IOBudget] = None,
+                   watch: Optional[Callable[[str], None]] = None) -> DirSnapshot:
+    """
+    读取单个目录并生成快照，语义与 folder_scanner 一致
+
+    watch 在读取之前调用（inotify 要求先监听再列目录），
+    读取期间发生的变化会产生事件，不会在快照和监听之间漏掉。
+    目录本身不可读时抛出 OSError，由调用方处理。
+    """
+    if watch is not None:
+        watch(path)
+    snapshot = DirSnapshot(os.stat(path).st_mtime_ns)
+    subdirs = []
+    with os.scandir(path) as entries:
+        for entry in entries:
+            try:
+                if entry.is_dir():
+                    snapshot.folder_count += 1
+                    if not entry.is_symlink():
+                        subdirs.append(entry.path)
+                    continue
+
+                snapshot.file_count += 1
+                file_size = entry.stat().st_size
+            except FileNotFoundError:
+                continue
+            except OSError as e:
+                snapshot.error_count += 1
+                logger.warning(f"无法访问文件 {entry.path}: {e}")
+                continue
+
+            snapshot.size += file_size
+            if file_size > snapshot.largest_size:
+                snapshot.largest_size = file_size
+                snapshot.largest_name = entry.path
+    snapshot.subdirs = tuple(subdirs)
+    if budget is not None:
+        # 目录自身的 stat 加上每个文件一次
+        budget.charge(dirs=1, stats=snapshot.file_count + 1)
+    return snapshot
+
+
+def _error_snapshot(path: str) -> DirSnapshot:
+    """不可读目录的占位快照，记录 mtime 以免每次都重试"""
+    try:
+        mtime_ns = os.stat(path).st_mtime_ns
+    except OSError:
+        mtime_ns = 0
+    snapshot = DirSnapshot(mtime_ns)
+    snapshot.error_count = 1
+    return snapshot
+
+
+def read_subtree(path: str, budget: Optional[IOBudget] = None,
+                 watch: Optional[Callable[[str], None]] = None) -> Dict[str, DirSnapshot]:
+    """读取整个子树的目录快照，不可读的子目录记为空快照"""
+    snapshots = {}
+    stack = [path]
+    while stack:
+        current = stack.pop()
+        try:
+            snapshot = read_directory(current, budget, watch)
+        except OSError as e:
+            logger.warning(f"无法读取文件夹 {current}: {e}")
+            snapshot = _error_snapshot(current)
+        snapshots[current] = snapshot
+        stack.extend(snapshot.subdirs)
+    return snapshots
+
+
+class InotifyWatcher:
+    """基于 ctypes 的最小 inotify 封装，只记录哪些目录发生了变化"""
+
+    IN_MODIFY = 0x00000002
+    IN_ATTRIB = 0x00000004
+    IN_CLOSE_WRITE = 0x00000008
+    IN_MOVED_FROM = 0x00000040
+    IN_MOVED_TO = 0x00000080
+    IN_CREATE = 0x00000100
+    IN_DELETE = 0x00000200
+    IN_DELETE_SELF = 0x00000400
+    IN_MOVE_SELF = 0x00000800
+    IN_Q_OVERFLOW = 0x00004000
+    IN_IGNORED = 0x00008000
+    IN_ONLYDIR = 0x01000000
+    IN_CLOEXEC = 0o2000000
+    WATCH_MASK = (IN_MODIFY | IN_ATTRIB | IN_CLOSE_WRITE | IN_MOVED_FROM | IN_MOVED_TO |
+                  IN_CREATE | IN_DELETE | IN_DELETE_SELF | IN_MOVE_SELF | IN_ONLYDIR)
+    EVENT_HEADER = struct.Struct('iIII')
+
+    def __init__(self):
+        self._libc = ctypes.CDLL(ctypes.util.find_library('c'), use_errno=True)
+        self._fd = self._libc.inotify_init1(os.O_NONBLOCK | self.IN_CLOEXEC)
+        if self._fd < 0:
+            err = ctypes.get_errno()
+            raise OSError(err, os.strerror(err))
+        self._paths: Dict[int, str] = {}
+        self._wds: Dict[str, int] = {}
+        # 全量扫描时各线程在读取目录前添加监听
+        self._lock = threading.Lock()
+
+    @classmethod
+    def available(cls) -> bool:
+        return sys.platform.startswith('linux') and ctypes.util.find_library('c') is not None
+
+    def add_watch(self, path: str):
+        with self._lock:
+            wd = self._libc.inotify_add_watch(self._fd, os.fsencode(path), self.WATCH_MASK)
+            if wd < 0:
+                err = ctypes.get_errno()
+                if err in (errno.ENOENT, errno.ENOTDIR, errno.EACCES):
+                    return
+                raise OSError(err, f"inotify_add_watch 失败 {path}: {os.strerror(err)}")
+            # 目录改名后同一 inode 会返回相同 wd，这里顺便更新路径
+            old_path = self._paths.get(wd)
+            if old_path is not None and self._wds.get(old_path) == wd:
+                del self._wds[old_path]
+            self._paths[wd] = path
+            self._wds[path] = wd
+
+    def remove_watch(self, path: str):
+        with self._lock:
+            wd = self._wds.pop(path, None)
+            if wd is not None and self._paths.get(wd) == path:
+                del self._paths[wd]
+                self._libc.inotify_rm_watch(self._fd, wd)
+
+    @property
+    def watch_count(self) -> int:
+        return len(self._wds)
+
+    def drain(self) -> Tuple[Set[str], bool]:
+        """
+        读取所有待处理事件
+
+        Returns:
+            (变化的目录集合, 是否发生事件队列溢出)
+        """
+        dirty = set()
+        overflow = False
+        while True:
+            try:
+                data = os.read(self._fd, 1 << 16)
+            except BlockingIOError:
+                break
+            offset = 0
+            while offset < len(data):
+                wd, mask, _cookie, name_len = self.EVENT_HEADER.unpack_from(data, offset)
+                offset += self.EVENT_HEADER.size + name_len
+                if mask & self.IN_Q_OVERFLOW:
+                    overflow = True
+                    continue
+                path = self._paths.get(wd)
+                if path is None:
+                    continue
+                if mask & self.IN_IGNORED:
+                    self._paths.pop(wd, None)
+                    if self._wds.get(path) == wd:
+                        del self._wds[path]
+                    continue
+                dirty.add(path)
+                if mask & (self.IN_DELETE_SELF | self.IN_MOVE_SELF):
+                    # 目录自身被删除或移走，由父目录重新扫描来更新结构
+                    dirty.add(os.path.dirname(path))
+        return dirty, overflow
+
+    def close(self):
+        if self._fd >= 0:
+            os.close(self._fd)
+            self._fd = -1
+
+
+class IncrementalScanner:
+    """按目录缓存快照的增量扫描器"""
+
+    def __init__(self, root, workers: Optional[int] = None, use_inotify: bool = True,
+                 full_rescan_every: int = 30, budget: Optional[IOBudget] = None):
+        """
+        Args:
+            root: 要扫描的文件夹
+            workers: 全量扫描时的线程数
+            use_inotify: 是否在 Linux 下使用 inotify 检测变化
+            full_rescan_every: 每隔多少次扫描做一次全量扫描，0 表示从不
+            budget: I/O 预算，None 表示不限速
+        """
+        self.root = os.fspath(root)
+        self.workers = workers or min(32, (os.cpu_count() or 1) * 4)
+        self.use_inotify = use_inotify and InotifyWatcher.available()
+        self.full_rescan_every = full_rescan_every
+        self.budget = budget
+        self.snapshots: Dict[str, DirSnapshot] = {}
+        self.watcher: Optional[InotifyWatcher] = None
+        self._watcher_lock = threading.Lock()
+        self.scan_count = 0
+        self._totals = {'size': 0, 'file_count': 0, 'folder_count': 0, 'error_count': 0}
+        self._largest: Tuple[int, str] = (0, '')
+
+    # ---- 汇总维护 ----
+
+    def _apply(self, snapshot: DirSnapshot, sign: int):
+        self._totals['size'] += sign * snapshot.size
+        self._totals['file_count'] += sign * snapshot.file_count
+        self._totals['folder_count'] += sign * snapshot.folder_count
+        self._totals['error_count'] += sign * snapshot.error_count
+
+    def _recompute_largest(self):
+        best = (0, '')
+        for snapshot in self.snapshots.values():
+            if snapshot.largest_size > best[0]:
+                best = (snapshot.largest_size, snapshot.largest_name)
+        self._largest = best
+
+    def _put(self, path: str, snapshot: DirSnapshot) -> bool:
+        """
+        替换目录快照并更新汇总
+
+        Returns:
+            是否需要重新计算最大文件
+        """
+        old = self.snapshots.get(path)
+        if old is not None:
+            self._apply(old, -1)
+        self.snapshots[path] = snapshot
+        self._apply(snapshot, 1)
+
+        if snapshot.largest_size > self._largest[0]:
+            self._largest = (snapshot.largest_size, snapshot.largest_name)
+            return False
+        if old is None or not old.largest_name or old.largest_name != self._largest[1]:
+            return False
+        # 原最大文件所在目录变化：只有最大文件仍在且大小不变时才无需重算
+        return not (snapshot.largest_name == old.largest_name and snapshot.largest_size == self._largest[0])
+
+    def _drop_subtree(self, path: str) -> bool:
+        needs_largest = False
+        stack = [path]
+        while stack:
+            current = stack.pop()
+            snapshot = self.snapshots.pop(current, None)
+            if snapshot is None:
+                continue
+            self._apply(snapshot, -1)
+            if snapshot.largest_name and snapshot.largest_name == self._largest[1]:
+                needs_largest = True
+            if self.watcher is not None:
+                self.watcher.remove_watch(current)
+            stack.extend(snapshot.subdirs)
+        return needs_largest
+
+    def _watch(self, path: str):
+        """读取目录前添加监听；可能在全量扫描的多个线程中同时调用"""
+        watcher = self.watcher
+        if watcher is None:
+            return
+        try:
+            watcher.add_watch(path)
+        except OSError as e:
+            with self._watcher_lock:
+                if self.watcher is watcher:
+                    logger.warning(f"inotify 监听数量不足，改用目录 mtime 检测: {e}")
+                    watcher.close()
+                    self.watcher = None
+
+    # ---- 扫描 ----
+
+    def _full_scan(self):
+        # 先建立新的监听，每个目录在读取前加入监听
+        if self.watcher is not None:
+            self.watcher.close()
+        self.watcher = InotifyWatcher() if self.use_inotify else None
+        root_snapshot = read_directory(self.root, self.budget, self._watch)
+        snapshots = {self.root: root_snapshot}
+        with ThreadPoolExecutor(max_workers=self.workers, thread_name_prefix='scan') as executor:
+            for part in executor.map(lambda path: read_subtree(path, self.budget, self._watch),
+                                     root_snapshot.subdirs):
+                snapshots.update(part)
+
+        self.snapshots = {}
+        self._totals = dict.fromkeys(self._totals, 0)
+        self._largest = (0, '')
+        for path, snapshot in snapshots.items():
+            self._put(path, snapshot)
+        return len(snapshots)
+
+    def _dirty_by_mtime(self) -> Set[str]:
+        dirty = set()
+        for path, snapshot in self.snapshots.items():
+            if self.budget is not None:
+                self.budget.charge(stats=1)
+            try:
+                if os.stat(path).st_mtime_ns != snapshot.mtime_ns:
+                    dirty.add(path)
+            except OSError:
+                # 目录已消失，由父目录的变化处理；根目录消失时交给 rescan 抛出
+                if path == self.root:
+                    dirty.add(path)
+        return dirty
+
+    def _rescan(self, path: str) -> Tuple[int, bool]:
+        """重新扫描一个目录，新增子目录整体读取，消失的子目录整体移除"""
+        old = self.snapshots.get(path)
+        if old is None:
+            return 0, False
+        try:
+            snapshot = read_directory(path, self.budget)
+        except FileNotFoundError:
+            if path == self.root:
+                raise
+            return 0, False
+        except OSError as e:
+            if path == self.root:
+                raise
+            logger.warning(f"无法读取文件夹 {path}: {e}")
+            snapshot = _error_snapshot(path)
+
+        rescanned = 1
+        needs_largest = self._put(path, snapshot)
+        old_subdirs, new_subdirs = set(old.subdirs), set(snapshot.subdirs)
+        for removed in old_subdirs - new_subdirs:
+            needs_largest = self._drop_subtree(removed) or needs_largest
+        for added in new_subdirs - old_subdirs:
+            for sub_path, sub_snapshot in read_subtree(added, self.budget, self._watch).items():
+                needs_largest = self._put(sub_path, sub_snapshot) or needs_largest
+                rescanned += 1
+        return rescanned, needs_largest
+
+    def scan(self) -> Dict[str, Any]:
+        """执行一次扫描，返回与 scan_folder 相同结构的统计字典"""
+        full = (not self.snapshots
+                or (self.full_rescan_every and self.scan_count % self.full_rescan_every == 0))
+        self.scan_count += 1
+
+        if full:
+            rescanned = self._full_scan()
+            mode = 'full'
+        else:
+            overflow = False
+            if self.watcher is not None:
+                dirty, overflow = self.watcher.drain()
+                mode = 'inotify'
+            if self.watcher is None or overflow:
+                dirty = self._dirty_by_mtime()
+                mode = 'mtime'
+
+            rescanned = 0
+            needs_largest = False
+            # 父目录先处理，子树变化后已移除的目录会被自动跳过
+            for path in sorted(dirty, key=len):
+                count, changed = self._rescan(path)
+                rescanned += count
+                needs_largest = needs_largest or changed
+            if needs_largest:
+                self._recompute_largest()
+
+        largest_size, largest_path = self._largest
+        return {
+            'total_size': self._totals['size'],
+            'file_count': self._totals['file_count'],
+            # 根目录本身不计入文件夹数量
+            'folder_count': self._totals['folder_count'],
+            'largest_file': {
+                'name': os.path.relpath(largest_path, self.root) if largest_path else '',
+                'size': largest_size,
+            },
+            'error_count': self._totals['error_count'],
+            'scan_mode': mode,
+            'rescanned_dirs': rescanned,
+            'cached_dirs': len(self.snapshots),
+        }
+
+    def reset(self):
+        """丢弃所有缓存，下次扫描重新全量读取"""
+        self.close()
+        self.snapshots = {}
+        self.scan_count = 0
+
+    def close(self):
+        if self.watcher is not None:
+            self.watcher.close()
+            self.watcher = None
@@ -0,0 +1,90 @@
+"""
+硬链接去重用的紧凑 inode 集合
+
+只有 st_nlink > 1 的文件需要登记。每个设备一张开放寻址哈希表，槽位是
+array('Q') 中的 8 字节整数（inode + 1，0 表示空槽），负载不超过 1/2，
+每条记录约 16 字节，远小于 Python set 中的 (dev, ino) 元组。
+
+max_entries 限制登记总数，超过后不再去重，只统计未登记的链接数，
+保证数百万 inode 时内存仍然有上限。
+"""
+
+import threading
+from array import array
+from typing import Dict
+
+
+class _InodeTable:
+    """单个设备的 inode 开放寻址表"""
+
+    __slots__ = ('slots', 'mask', 'shift', 'count')
+
+    def __init__(self, capacity: int = 1024):
+        self.slots = array('Q', bytes(8 * capacity))
+        self.mask = capacity - 1
+        self.shift = 64 - (capacity.bit_length() - 1)
+        self.count = 0
+
+    def _probe(self, key: int) -> int:
+        # Fibonacci 乘法散列打散连续分配的 inode 号，取 64 位乘积的高位，线性探测
+        index = ((key * 0x9E3779B97F4A7C15) & 0xFFFFFFFFFFFFFFFF) >> self.shift
+        slots = self.slots
+        while slots[index] and slots[index] != key:
+            index = (index + 1) & self.mask
+        return index
+
+    def add(self, inode: int) -> bool:
+        key = inode + 1
+        index = self._probe(key)
+        if self.slots[index]:
+            return False
+        self.slots[index] = key
+        self.count += 1
+        if self.count * 2 > len(self.slots):
+            self._grow()
+        return True
+
+    def _grow(self):
+        old = self.slots
+        self.slots = array('Q', bytes(16 * len(old)))
+        self.mask = len(self.slots) - 1
+        self.shift -= 1
+        for key in old:
+            if key:
+                self.slots[self._probe(key)] = key
+
+
+class InodeSet:
+    """(设备, inode) 集合，线程安全"""
+
+    def __init__(self, max_entries: int = 16 * 1024 * 1024):
+        self.max_entries = max_entries
+        self._tables: Dict[int, _InodeTable] = {}
+        self._lock = threading.Lock()
+        self.count = 0
+        self.untracked = 0
+
+    def add(self, device: int, inode: int) -> bool:
+        """
+        登记一个 inode
+
+        Returns:
+            首次出现（或已超出上限无法判断）时返回 True，重复出现返回 False
+        """
+        with self._lock:
+            table = self._tables.get(device)
+            if table is None:
+                table = self._tables[device] = _InodeTable()
+            if self.count >= self.max_entries:
+                key = inode + 1
+                if table.slots[table._probe(key)] == key:
+                    return False
+                self.untracked += 1
+                return True
+            added = table.add(inode)
+            if added:
+                self.count += 1
+            return added
+
+    def memory_bytes(self) -> int:
+        return sum(len(table.slots) * table.slots.itemsize for table in self._tables.values())
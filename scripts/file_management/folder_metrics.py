@@ -0,0 +1,217 @@
+"""
+FolderMonitor 指标导出
+
+MetricsRegistry 保存每个根目录最近一次完成扫描的结果，
+MetricsServer 在后台线程中提供 HTTP 接口：
+- /metrics       Prometheus 文本格式
+- /metrics.json  JSON 格式
+
+抓取只读取内存中的结果，不会触发磁盘遍历。
+JsonLinesSink 把每次扫描结果追加为一行 JSON，便于日志采集。
+"""
+
+import json
+import threading
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from typing import Any, Dict, List, Tuple
+
+from loguru import logger
+
+
+# 历史增长窗口在指标中的标签
+GROWTH_WINDOWS = {
+    '1_minute': '1m',
+    '1_hour': '1h',
+    '12_hours': '12h',
+    '1_day': '1d',
+    '7_days': '7d',
+    '30_days': '30d',
+}
+
+
+def build_snapshot(root: str, name: str, stats: Dict[str, Any], historical_growth: Dict[str, Any],
+                   scan_duration: float, timestamp: float, interval_seconds: float,
+                   skipped_scans: int) -> Dict[str, Any]:
+    """把一次扫描的结果整理为导出用的字典"""
+    growth = {}
+    for period_name, window in GROWTH_WINDOWS.items():
+        item = historical_growth.get(period_name, {})
+        if item.get('available'):
+            seconds = item['time_diff_hours'] * 3600
+            growth[window] = {
+                'size_change': item['size_change'],
+                'bytes_per_second': item['size_change'] / seconds if seconds > 0 else 0.0,
+            }
+    snapshot = {
+        'root': root,
+        'name': name,
+        'timestamp': timestamp,
+        'total_size': stats['total_size'],
+        'file_count': stats['file_count'],
+        'folder_count': stats['folder_count'],
+        'error_count': stats.get('error_count', 0),
+        'scan_duration_seconds': scan_duration,
+        'scan_interval_seconds': interval_seconds,
+        'skipped_scans': skipped_scans,
+        'growth': growth,
+    }
+    if 'estimate' in stats:
+        snapshot['estimate'] = stats['estimate']
+    if 'apparent_size' in stats:
+        snapshot['apparent_size'] = stats['apparent_size']
+        snapshot['hardlinks_skipped'] = stats['hardlinks_skipped']
+    return snapshot
+
+
+class MetricsRegistry:
+    """各根目录最近一次扫描结果和累计计数，线程安全"""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._snapshots: Dict[str, Dict[str, Any]] = {}
+        self._counters: Dict[str, Dict[str, Any]] = {}
+
+    def _counter(self, root: str, name: str) -> Dict[str, Any]:
+        counter = self._counters.get(root)
+        if counter is None:
+            counter = self._counters[root] = {'name': name, 'scans_total': 0, 'scan_failures_total': 0}
+        return counter
+
+    def record_scan(self, snapshot: Dict[str, Any]):
+        with self._lock:
+            self._snapshots[snapshot['root']] = snapshot
+            self._counter(snapshot['root'], snapshot['name'])['scans_total'] += 1
+
+    def record_failure(self, root: str, name: str):
+        with self._lock:
+            self._counter(root, name)['scan_failures_total'] += 1
+
+    def collect(self) -> List[Dict[str, Any]]:
+        """每个根目录一项：最近一次完成的扫描结果加累计计数"""
+        with self._lock:
+            items = []
+            for root, counter in self._counters.items():
+                item = dict(self._snapshots.get(root) or {'root': root})
+                item.update(counter)
+                items.append(item)
+        return items
+
+    def render_json(self) -> str:
+        return json.dumps({'roots': self.collect()}, ensure_ascii=False)
+
+    def render_prometheus(self) -> str:
+        families: Dict[str, Tuple[str, str, List[str]]] = {}
+
+        def add(metric: str, kind: str, help_text: str, labels: Dict[str, str], value: float):
+            family = families.setdefault(metric, (kind, help_text, []))
+            label_text = ','.join(f'{key}="{_escape(str(val))}"' for key, val in labels.items())
+            family[2].append(f'{metric}{{{label_text}}} {value!r}')
+
+        for item in self.collect():
+            labels = {'root': item['root'], 'name': item['name']}
+            add('folder_scans_total', 'counter', '完成的扫描次数', labels, item['scans_total'])
+            add('folder_scan_failures_total', 'counter', '失败的扫描次数', labels, item['scan_failures_total'])
+            if 'total_size' not in item:
+                continue
+            add('folder_size_bytes', 'gauge', '文件夹总大小', labels, item['total_size'])
+            add('folder_files', 'gauge', '文件数量', labels, item['file_count'])
+            add('folder_directories', 'gauge', '文件夹数量', labels, item['folder_count'])
+            add('folder_scan_errors', 'gauge', '最近一次扫描中无法访问的条目数', labels, item['error_count'])
+            add('folder_scan_duration_seconds', 'gauge', '最近一次扫描耗时', labels,
+                item['scan_duration_seconds'])
+            add('folder_last_scan_timestamp_seconds', 'gauge', '最近一次扫描完成时间', labels, item['timestamp'])
+            add('folder_scan_interval_seconds', 'gauge', '当前扫描间隔（按耗时自动拉长后）', labels,
+                item['scan_interval_seconds'])
+            add('folder_skipped_scans_total', 'counter', '因扫描超时跳过的轮次', labels, item['skipped_scans'])
+            if 'apparent_size' in item:
+                add('folder_apparent_size_bytes', 'gauge', '表观大小（硬链接去重后的 st_size 合计）', labels,
+                    item['apparent_size'])
+                add('folder_hardlinks_skipped', 'gauge', '去重跳过的硬链接数', labels, item['hardlinks_skipped'])
+            estimate = item.get('estimate')
+            if estimate is not None:
+                for bound in ('low', 'high'):
+                    add('folder_size_estimate_bound_bytes', 'gauge', '抽样估算的 95% 置信区间',
+                        dict(labels, bound=bound), estimate[f'size_{bound}'])
+            for window, growth in item['growth'].items():
+                window_labels = dict(labels, window=window)
+                add('folder_size_change_bytes', 'gauge', '窗口内的体积变化', window_labels,
+                    growth['size_change'])
+                add('folder_growth_bytes_per_second', 'gauge', '窗口内的平均增长速度', window_labels,
+                    growth['bytes_per_second'])
+
+        lines = []
+        for metric, (kind, help_text, samples) in families.items():
+            lines.append(f'# HELP {metric} {help_text}')
+            lines.append(f'# TYPE {metric} {kind}')
+            lines.extend(samples)
+        return '\n'.join(lines) + '\n'
+
+
+def _escape(value: str) -> str:
+    return value.replace('\\', '\\\\').replace('"', '\\"').replace('\n', '\\n')
+
+
+class _MetricsHandler(BaseHTTPRequestHandler):
+    def do_GET(self):
+        registry = self.server.registry
+        path = self.path.split('?', 1)[0]
+        if path == '/metrics':
+            body = registry.render_prometheus()
+            content_type = 'text/plain; version=0.0.4; charset=utf-8'
+        elif path == '/metrics.json':
+            body = registry.render_json()
+            content_type = 'application/json; charset=utf-8'
+        else:
+            self.send_error(404)
+            return
+        data = body.encode('utf-8')
+        self.send_response(200)
+        self.send_header('Content-Type', content_type)
+        self.send_header('Content-Length', str(len(data)))
+        self.end_headers()
+        self.wfile.write(data)
+
+    def log_message(self, format, *args):
+        logger.debug(f"指标请求 {self.address_string()}: {format % args}")
+
+
+class MetricsServer:
+    """在守护线程中运行的指标 HTTP 服务"""
+
+    def __init__(self, registry: MetricsRegistry, host: str = '127.0.0.1', port: int = 9108):
+        self.server = ThreadingHTTPServer((host, port), _MetricsHandler)
+        self.server.daemon_threads = True
+        self.server.registry = registry
+        self.thread = threading.Thread(target=self.server.serve_forever, name='metrics', daemon=True)
+
+    @property
+    def address(self) -> Tuple[str, int]:
+        return self.server.server_address[:2]
+
+    def start(self):
+        self.thread.start()
+        host, port = self.address
+        logger.info(f"指标服务已启动: http://{host}:{port}/metrics (JSON: /metrics.json)")
+
+    def close(self):
+        self.server.shutdown()
+        self.server.server_close()
+
+
+class JsonLinesSink:
+    """每次扫描追加一行 JSON"""
+
+    def __init__(self, path: str):
+        self.path = path
+        self._lock = threading.Lock()
+        self._file = open(path, 'a', encoding='utf-8')
+
+    def write(self, snapshot: Dict[str, Any]):
+        line = json.dumps(snapshot, ensure_ascii=False)
+        with self._lock:
+            self._file.write(line + '\n')
+            self._file.flush()
+
+    def close(self):
+        with self._lock:
+            self._file.close()
@@ -1,44 +1,120 @@
 import argparse
+import heapq
+import json
 import os
+import threading
 import time
 import signal
 import sys
 from loguru import logger
-from datetime import datetime, timedelta
+from datetime import datetime
 from typing import Tuple, Optional, Dict, Any, List
 from pathlib import Path
-from collections import deque
+from concurrent.futures import Future, ThreadPoolExecutor
+
+from folder_breakdown import fastest_growing
+from folder_history import HistoryStore, SizeHistory
+from folder_incremental import IncrementalScanner
+from folder_metrics import JsonLinesSink, MetricsRegistry, MetricsServer, build_snapshot
+from folder_sampling import SampledScanner
+from folder_scanner import scan_folder
+from folder_throttle import AdaptiveSchedule, IOBudget
+
+
+def setup_logging(log_dir: str = 'log'):
+    """设置日志配置"""
+    # loguru默认输出到终端，同时添加文件日志
+    # 使用默认的日志目录和文件名格式
+    if not os.path.exists(log_dir):
+        os.makedirs(log_dir)
+    
+    log_file_path = os.path.join(log_dir, 'folder_monitor_{time:YYYY-MM-DD}.log')
+    
+    # 添加日志记录器，按天滚动，并保留30天的日志
+    log_format = "{time:YYYY-MM-DD HH:mm:ss} - {level} - {name}:{function}:{line} - {message}"
+    logger.add(log_file_path, rotation="00:00", retention="30 days", level="DEBUG", format=log_format)
+
 
 class FolderMonitor:
-    def __init__(self, folder_path: str, interval_minutes: float):
+    def __init__(self, folder_path: str, interval_minutes: float, scan_workers: Optional[int] = None,
+                 incremental: bool = False, full_rescan_every: int = 30,
+                 history_db: Optional[str] = None, label: Optional[str] = None,
+                 standalone: bool = True, breakdown_depth: Optional[int] = None, top_n: int = 5,
+                 metrics: Optional[MetricsRegistry] = None, sink: Optional[JsonLinesSink] = None,
+                 max_duty: float = 0.5, io_budget: Optional[IOBudget] = None,
+                 approximate: bool = False, sample_size: int = 1000, exact_every: int = 60,
+                 allocated: bool = False, max_inodes: int = 16 * 1024 * 1024):
         self.folder_path = Path(folder_path).resolve()
+        # 多目录模式下用于区分各根目录的输出前缀
+        self.label = label
         self.interval_minutes = interval_minutes
         self.interval_seconds = interval_minutes * 60
+        self.scan_workers = scan_workers
+        
+        # 自调整排程：扫描超时跳过错过的轮次，平均耗时过长时拉长间隔
+        self.schedule = AdaptiveSchedule(self.interval_seconds, max_duty)
+        self.schedule_stretched = False
+        self.io_budget = io_budget
+        
+        # 磁盘占用模式：按 st_blocks 统计并对硬链接去重
+        self.allocated = allocated
+        self.max_inodes = max_inodes
+        
+        # 占用明细：同一遍扫描中收集目录、最大文件/目录和扩展名统计
+        self.breakdown_depth = breakdown_depth
+        self.top_n = top_n
+        self.previous_directories = None
+        
+        # 指标导出：最近一次完成的扫描结果发布到注册表和 JSON-lines 文件
+        self.metrics = metrics
+        self.sink = sink
+        self.last_scan_duration = None
+        
+        # 增量模式：按目录缓存快照，每次只重扫变化的目录
+        self.incremental_scanner = None
+        if incremental:
+            self.incremental_scanner = IncrementalScanner(
+                self.folder_path, workers=scan_workers, full_rescan_every=full_rescan_every,
+                budget=io_budget
+            )
+        
+        # 抽样模式：按分层抽样估算总量，定期精确扫描校准
+        self.sampled_scanner = None
+        if approximate:
+            self.sampled_scanner = SampledScanner(
+                self.folder_path, workers=scan_workers, sample_size=sample_size,
+                exact_every=exact_every, budget=io_budget
+            )
         self.previous_size = None
         self.start_time = datetime.now()
         
-        # 历史数据存储 - 使用deque限制内存使用
-        self.size_history = deque(maxlen=24*60*7)  # 保留一周的分钟级数据
+        # 体积口径：不同口径的历史分开记录，增长统计只在同一口径内比较
+        if allocated:
+            self.size_mode = 'allocated'
+        else:
+            self.size_mode = 'approximate' if approximate else 'apparent'
+        
+        # 历史数据存储 - 时间戳/体积并行数组组成的环形缓冲区
+        self.size_history = SizeHistory(capacity=24*60*7)  # 保留一周的分钟级数据
         self.last_minute_record = None
         self.last_hour_record = None
         self.last_12hour_record = None
         self.last_day_record = None
         
-        self.setup_logging()
-        self.setup_signal_handlers()
+        # 多目录模式由调度器统一设置日志和信号处理
+        if standalone:
+            self.setup_logging()
+            self.setup_signal_handlers()
+        
+        # 持久化历史：重启后从 SQLite 恢复增长统计
+        self.history_store = None
+        if history_db:
+            self.history_store = HistoryStore(history_db, str(self.folder_path), self.size_mode)
+            self.restore_history()
         
     def setup_logging(self, log_dir: str = 'log'):
         """设置日志配置"""
-        # loguru默认输出到终端，同时添加文件日志
-        # 使用默认的日志目录和文件名格式
-        if not os.path.exists(log_dir):
-            os.makedirs(log_dir)
-        
-        log_file_path = os.path.join(log_dir, 'folder_monitor_{time:YYYY-MM-DD}.log')
-        
-        # 添加日志记录器，按天滚动，并保留30天的日志
-        log_format = "{time:YYYY-MM-DD HH:mm:ss} - {level} - {name}:{function}:{line} - {message}"
-        logger.add(log_file_path, rotation="00:00", retention="30 days", level="DEBUG", format=log_format)
+        setup_logging(log_dir)
     
     def setup_signal_handlers(self):
         """设置信号处理器"""
@@ -77,44 +153,24 @@ class FolderMonitor:
     def get_folder_stats(self, folder_path: Path, max_retries: int = 3) -> Optional[Dict[str, Any]]:
         """
         获取文件夹统计信息，包括总大小、文件数量和文件夹数量
+        
+        使用 os.scandir 引擎，顶层子树由线程池并行扫描；增量模式下只重扫变化的目录
         """
         for attempt in range(max_retries):
             try:
-                total_size = 0
-                file_count = 0
-                folder_count = 0
-                largest_file = {'name': '', 'size': 0}
-                
-                for root, dirs, files in os.walk(folder_path):
-                    folder_count += len(dirs)
-                    
-                    for filename in files:
-                        file_count += 1
-                        filepath = Path(root) / filename
-                        
-                        try:
-                            if filepath.exists():
-                                file_size = filepath.stat().st_size
-                                total_size += file_size
-                                
-                                # 跟踪最大文件
-                                if file_size > largest_file['size']:
-                                    largest_file = {
-                                        'name': str(filepath.relative_to(folder_path)),
-                                        'size': file_size
-                                    }
-                        except (OSError, IOError) as e:
-                            logger.warning(f"无法访问文件 {filepath}: {e}")
-                            continue
-                
-                return {
-                    'total_size': total_size,
-                    'file_count': file_count,
-                    'folder_count': folder_count,
-                    'largest_file': largest_file
-                }
-                
+                if self.incremental_scanner is not None:
+                    return self.incremental_scanner.scan()
+                if self.sampled_scanner is not None:
+                    return self.sampled_scanner.scan()
+                return scan_folder(folder_path, workers=self.scan_workers,
+                                   breakdown_depth=self.breakdown_depth, top_n=self.top_n,
+                                   budget=self.io_budget, allocated=self.allocated,
+                                   max_inodes=self.max_inodes)
             except (OSError, IOError) as e:
+                if self.incremental_scanner is not None:
+                    self.incremental_scanner.reset()
+                if self.sampled_scanner is not None:
+                    self.sampled_scanner.reset()
                 if attempt < max_retries - 1:
                     logger.warning(f"获取文件夹信息失败，重试 {attempt + 1}/{max_retries}: {e}")
                     time.sleep(1)
@@ -129,15 +185,39 @@ class FolderMonitor:
         duration = datetime.now() - self.start_time
         logger.info(f"监控时长: {duration}")
         logger.info(f"监控文件夹: {self.folder_path}")
+        if self.history_store is not None:
+            self.history_store.close()
+    
+    def restore_history(self):
+        """从持久化历史恢复内存中的历史记录和增长率基准"""
+        now = time.time()
+        restored = self.history_store.recent_samples(now - self.size_history.capacity * 60)
+        for record_time, record_size in restored:
+            self.size_history.append(record_time, record_size)
+        
+        for attr, seconds in (('last_minute_record', 60), ('last_hour_record', 3600),
+                              ('last_12hour_record', 43200), ('last_day_record', 86400)):
+            record = self.history_store.nearest(now - seconds, now)
+            if record is not None:
+                setattr(self, attr, {'timestamp': datetime.fromtimestamp(record[0]), 'size': record[1]})
+        
+        if restored:
+            self.previous_size = restored[-1][1]
+            logger.info(f"已从历史库恢复 {len(restored)} 条记录: {self.history_store.db_path}")
     
-    def add_size_record(self, size: int):
+    def add_size_record(self, size: int, file_count: Optional[int] = None):
         """添加体积记录到历史数据"""
         now = datetime.now()
         record = {
             'timestamp': now,
             'size': size
         }
-        self.size_history.append(record)
+        self.size_history.append(now.timestamp(), size)
+        if self.history_store is not None:
+            try:
+                self.history_store.add_sample(now.timestamp(), size, file_count)
+            except Exception as e:
+                logger.warning(f"写入历史库失败: {e}")
         
         # 初始化基准记录
         if self.last_minute_record is None:
@@ -215,7 +295,7 @@ class FolderMonitor:
         if not self.size_history:
             return {}
         
-        now = datetime.now()
+        now = time.time()
         growth_data = {}
         
         # 查找不同时间段的历史记录
@@ -227,31 +307,37 @@ class FolderMonitor:
         }
         
         for period_name, seconds in time_periods.items():
-            target_time = now - timedelta(seconds=seconds)
+            # 二分查找最接近目标时间的记录
+            closest_record = self.size_history.nearest(now - seconds)
             
-            # 查找最接近目标时间的记录
-            closest_record = None
-            min_time_diff = float('inf')
-            
-            for record in self.size_history:
-                time_diff = abs((record['timestamp'] - target_time).total_seconds())
-                if time_diff < min_time_diff:
-                    min_time_diff = time_diff
-                    closest_record = record
-            
-            if closest_record and min_time_diff <= seconds * 0.1:  # 允许10%的时间误差
-                actual_time_diff = (now - closest_record['timestamp']).total_seconds()
-                size_change = current_size - closest_record['size']
+            if closest_record and abs(closest_record[0] - (now - seconds)) <= seconds * 0.1:  # 允许10%的时间误差
+                record_time, record_size = closest_record
+                actual_time_diff = now - record_time
+                size_change = current_size - record_size
                 
                 growth_data[period_name] = {
                     'size_change': size_change,
                     'time_diff_hours': actual_time_diff / 3600,
                     'available': True,
-                    'record_time': closest_record['timestamp'].strftime("%Y-%m-%d %H:%M:%S")
+                    'record_time': datetime.fromtimestamp(record_time).strftime("%Y-%m-%d %H:%M:%S")
                 }
             else:
                 growth_data[period_name] = {'available': False}
         
+        # 更长的时间跨度从持久化历史的汇总表读取
+        if self.history_store is not None:
+            for period_name, seconds in (('7_days', 7 * 86400), ('30_days', 30 * 86400)):
+                record = self.history_store.nearest(now - seconds, now)
+                if record and abs(record[0] - (now - seconds)) <= seconds * 0.1:
+                    growth_data[period_name] = {
+                        'size_change': current_size - record[1],
+                        'time_diff_hours': (now - record[0]) / 3600,
+                        'available': True,
+                        'record_time': datetime.fromtimestamp(record[0]).strftime("%Y-%m-%d %H:%M:%S")
+                    }
+                else:
+                    growth_data[period_name] = {'available': False}
+        
         return growth_data
     
     def format_growth_info(self, growth_stats: Dict[str, Any], 
@@ -293,6 +379,14 @@ class FolderMonitor:
             if historical_growth.get('1_day', {}).get('available'):
                 change = historical_growth['1_day']['size_change']
                 growth_info.append(f"过去24小时: {self.format_size(int(change))}")
+            
+            if historical_growth.get('7_days', {}).get('available'):
+                change = historical_growth['7_days']['size_change']
+                growth_info.append(f"过去7天: {self.format_size(int(change))}")
+            
+            if historical_growth.get('30_days', {}).get('available'):
+                change = historical_growth['30_days']['size_change']
+                growth_info.append(f"过去30天: {self.format_size(int(change))}")
         
         return " | ".join(growth_info) if growth_info else ""
 
@@ -313,9 +407,22 @@ class FolderMonitor:
             else:
                 change_indicator = " (无变化)"
         
-        output = f"[{timestamp}] 文件夹体积: {size_str}{change_indicator}"
+        size_label = "磁盘占用" if 'apparent_size' in stats else "文件夹体积"
+        output = f"[{timestamp}] {self.log_prefix}{size_label}: {size_str}{change_indicator}"
+        if 'apparent_size' in stats:
+            output += f" | 表观大小: {self.format_size(stats['apparent_size'])}"
+            if stats['hardlinks_skipped']:
+                output += f" | 硬链接去重: {stats['hardlinks_skipped']} 个"
+            if stats['untracked_links']:
+                output += f" | 超出去重上限: {stats['untracked_links']} 个"
         output += f" | 文件: {stats['file_count']} | 文件夹: {stats['folder_count']}"
         
+        estimate = stats.get('estimate')
+        if estimate is not None:
+            output += (f" | 估算区间: {self.format_size(estimate['size_low'])} ~ "
+                       f"{self.format_size(estimate['size_high'])} "
+                       f"(95%, 抽样 {estimate['sampled_dirs']}/{estimate['frame_dirs']} 个目录)")
+        
         if stats['largest_file']['name']:
             largest_size = self.format_size(stats['largest_file']['size'])
             output += f" | 最大文件: {stats['largest_file']['name']} ({largest_size})"
@@ -325,46 +432,303 @@ class FolderMonitor:
         if growth_info:
             output += f"\n    增长统计: {growth_info}"
         
+        if 'breakdown' in stats:
+            output += self.format_breakdown(stats['breakdown'])
+        
         return output
     
-    def monitor(self):
-        """开始监控"""
+    def format_breakdown(self, breakdown: Dict[str, Any]) -> str:
+        """格式化占用明细，每类一行"""
+        top_level = sorted(((name, size) for name, size in breakdown['directories'].items() if '/' not in name),
+                           key=lambda item: item[1], reverse=True)[:self.top_n]
+        sections = [
+            ('顶层目录', [f"{name} ({self.format_size(size)})" for name, size in top_level]),
+            ('最大文件', [f"{item['name']} ({self.format_size(item['size'])})" for item in breakdown['top_files']]),
+            ('最大目录', [f"{item['name']} ({self.format_size(item['size'])})" for item in breakdown['top_dirs']]),
+            ('扩展名', [f"{item['extension']} ({self.format_size(item['size'])}, {item['count']}个)"
+                        for item in breakdown['extensions']]),
+            ('增长最快', [f"{item['name']} (+{self.format_size(item['size_change'])})"
+                         for item in breakdown.get('fastest_growing', [])]),
+        ]
+        return "".join(f"\n    {title}: {', '.join(items)}" for title, items in sections if items)
+    
+    @property
+    def log_prefix(self) -> str:
+        return f"[{self.label}] " if self.label else ""
+    
+    def log_start(self):
+        """输出监控配置"""
         logger.info(f"开始监控文件夹: {self.folder_path}")
         logger.info(f"监控间隔: {self.interval_minutes} 分钟")
+        if self.incremental_scanner is not None:
+            detector = "inotify" if self.incremental_scanner.use_inotify else "目录 mtime"
+            logger.info(f"增量扫描: 使用 {detector} 检测变化，"
+                        f"每 {self.incremental_scanner.full_rescan_every} 次做一次全量扫描")
+        if self.sampled_scanner is not None:
+            logger.info(f"抽样估算: 每次读取约 {self.sampled_scanner.sample_size} 个目录，"
+                        f"每 {self.sampled_scanner.exact_every} 次做一次精确扫描校准")
+    
+    def scan_once(self):
+        """扫描一次并输出统计，单目录循环和多目录调度器共用"""
+        try:
+            timestamp = self.format_timestamp()
+            scan_start = time.perf_counter()
+            stats = self.get_folder_stats(self.folder_path)
+            self.last_scan_duration = time.perf_counter() - scan_start
+            self.schedule.record(self.last_scan_duration)
+            
+            if stats is not None:
+                current_size = stats['total_size']
+                size_change = None
+                
+                if self.previous_size is not None:
+                    size_change = current_size - self.previous_size
+                
+                # 添加到历史记录
+                self.add_size_record(current_size, stats['file_count'])
+                
+                # 与上一次扫描比较各子树大小
+                breakdown = stats.get('breakdown')
+                if breakdown is not None:
+                    breakdown['fastest_growing'] = fastest_growing(
+                        self.previous_directories, breakdown['directories'], self.top_n)
+                    self.previous_directories = breakdown['directories']
+                
+                # 计算增长率
+                growth_stats = self.calculate_growth_rates(current_size)
+                historical_growth = self.get_historical_growth(current_size)
+                
+                output = self.format_output(timestamp, stats, size_change, 
+                                          growth_stats, historical_growth)
+                logger.info(output)
+                self.publish(stats, historical_growth)
+                
+                self.previous_size = current_size
+            else:
+                logger.error(f"[{timestamp}] {self.log_prefix}错误：无法获取文件夹统计信息")
+                if self.metrics is not None:
+                    self.metrics.record_failure(str(self.folder_path), self.label or str(self.folder_path))
+            
+        except Exception as e:
+            logger.error(f"[{self.format_timestamp()}] {self.log_prefix}监控过程中发生错误: {e}")
+    
+    def publish(self, stats: Dict[str, Any], historical_growth: Dict[str, Any]):
+        """把本次扫描结果发布到指标注册表和 JSON-lines 文件"""
+        if self.metrics is None and self.sink is None:
+            return
+        snapshot = build_snapshot(str(self.folder_path), self.label or str(self.folder_path), stats,
+                                  historical_growth, self.last_scan_duration, time.time(),
+                                  self.schedule.effective_interval, self.schedule.skipped)
+        if self.metrics is not None:
+            self.metrics.record_scan(snapshot)
+        if self.sink is not None:
+            try:
+                self.sink.write(snapshot)
+            except OSError as e:
+                logger.warning(f"写入 JSON-lines 文件失败: {e}")
+    
+    def next_scan_time(self, due: float, now: float) -> float:
+        """按扫描耗时计算下一次扫描时间，跳过或拉长间隔时记录日志"""
+        was_stretched = self.schedule_stretched
+        next_due, skipped = self.schedule.next_due(due, now)
+        interval = self.schedule.effective_interval
+        
+        if skipped:
+            logger.warning(f"{self.log_prefix}扫描超过计划时间，跳过 {skipped} 轮")
+        self.schedule_stretched = interval > self.interval_seconds
+        if self.schedule_stretched and not was_stretched:
+            logger.warning(f"{self.log_prefix}平均扫描耗时 {self.schedule.average_duration:.1f} 秒，"
+                           f"间隔临时拉长到 {interval:.1f} 秒")
+        elif was_stretched and not self.schedule_stretched:
+            logger.info(f"{self.log_prefix}扫描耗时恢复正常，间隔恢复为 {self.interval_seconds:.1f} 秒")
+        return next_due
+    
+    def monitor(self):
+        """开始监控"""
+        self.log_start()
         logger.info("按 Ctrl+C 停止监控\n")
         
+        # 固定节奏排程，扫描耗时不会累积成漂移
+        due = time.monotonic()
         while True:
-            try:
-                timestamp = self.format_timestamp()
-                stats = self.get_folder_stats(self.folder_path)
+            self.scan_once()
+            due = self.next_scan_time(due, time.monotonic())
+            time.sleep(max(0.0, due - time.monotonic()))
+
+
+class MultiFolderMonitor:
+    """
+    单进程监控多个根目录
+    
+    所有根目录由一个调度器按各自的间隔触发，扫描提交到共享的有界线程池，
+    同一时刻最多 max_concurrent_scans 个根目录在扫描；首次扫描按最短间隔错开，
+    避免重量级扫描同时开始争抢磁盘 I/O。上一次扫描尚未结束的根目录本轮跳过。
+    """
+    
+    def __init__(self, monitors: List[FolderMonitor], max_concurrent_scans: int = 2):
+        self.monitors = monitors
+        self.max_concurrent_scans = max_concurrent_scans
+        self.start_time = datetime.now()
+        self.stop_event = threading.Event()
+        setup_logging()
+        signal.signal(signal.SIGINT, self.signal_handler)
+        if hasattr(signal, 'SIGTERM'):
+            signal.signal(signal.SIGTERM, self.signal_handler)
+    
+    def signal_handler(self, sig, frame):
+        """处理退出信号：通知调度循环退出，由 monitor 负责收尾"""
+        self.stop_event.set()
+    
+    def initial_schedule(self, now: float) -> List[Tuple[float, int]]:
+        """按最短间隔均匀错开各根目录的首次扫描"""
+        step = min(m.interval_seconds for m in self.monitors) / len(self.monitors)
+        return [(now + index * step, index) for index in range(len(self.monitors))]
+    
+    def monitor(self):
+        """开始监控"""
+        for monitor in self.monitors:
+            monitor.log_start()
+        logger.info(f"共 {len(self.monitors)} 个根目录，最多同时扫描 {self.max_concurrent_scans} 个")
+        logger.info("按 Ctrl+C 停止监控\n")
+        
+        schedule = self.initial_schedule(time.monotonic())
+        heapq.heapify(schedule)
+        running: Dict[int, Future] = {}
+        
+        executor = ThreadPoolExecutor(max_workers=self.max_concurrent_scans, thread_name_prefix='root')
+        try:
+            while not self.stop_event.is_set():
+                due, index = schedule[0]
+                wait = due - time.monotonic()
+                if wait > 0:
+                    self.stop_event.wait(min(wait, 1.0))
+                    continue
                 
-                if stats is not None:
-                    current_size = stats['total_size']
-                    size_change = None
-                    
-                    if self.previous_size is not None:
-                        size_change = current_size - self.previous_size
-                    
-                    # 添加到历史记录
-                    self.add_size_record(current_size)
-                    
-                    # 计算增长率
-                    growth_stats = self.calculate_growth_rates(current_size)
-                    historical_growth = self.get_historical_growth(current_size)
-                    
-                    output = self.format_output(timestamp, stats, size_change, 
-                                              growth_stats, historical_growth)
-                    logger.info(output)
-                    
-                    self.previous_size = current_size
+                heapq.heappop(schedule)
+                monitor = self.monitors[index]
+                future = running.get(index)
+                if future is not None and not future.done():
+                    logger.warning(f"{monitor.log_prefix}上一次扫描尚未完成，跳过本轮")
                 else:
-                    logger.error(f"[{timestamp}] 错误：无法获取文件夹统计信息")
-                
-                time.sleep(self.interval_seconds)
+                    running[index] = executor.submit(monitor.scan_once)
                 
-            except Exception as e:
-                logger.error(f"[{self.format_timestamp()}] 监控过程中发生错误: {e}")
-                time.sleep(self.interval_seconds)
+                heapq.heappush(schedule, (monitor.next_scan_time(due, time.monotonic()), index))
+        finally:
+            executor.shutdown(wait=True, cancel_futures=True)
+            logger.info(f"\n[{datetime.now().strftime('%Y-%m-%d %H:%M:%S')}] 监控已停止")
+            logger.info(f"监控时长: {datetime.now() - self.start_time}")
+            for monitor in self.monitors:
+                monitor.print_summary()
+
+
+def load_config(config_path: str, defaults: Dict[str, Any]) -> Dict[str, Any]:
+    """
+    读取多目录监控配置（JSON）
+    
+    根级的 interval / workers / incremental / full_rescan_every / history_db 等
+    作为默认值，可在每个根目录条目中单独覆盖；未设置的沿用命令行参数。
+    """
+    with open(config_path, 'r', encoding='utf-8') as f:
+        config = json.load(f)
+    
+    roots = config.get('roots')
+    if not isinstance(roots, list) or not roots:
+        raise ValueError("配置文件缺少 roots 列表")
+    
+    shared = dict(defaults)
+    shared.update({key: config[key] for key in defaults if key in config})
+    
+    entries = []
+    for item in roots:
+        if isinstance(item, str):
+            item = {'path': item}
+        if 'path' not in item:
+            raise ValueError(f"根目录条目缺少 path: {item}")
+        entry = dict(shared)
+        entry.update({key: item[key] for key in defaults if key in item})
+        entry['path'] = item['path']
+        entry['name'] = item.get('name') or item['path']
+        entries.append(entry)
+    
+    names = [entry['name'] for entry in entries]
+    if len(set(names)) != len(names):
+        raise ValueError("根目录名称重复，请为同名目录设置不同的 name")
+    
+    return {
+        'max_concurrent_scans': config.get('max_concurrent_scans', 2),
+        # I/O 预算由所有根目录共享，只能在根级设置
+        'max_dirs_per_second': config.get('max_dirs_per_second'),
+        'max_stats_per_second': config.get('max_stats_per_second'),
+        'roots': entries,
+    }
+
+
+def validate_root(path: str, interval: float, workers: Optional[int], full_rescan_every: int,
+                  incremental: bool = False, breakdown_depth: Optional[int] = None, top_n: int = 5,
+                  max_duty: float = 0.5, approximate: bool = False, sample_size: int = 1000,
+                  exact_every: int = 60, allocated: bool = False) -> bool:
+    """验证单个根目录的配置"""
+    folder_path = Path(path)
+    
+    if not folder_path.exists():
+        print(f"错误：文件夹路径不存在: {folder_path}")
+        return False
+    
+    if not folder_path.is_dir():
+        print(f"错误：指定路径不是文件夹: {folder_path}")
+        return False
+    
+    if interval <= 0:
+        print("错误：监控间隔必须大于0")
+        return False
+    
+    if workers is not None and workers < 1:
+        print("错误：扫描线程数必须大于0")
+        return False
+    
+    if full_rescan_every < 0:
+        print("错误：全量扫描间隔不能为负数")
+        return False
+    
+    if not 0 < max_duty <= 1:
+        print("错误：扫描占用比例必须在 (0, 1] 之间")
+        return False
+    
+    if breakdown_depth is not None:
+        if breakdown_depth < 1:
+            print("错误：明细深度必须大于0")
+            return False
+        if top_n < 1:
+            print("错误：明细条目数必须大于0")
+            return False
+        if incremental:
+            print("错误：占用明细需要完整遍历，不能与增量扫描同时使用")
+            return False
+    
+    if approximate:
+        if sample_size < 1:
+            print("错误：抽样目录数必须大于0")
+            return False
+        if exact_every < 0:
+            print("错误：精确扫描间隔不能为负数")
+            return False
+        if incremental or breakdown_depth is not None:
+            print("错误：抽样估算不能与增量扫描或占用明细同时使用")
+            return False
+    
+    if allocated:
+        if not hasattr(os.stat(folder_path), 'st_blocks'):
+            print("错误：当前平台不提供 st_blocks，无法按磁盘占用统计")
+            return False
+        if incremental or approximate:
+            print("错误：磁盘占用统计需要完整遍历，不能与增量扫描或抽样估算同时使用")
+            return False
+    
+    if interval < 0.01:  # 优化最小间隔检查
+        print("警告：监控间隔过短可能影响系统性能")
+    
+    return True
+
 
 def parse_args():
     """解析命令行参数"""
@@ -380,12 +744,43 @@ def parse_args():
   指定监控间隔:
     python folder_monitor.py "D:\\Downloads" -i 0.5          # 30秒间隔
     python folder_monitor.py "D:\\Downloads" --interval 5    # 5分钟间隔
+  
+  千万级文件的目录树 (抽样估算，每小时精确校准一次):
+    python folder_monitor.py /mnt/archive --approximate --sample-size 2000 --exact-every 60
+  
+  限制对生产 NAS 的 I/O 压力:
+    python folder_monitor.py /mnt/nas --max-stats-per-second 2000 --max-dirs-per-second 200
+  
+  指标导出 (Prometheus 抓取 http://127.0.0.1:9108/metrics):
+    python folder_monitor.py /data/share --metrics-port 9108 --jsonl log/folder_metrics.jsonl
+  
+  占用明细 (两级目录，每类前 10 项):
+    python folder_monitor.py /data/share --breakdown-depth 2 --top-n 10
+  
+  多目录监控:
+    python folder_monitor.py --config roots.json
+  
+  配置文件示例 (根级字段为默认值，可在每个条目中覆盖):
+    {
+      "max_concurrent_scans": 2,
+      "interval": 1.0,
+      "roots": [
+        {"path": "/data/media", "name": "media", "interval": 5, "incremental": true},
+        {"path": "/data/downloads", "workers": 4}
+      ]
+    }
         """
     )
     
     parser.add_argument(
         "folder_path",
-        help="要监控的文件夹路径"
+        nargs="?",
+        help="要监控的文件夹路径（使用 --config 时省略）"
+    )
+    
+    parser.add_argument(
+        "-c", "--config",
+        help="多目录监控配置文件（JSON），一个进程按各自间隔监控多个根目录"
     )
     
     parser.add_argument(
@@ -395,43 +790,259 @@ def parse_args():
         help="监控间隔，单位分钟 (默认: 1.0)"
     )
     
+    parser.add_argument(
+        "-w", "--workers",
+        type=int,
+        default=None,
+        help="并行扫描线程数，1 表示单线程 (默认: 按 CPU 数自动选择)"
+    )
+    
+    parser.add_argument(
+        "--incremental",
+        action="store_true",
+        help="增量扫描：缓存每个目录的汇总，只重扫 mtime 变化或 inotify 报告变化的目录"
+    )
+    
+    parser.add_argument(
+        "--full-rescan-every",
+        type=int,
+        default=30,
+        help="增量模式下每隔多少次扫描做一次全量校准，0 表示从不 (默认: 30)"
+    )
+    
+    parser.add_argument(
+        "--history-db",
+        default=os.path.join('log', 'folder_history.db'),
+        help="持久化历史数据库路径，重启后恢复增长统计 (默认: log/folder_history.db)"
+    )
+    
+    parser.add_argument(
+        "--no-history",
+        action="store_true",
+        help="不持久化历史数据"
+    )
+    
+    parser.add_argument(
+        "--approximate",
+        action="store_true",
+        help="抽样估算：按分层随机抽样的目录估算总大小和文件数，并给出 95%% 置信区间"
+    )
+    
+    parser.add_argument(
+        "--sample-size",
+        type=int,
+        default=1000,
+        help="抽样估算每次读取的目录数 (默认: 1000)"
+    )
+    
+    parser.add_argument(
+        "--exact-every",
+        type=int,
+        default=60,
+        help="抽样估算模式下每隔多少次扫描做一次精确扫描校准，0 表示只在启动时做 (默认: 60)"
+    )
+    
+    parser.add_argument(
+        "--allocated",
+        action="store_true",
+        help="按实际分配的磁盘空间 (st_blocks) 统计并对硬链接去重，同时显示表观大小；"
+             "增长统计基于磁盘占用，历史记录与其他模式分开保存"
+    )
+    
+    parser.add_argument(
+        "--max-inodes",
+        type=int,
+        default=16 * 1024 * 1024,
+        help="硬链接去重最多登记的 inode 数，约 16 字节/个，超过后不再去重 (默认: 16777216)"
+    )
+    
+    parser.add_argument(
+        "--breakdown-depth",
+        type=int,
+        default=None,
+        help="输出占用明细：统计该深度以内各目录大小、最大文件/目录、扩展名，并报告增长最快的子树"
+    )
+    
+    parser.add_argument(
+        "--top-n",
+        type=int,
+        default=5,
+        help="占用明细每类显示的条目数 (默认: 5)"
+    )
+    
+    parser.add_argument(
+        "--max-duty",
+        type=float,
+        default=0.5,
+        help="扫描耗时占间隔的最大比例，平均耗时超过时自动拉长间隔；1 表示只在耗时超过间隔时拉长 (默认: 0.5)"
+    )
+    
+    parser.add_argument(
+        "--max-dirs-per-second",
+        type=float,
+        default=None,
+        help="I/O 限速：每秒最多读取的目录数，多目录模式下所有根目录共享"
+    )
+    
+    parser.add_argument(
+        "--max-stats-per-second",
+        type=float,
+        default=None,
+        help="I/O 限速：每秒最多 stat 的文件数，多目录模式下所有根目录共享"
+    )
+    
+    parser.add_argument(
+        "--metrics-port",
+        type=int,
+        default=None,
+        help="启动指标 HTTP 服务的端口，提供 /metrics (Prometheus) 和 /metrics.json"
+    )
+    
+    parser.add_argument(
+        "--metrics-host",
+        default="127.0.0.1",
+        help="指标服务监听地址 (默认: 127.0.0.1)"
+    )
+    
+    parser.add_argument(
+        "--jsonl",
+        default=None,
+        help="每次扫描结果追加写入的 JSON-lines 文件"
+    )
+    
     return parser.parse_args()
 
 
 
 def validate_args(args) -> bool:
     """验证命令行参数"""
-    folder_path = Path(args.folder_path)
-    
-    if not folder_path.exists():
-        print(f"错误：文件夹路径不存在: {folder_path}")
+    if args.config is None and args.folder_path is None:
+        print("错误：需要指定文件夹路径或 --config 配置文件")
         return False
     
-    if not folder_path.is_dir():
-        print(f"错误：指定路径不是文件夹: {folder_path}")
-        return False
+    if args.config is not None:
+        if args.folder_path is not None:
+            print("错误：文件夹路径和 --config 不能同时使用")
+            return False
+        if not Path(args.config).is_file():
+            print(f"错误：配置文件不存在: {args.config}")
+            return False
+        return True
     
-    if args.interval <= 0:
-        print("错误：监控间隔必须大于0")
-        return False
+    return validate_root(args.folder_path, args.interval, args.workers, args.full_rescan_every,
+                         args.incremental, args.breakdown_depth, args.top_n, args.max_duty,
+                         args.approximate, args.sample_size, args.exact_every, args.allocated)
+
+def create_io_budget(max_dirs_per_second: Optional[float],
+                     max_stats_per_second: Optional[float]) -> Optional[IOBudget]:
+    """两项限速都未设置时不创建预算"""
+    if max_dirs_per_second is None and max_stats_per_second is None:
+        return None
+    for rate in (max_dirs_per_second, max_stats_per_second):
+        if rate is not None and rate <= 0:
+            raise ValueError("I/O 限速必须大于0")
+    return IOBudget(max_dirs_per_second, max_stats_per_second)
+
+def create_multi_monitor(args, metrics: Optional[MetricsRegistry] = None,
+                         sink: Optional[JsonLinesSink] = None) -> MultiFolderMonitor:
+    """按配置文件创建多目录监控器，命令行参数作为各项配置的默认值"""
+    defaults = {
+        'interval': args.interval,
+        'workers': args.workers,
+        'incremental': args.incremental,
+        'full_rescan_every': args.full_rescan_every,
+        'history_db': None if args.no_history else args.history_db,
+        'breakdown_depth': args.breakdown_depth,
+        'top_n': args.top_n,
+        'max_duty': args.max_duty,
+        'approximate': args.approximate,
+        'sample_size': args.sample_size,
+        'exact_every': args.exact_every,
+        'allocated': args.allocated,
+        'max_inodes': args.max_inodes,
+    }
+    config = load_config(args.config, defaults)
     
-    if args.interval < 0.01:  # 优化最小间隔检查
-        print("警告：监控间隔过短可能影响系统性能")
+    if config['max_concurrent_scans'] < 1:
+        raise ValueError("max_concurrent_scans 必须大于0")
+    for entry in config['roots']:
+        if not validate_root(entry['path'], entry['interval'], entry['workers'], entry['full_rescan_every'],
+                             entry['incremental'], entry['breakdown_depth'], entry['top_n'], entry['max_duty'],
+                             entry['approximate'], entry['sample_size'], entry['exact_every'],
+                             entry['allocated']):
+            sys.exit(1)
     
-    return True
+    io_budget = create_io_budget(config['max_dirs_per_second'] or args.max_dirs_per_second,
+                                 config['max_stats_per_second'] or args.max_stats_per_second)
+    
+    monitors = [
+        FolderMonitor(
+            folder_path=entry['path'],
+            interval_minutes=entry['interval'],
+            scan_workers=entry['workers'],
+            incremental=entry['incremental'],
+            full_rescan_every=entry['full_rescan_every'],
+            history_db=entry['history_db'],
+            label=entry['name'],
+            standalone=False,
+            breakdown_depth=entry['breakdown_depth'],
+            top_n=entry['top_n'],
+            metrics=metrics,
+            sink=sink,
+            max_duty=entry['max_duty'],
+            io_budget=io_budget,
+            approximate=entry['approximate'],
+            sample_size=entry['sample_size'],
+            exact_every=entry['exact_every'],
+            allocated=entry['allocated'],
+            max_inodes=entry['max_inodes']
+        )
+        for entry in config['roots']
+    ]
+    return MultiFolderMonitor(monitors, max_concurrent_scans=config['max_concurrent_scans'])
 
 def main():
     """主函数"""
+    server = None
+    sink = None
     try:
         args = parse_args()
         
         if not validate_args(args):
             sys.exit(1)
         
+        # 指标服务只读取内存中最近一次扫描的结果
+        metrics = None
+        if args.metrics_port is not None:
+            metrics = MetricsRegistry()
+            server = MetricsServer(metrics, args.metrics_host, args.metrics_port)
+            server.start()
+        if args.jsonl is not None:
+            sink = JsonLinesSink(args.jsonl)
+        
+        if args.config is not None:
+            create_multi_monitor(args, metrics, sink).monitor()
+            return
+        
         # 创建监控器实例
         monitor = FolderMonitor(
             folder_path=args.folder_path,
-            interval_minutes=args.interval
+            interval_minutes=args.interval,
+            scan_workers=args.workers,
+            incremental=args.incremental,
+            full_rescan_every=args.full_rescan_every,
+            history_db=None if args.no_history else args.history_db,
+            breakdown_depth=args.breakdown_depth,
+            top_n=args.top_n,
+            metrics=metrics,
+            sink=sink,
+            max_duty=args.max_duty,
+            io_budget=create_io_budget(args.max_dirs_per_second, args.max_stats_per_second),
+            approximate=args.approximate,
+            sample_size=args.sample_size,
+            exact_every=args.exact_every,
+            allocated=args.allocated,
+            max_inodes=args.max_inodes
         )
         
         # 开始监控
@@ -442,6 +1053,11 @@ def main():
     except Exception as e:
         print(f"程序运行错误: {e}")
         sys.exit(1)
+    finally:
+        if server is not None:
+            server.close()
+        if sink is not None:
+            sink.close()
 
 if __name__ == "__main__":
     main()
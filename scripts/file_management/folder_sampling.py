@@ -0,0 +1,195 @@
+"""
+抽样估算文件夹体积
+
+面向千万级文件的目录树：每隔 exact_every 次做一次精确全量扫描，记录每个目录
+直接内容的大小、文件数和子目录数作为抽样框；其余时候只重新读取分层随机抽取的
+一部分目录，用差值估计量推算总量：
+
+    估计总量 = 上次精确值 + Σ N_h × (本层样本的平均变化量)
+
+目录按上次精确扫描的大小分层，样本量按各层字节数分配，变化集中的大目录层
+抽得更多。方差按分层抽样公式（含有限总体校正）计算，给出 95% 置信区间。
+
+注意：抽样框只包含上次精确扫描时存在的目录，此后新建的子目录要到下一次
+精确扫描才会计入；估算期间目录被删除时按变为 0 处理。
+"""
+
+import math
+import os
+import random
+import time
+from array import array
+from concurrent.futures import ThreadPoolExecutor
+from typing import Any, Dict, List, Optional, Tuple
+
+from loguru import logger
+
+from folder_incremental import read_directory, read_subtree
+from folder_throttle import IOBudget
+
+
+class SampledScanner:
+    """分层抽样估算 + 定期精确校准"""
+
+    STRATA = 8
+    # 95% 置信水平对应的正态分位数
+    Z = 1.96
+
+    def __init__(self, root, workers: Optional[int] = None, sample_size: int = 1000,
+                 exact_every: int = 60, budget: Optional[IOBudget] = None, seed: Optional[int] = None):
+        """
+        Args:
+            root: 要扫描的文件夹
+            workers: 读取目录的线程数
+            sample_size: 每次估算读取的目录数
+            exact_every: 每隔多少次扫描做一次精确全量扫描，0 表示只在首次扫描时做
+            budget: I/O 预算，None 表示不限速
+            seed: 随机数种子，便于复现
+        """
+        self.root = os.fspath(root)
+        self.workers = workers or min(32, (os.cpu_count() or 1) * 4)
+        self.sample_size = sample_size
+        self.exact_every = exact_every
+        self.budget = budget
+        self.random = random.Random(seed)
+        self.scan_count = 0
+
+        # 抽样框：按目录下标对齐的路径和直接内容
+        self._paths: List[str] = []
+        self._sizes = array('q')
+        self._files = array('q')
+        self._folders = array('q')
+        self._strata: List[List[int]] = []
+        self._allocation: List[int] = []
+        self._exact: Dict[str, int] = {}
+        self._exact_time = 0.0
+        self._largest: Tuple[int, str] = (0, '')
+        self._last_estimate: Optional[int] = None
+
+    # ---- 精确扫描 ----
+
+    def _exact_scan(self) -> Dict[str, Any]:
+        root_snapshot = read_directory(self.root, self.budget)
+        snapshots = {self.root: root_snapshot}
+        with ThreadPoolExecutor(max_workers=self.workers, thread_name_prefix='scan') as executor:
+            for part in executor.map(lambda path: read_subtree(path, self.budget), root_snapshot.subdirs):
+                snapshots.update(part)
+
+        self._paths = list(snapshots)
+        self._sizes = array('q', (snapshot.size for snapshot in snapshots.values()))
+        self._files = array('q', (snapshot.file_count for snapshot in snapshots.values()))
+        self._folders = array('q', (snapshot.folder_count for snapshot in snapshots.values()))
+        largest = max(snapshots.values(), key=lambda snapshot: snapshot.largest_size)
+        self._largest = (largest.largest_size, largest.largest_name)
+        self._exact = {
+            'total_size': sum(self._sizes),
+            'file_count': sum(self._files),
+            'folder_count': sum(self._folders),
+            'error_count': sum(snapshot.error_count for snapshot in snapshots.values()),
+        }
+        self._exact_time = time.time()
+        self._build_strata()
+
+        if self._last_estimate is not None and self._exact['total_size']:
+            error = (self._last_estimate - self._exact['total_size']) / self._exact['total_size']
+            logger.info(f"精确扫描校准：上次估算偏差 {error:+.2%}")
+        self._last_estimate = None
+
+        return self._result(dict(self._exact), 'exact', len(self._paths))
+
+    def _build_strata(self):
+        """按目录大小排序后等分为若干层"""
+        order = sorted(range(len(self._paths)), key=self._sizes.__getitem__)
+        count = min(self.STRATA, len(order))
+        self._strata = [order[len(order) * h // count:len(order) * (h + 1) // count] for h in range(count)]
+        self._allocation = self._allocate()
+
+    # ---- 抽样估算 ----
+
+    def _allocate(self) -> List[int]:
+        """样本量按各层字节数（加上目录数，避免空目录层分不到样本）分配，每层至少 2 个"""
+        weights = [sum(self._sizes[i] for i in stratum) + len(stratum) for stratum in self._strata]
+        total_weight = sum(weights)
+        return [
+            min(len(stratum), max(2, round(self.sample_size * weight / total_weight)))
+            for stratum, weight in zip(self._strata, weights)
+        ]
+
+    def _read_current(self, index: int) -> Tuple[int, int, int, int, str, int]:
+        """读取一个样本目录的当前直接内容：(大小, 文件数, 子目录数, 最大文件大小, 最大文件, 错误数)"""
+        path = self._paths[index]
+        try:
+            snapshot = read_directory(path, self.budget)
+        except FileNotFoundError:
+            return 0, 0, 0, 0, '', 0
+        except OSError as e:
+            logger.warning(f"无法读取文件夹 {path}: {e}")
+            # 无法读取时视为无变化
+            return self._sizes[index], self._files[index], self._folders[index], 0, '', 1
+        return (snapshot.size, snapshot.file_count, snapshot.folder_count,
+                snapshot.largest_size, snapshot.largest_name, snapshot.error_count)
+
+    def _sample_scan(self) -> Dict[str, Any]:
+        samples = [self.random.sample(stratum, n) for stratum, n in zip(self._strata, self._allocation)]
+        flat = [index for indices in samples for index in indices]
+        with ThreadPoolExecutor(max_workers=self.workers, thread_name_prefix='sample') as executor:
+            current = dict(zip(flat, executor.map(self._read_current, flat)))
+
+        baselines = (self._sizes, self._files, self._folders)
+        estimates = [0.0, 0.0, 0.0]
+        variances = [0.0, 0.0, 0.0]
+        for stratum, indices in zip(self._strata, samples):
+            population, n = len(stratum), len(indices)
+            correction = 1 - n / population
+            for k, baseline in enumerate(baselines):
+                deltas = [current[i][k] - baseline[i] for i in indices]
+                mean = sum(deltas) / n
+                estimates[k] += population * mean
+                if n > 1 and correction > 0:
+                    variance = sum((d - mean) ** 2 for d in deltas) / (n - 1)
+                    variances[k] += population * population * correction * variance / n
+
+        for item in current.values():
+            if item[3] > self._largest[0]:
+                self._largest = (item[3], item[4])
+
+        keys = ('total_size', 'file_count', 'folder_count')
+        stats = {key: max(0, round(self._exact[key] + estimate)) for key, estimate in zip(keys, estimates)}
+        stats['error_count'] = sum(item[5] for item in current.values())
+        margins = [self.Z * math.sqrt(variance) for variance in variances]
+        stats['estimate'] = {
+            'confidence': 0.95,
+            'size_low': max(0, round(stats['total_size'] - margins[0])),
+            'size_high': round(stats['total_size'] + margins[0]),
+            'files_low': max(0, round(stats['file_count'] - margins[1])),
+            'files_high': round(stats['file_count'] + margins[1]),
+            'sampled_dirs': len(flat),
+            'frame_dirs': len(self._paths),
+            'last_exact': self._exact_time,
+        }
+        self._last_estimate = stats['total_size']
+        return self._result(stats, 'sample', len(flat))
+
+    # ---- 对外接口 ----
+
+    def _result(self, stats: Dict[str, Any], mode: str, read_dirs: int) -> Dict[str, Any]:
+        largest_size, largest_path = self._largest
+        stats['largest_file'] = {
+            'name': os.path.relpath(largest_path, self.root) if largest_path else '',
+            'size': largest_size,
+        }
+        stats['scan_mode'] = mode
+        stats['rescanned_dirs'] = read_dirs
+        return stats
+
+    def scan(self) -> Dict[str, Any]:
+        """执行一次扫描，返回与 scan_folder 相同结构的统计字典；估算时附加 estimate 字段"""
+        exact = (not self._paths
+                 or (self.exact_every and self.scan_count % self.exact_every == 0))
+        self.scan_count += 1
+        return self._exact_scan() if exact else self._sample_scan()
+
+    def reset(self):
+        """丢弃抽样框，下次扫描重新精确扫描"""
+        self._paths = []
+        self.scan_count = 0
@@ -0,0 +1,204 @@
+"""
+基于 os.scandir 的文件夹扫描引擎
+
+复用 DirEntry 自带的类型信息，每个文件只做一次 stat；
+顶层子树分发到线程池并行扫描，适合大目录和网络共享盘。
+需要占用明细时在同一遍遍历中收集（见 folder_breakdown）。
+
+磁盘占用模式按 st_blocks 统计实际分配的空间（稀疏、压缩文件按真实占用计），
+符号链接不跟随，硬链接按 (设备, inode) 去重只计一次（见 folder_inodes）。
+"""
+
+import os
+from concurrent.futures import ThreadPoolExecutor
+from typing import Any, Dict, List, Optional
+
+from loguru import logger
+
+from folder_breakdown import UsageBreakdown
+from folder_inodes import InodeSet
+from folder_throttle import IOBudget
+
+
+class ScanTotals:
+    """单个子树的扫描累计值，可合并"""
+
+    __slots__ = ('total_size', 'file_count', 'folder_count', 'largest_path', 'largest_size', 'error_count',
+                 'breakdown', 'inodes', 'allocated_size', 'hardlinks_skipped')
+
+    def __init__(self, breakdown: Optional[UsageBreakdown] = None, inodes: Optional[InodeSet] = None):
+        self.total_size = 0
+        self.file_count = 0
+        self.folder_count = 0
+        self.largest_path = ''
+        self.largest_size = 0
+        self.error_count = 0
+        self.breakdown = breakdown
+        # 磁盘占用模式：所有线程共享同一个 inode 集合
+        self.inodes = inodes
+        self.allocated_size = 0
+        self.hardlinks_skipped = 0
+
+    def merge(self, other: 'ScanTotals'):
+        self.total_size += other.total_size
+        self.file_count += other.file_count
+        self.folder_count += other.folder_count
+        self.error_count += other.error_count
+        self.allocated_size += other.allocated_size
+        self.hardlinks_skipped += other.hardlinks_skipped
+        if other.largest_size > self.largest_size:
+            self.largest_size = other.largest_size
+            self.largest_path = other.largest_path
+        if self.breakdown is not None and other.breakdown is not None:
+            self.breakdown.merge(other.breakdown)
+
+
+def _scan_directory(path: str, totals: ScanTotals, budget: Optional[IOBudget] = None) -> List[str]:
+    """
+    扫描单个目录，累加文件信息并返回需要继续下钻的子目录
+
+    与 os.walk 保持一致：指向目录的符号链接计入文件夹数量但不进入；
+    其余条目都按文件计数，符号链接文件按目标大小统计。
+    budget 不为空时，读完目录后按本目录的 stat 次数扣减 I/O 预算。
+    磁盘占用模式下不跟随符号链接，重复出现的硬链接跳过。
+    """
+    subdirs = []
+    breakdown = totals.breakdown
+    inodes = totals.inodes
+    direct_size = direct_files = 0
+    stat_calls = 0
+    try:
+        with os.scandir(path) as entries:
+            for entry in entries:
+                try:
+                    if entry.is_dir():
+                        totals.folder_count += 1
+                        if not entry.is_symlink():
+                            subdirs.append(entry.path)
+                        continue
+
+                    totals.file_count += 1
+                    stat_calls += 1
+                    if inodes is None:
+                        file_size = entry.stat().st_size
+                    else:
+                        st = entry.stat(follow_symlinks=False)
+                        if st.st_nlink > 1 and not inodes.add(st.st_dev, st.st_ino):
+                            totals.hardlinks_skipped += 1
+                            continue
+                        file_size = st.st_size
+                        totals.allocated_size += st.st_blocks * 512
+                except FileNotFoundError:
+                    # 扫描期间被删除的文件或失效的符号链接，与原先 exists() 检查一致直接跳过
+                    continue
+                except OSError as e:
+                    totals.error_count += 1
+                    logger.warning(f"无法访问文件 {entry.path}: {e}")
+                    continue
+
+                totals.total_size += file_size
+                if file_size > totals.largest_size:
+                    totals.largest_size = file_size
+                    totals.largest_path = entry.path
+                if breakdown is not None:
+                    breakdown.add_file(entry.path, entry.name, file_size)
+                    direct_size += file_size
+                    direct_files += 1
+    except OSError as e:
+        totals.error_count += 1
+        logger.warning(f"无法读取文件夹 {path}: {e}")
+    if breakdown is not None:
+        breakdown.add_directory(path, direct_size, direct_files)
+    if budget is not None:
+        budget.charge(dirs=1, stats=stat_calls)
+    return subdirs
+
+
+def scan_subtree(path: str, breakdown: Optional[UsageBreakdown] = None,
+                 budget: Optional[IOBudget] = None, inodes: Optional[InodeSet] = None) -> ScanTotals:
+    """单线程深度优先扫描一个子树，breakdown 不为空时同时收集占用明细"""
+    totals = ScanTotals(breakdown, inodes)
+    stack = [path]
+    while stack:
+        stack.extend(_scan_directory(stack.pop(), totals, budget))
+    return totals
+
+
+def _split_top_levels(root: str, totals: ScanTotals, target: int, max_depth: int = 3,
+                      budget: Optional[IOBudget] = None) -> List[str]:
+    """
+    在主线程中按层展开根目录，直到子树数量足够分给线程池
+
+    只有一两个巨大顶层目录时继续向下拆分，避免单个线程拖慢整体。
+    """
+    # 根目录本身不可读时直接抛出，由调用方决定是否重试
+    with os.scandir(root):
+        pass
+
+    frontier = [root]
+    for _ in range(max_depth):
+        next_frontier = []
+        for path in frontier:
+            next_frontier.extend(_scan_directory(path, totals, budget))
+        frontier = next_frontier
+        if len(frontier) >= target or not frontier:
+            break
+    return frontier
+
+
+def scan_folder(root, workers: Optional[int] = None, breakdown_depth: Optional[int] = None,
+                top_n: int = 5, budget: Optional[IOBudget] = None,
+                allocated: bool = False, max_inodes: int = 16 * 1024 * 1024) -> Dict[str, Any]:
+    """
+    扫描文件夹，返回总大小、文件数量、文件夹数量和最大文件
+
+    Args:
+        root: 要扫描的文件夹
+        workers: 线程数，None 表示按 CPU 数自动选择，1 表示单线程
+        breakdown_depth: 收集占用明细时的目录深度，None 表示不收集
+        top_n: 明细中最大文件、最大目录和扩展名的条目数
+        budget: I/O 预算，None 表示不限速
+        allocated: 按实际分配的磁盘空间统计，并对硬链接去重（仅 POSIX）
+        max_inodes: 硬链接去重最多登记的 inode 数，超过后不再去重
+
+    Returns:
+        与 FolderMonitor.get_folder_stats 相同结构的统计字典；
+        收集明细时附加 breakdown 字段（见 UsageBreakdown.report）；
+        磁盘占用模式下 total_size 为磁盘占用，另附 apparent_size（表观大小）、
+        hardlinks_skipped 和 untracked_links
+    """
+    root = os.fspath(root)
+    if workers is None:
+        workers = min(32, (os.cpu_count() or 1) * 4)
+
+    def new_breakdown() -> Optional[UsageBreakdown]:
+        return None if breakdown_depth is None else UsageBreakdown(root, breakdown_depth, top_n)
+
+    inodes = InodeSet(max_inodes) if allocated else None
+    totals = ScanTotals(new_breakdown(), inodes)
+    if workers <= 1:
+        with os.scandir(root):
+            pass
+        totals.merge(scan_subtree(root, new_breakdown(), budget, inodes))
+    else:
+        subtrees = _split_top_levels(root, totals, target=workers * 4, budget=budget)
+        with ThreadPoolExecutor(max_workers=workers, thread_name_prefix='scan') as executor:
+            for partial in executor.map(lambda path: scan_subtree(path, new_breakdown(), budget, inodes), subtrees):
+                totals.merge(partial)
+
+    largest_name = os.path.relpath(totals.largest_path, root) if totals.largest_path else ''
+    stats = {
+        'total_size': totals.total_size,
+        'file_count': totals.file_count,
+        'folder_count': totals.folder_count,
+        'largest_file': {'name': largest_name, 'size': totals.largest_size},
+        'error_count': totals.error_count,
+    }
+    if totals.breakdown is not None:
+        stats['breakdown'] = totals.breakdown.report()
+    if inodes is not None:
+        stats['apparent_size'] = totals.total_size
+        stats['total_size'] = totals.allocated_size
+        stats['hardlinks_skipped'] = totals.hardlinks_skipped
+        stats['untracked_links'] = inodes.untracked
+    return stats
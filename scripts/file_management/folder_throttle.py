@@ -0,0 +1,95 @@
+"""
+扫描节奏控制
+
+AdaptiveSchedule 按固定节奏排程并记录扫描耗时：扫描超时错过的轮次直接跳过，
+平均耗时超过间隔的 max_duty 比例时自动拉长间隔，避免磁盘持续处于扫描状态。
+
+IOBudget 是线程安全的令牌桶，限制每秒读取的目录数和 stat 次数，
+扫描线程每读完一个目录扣减一次，超出预算时休眠等待。
+"""
+
+import math
+import threading
+import time
+from typing import Optional, Tuple
+
+
+class AdaptiveSchedule:
+    """根据扫描耗时自调整的排程"""
+
+    # 耗时的指数移动平均权重
+    SMOOTHING = 0.3
+
+    def __init__(self, interval_seconds: float, max_duty: float = 0.5):
+        """
+        Args:
+            interval_seconds: 配置的扫描间隔
+            max_duty: 扫描耗时占间隔的最大比例，超过时拉长间隔；1 表示只在耗时超过间隔时拉长
+        """
+        self.interval_seconds = interval_seconds
+        self.max_duty = max_duty
+        self.average_duration: Optional[float] = None
+        self.skipped = 0
+
+    def record(self, duration: float):
+        if self.average_duration is None:
+            self.average_duration = duration
+        else:
+            self.average_duration += self.SMOOTHING * (duration - self.average_duration)
+
+    @property
+    def effective_interval(self) -> float:
+        """当前使用的间隔：配置值，或按平均耗时拉长后的值"""
+        if self.average_duration is None:
+            return self.interval_seconds
+        return max(self.interval_seconds, self.average_duration / self.max_duty)
+
+    def next_due(self, due: float, now: float) -> Tuple[float, int]:
+        """
+        计算下一次扫描时间
+
+        Args:
+            due: 本次扫描的计划时间
+            now: 当前时间（与 due 使用同一时钟）
+
+        Returns:
+            (下一次计划时间, 因超时跳过的轮次数)
+        """
+        interval = self.effective_interval
+        next_due = due + interval
+        skipped = 0
+        if next_due <= now:
+            skipped = math.floor((now - next_due) / interval) + 1
+            next_due += skipped * interval
+        self.skipped += skipped
+        return next_due, skipped
+
+
+class IOBudget:
+    """限制每秒目录读取数和 stat 次数的令牌桶，可在多个扫描线程间共享"""
+
+    def __init__(self, dirs_per_second: Optional[float] = None, stats_per_second: Optional[float] = None):
+        self._lock = threading.Lock()
+        # 每种资源：[每秒速率, 当前令牌, 上次补充时间]，令牌上限为一秒的量
+        now = time.monotonic()
+        self._buckets = [
+            [rate, rate, now] for rate in (dirs_per_second, stats_per_second)
+        ]
+        self.throttled_seconds = 0.0
+
+    def charge(self, dirs: int = 0, stats: int = 0):
+        """扣减本次消耗，预算不足时阻塞到令牌补足为止"""
+        wait = 0.0
+        with self._lock:
+            now = time.monotonic()
+            for bucket, amount in zip(self._buckets, (dirs, stats)):
+                rate = bucket[0]
+                if rate is None or not amount:
+                    continue
+                bucket[1] = min(rate, bucket[1] + (now - bucket[2]) * rate) - amount
+                bucket[2] = now
+                if bucket[1] < 0:
+                    wait = max(wait, -bucket[1] / rate)
+            self.throttled_seconds += wait
+        if wait > 0:
+            time.sleep(wait)
@@ -0,0 +1,355 @@
+"""
+图片感知哈希与近似重复查找
+
+- 解码：Pillow 的 draft 模式让 JPEG 在解码阶段直接按 1/2~1/8 缩小（DCT 缩放），
+  不解出全尺寸像素；解码在线程池中进行（Pillow 解码时释放 GIL）
+- 哈希：缩小后的灰度图堆叠成 (N, 32, 32) 数组，用 NumPy 批量计算 64 位 pHash
+  （二维 DCT 取左上 8×8 低频系数，与中位数比较）或 dHash（9×8 相邻像素差）
+- 索引：哈希按文件标识 (设备, inode) 和 (大小, mtime) 持久化在 SQLite 中，文件未变化时不再解码；
+  重命名不改变 inode 和 mtime，改名后的图片仍能命中，记录的路径随之更新
+- 查询：多索引哈希。64 位哈希分成 4 段 16 位，汉明距离 ≤ r 的两个哈希至少有一段
+  相差不超过 r // 4 位（抽屉原理），只需在每段的有序数组里查找完全相同或翻转少数位的键，
+  候选对再批量计算真实距离，不做两两比较
+"""
+
+import os
+import sqlite3
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from itertools import combinations
+from typing import Iterable, List, Optional, Tuple
+
+import numpy as np
+
+try:
+    from PIL import Image
+except ImportError:  # 只有计算新哈希时才需要 Pillow
+    Image = None
+
+
+PHASH_SIZE = 32
+HASH_BITS = 64
+
+
+def _dct_matrix(n: int) -> np.ndarray:
+    """正交 DCT-II 矩阵，对 (N, n, n) 数组做 D @ X @ D.T 即为批量二维 DCT"""
+    k = np.arange(n)[:, None]
+    x = np.arange(n)[None, :]
+    matrix = np.sqrt(2.0 / n) * np.cos(np.pi * (2 * x + 1) * k / (2 * n))
+    matrix[0] /= np.sqrt(2.0)
+    return matrix.astype(np.float32)
+
+
+_DCT = _dct_matrix(PHASH_SIZE)
+
+
+def _pack_bits(bits: np.ndarray) -> np.ndarray:
+    """(N, 64) 布尔数组按行打包为 uint64，第一位为最高位"""
+    packed = np.packbits(bits.reshape(len(bits), HASH_BITS), axis=1)
+    return packed.view('>u8').ravel().astype(np.uint64)
+
+
+def phash_batch(pixels: np.ndarray) -> np.ndarray:
+    """(N, 32, 32) 灰度数组 -> N 个 64 位 pHash"""
+    coefficients = _DCT @ pixels.astype(np.float32) @ _DCT.T
+    low = coefficients[:, :8, :8].reshape(len(pixels), 64)
+    return _pack_bits(low > np.median(low, axis=1, keepdims=True))
+
+
+def dhash_batch(pixels: np.ndarray) -> np.ndarray:
+    """(N, 8, 9) 灰度数组 -> N 个 64 位 dHash"""
+    return _pack_bits(pixels[:, :, 1:] > pixels[:, :, :-1])
+
+
+if hasattr(np, 'bitwise_count'):
+    def popcount(values: np.ndarray) -> np.ndarray:
+        return np.bitwise_count(values)
+else:
+    _BYTE_COUNTS = np.array([bin(i).count('1') for i in range(256)], dtype=np.uint8)
+
+    def popcount(values: np.ndarray) -> np.ndarray:
+        as_bytes = np.ascontiguousarray(values, dtype=np.uint64).view(np.uint8).reshape(-1, 8)
+        return _BYTE_COUNTS[as_bytes].sum(axis=1, dtype=np.uint8).reshape(np.shape(values))
+
+
+def load_gray(path: str, size: Tuple[int, int]) -> np.ndarray:
+    """按目标尺寸缩小解码为灰度数组，size 为 (宽, 高)"""
+    with Image.open(path) as image:
+        # JPEG 解码时直接缩小到不小于 4 倍目标尺寸，其他格式忽略
+        image.draft('L', (size[0] * 4, size[1] * 4))
+        image = image.convert('L').resize(size, Image.Resampling.LANCZOS)
+        return np.asarray(image, dtype=np.float32)
+
+
+class MultiIndexHash:
+    """64 位哈希的多索引结构，用于按汉明距离查找近似重复"""
+
+    CHUNKS = 4
+    CHUNK_BITS = HASH_BITS // CHUNKS
+
+    def __init__(self, hashes: np.ndarray):
+        self.hashes = np.ascontiguousarray(hashes, dtype=np.uint64)
+        mask = np.uint64((1 << self.CHUNK_BITS) - 1)
+        self._orders = []
+        self._keys = []
+        for chunk in range(self.CHUNKS):
+            keys = ((self.hashes >> np.uint64(chunk * self.CHUNK_BITS)) & mask).astype(np.uint32)
+            order = np.argsort(keys, kind='stable')
+            self._orders.append(order)
+            self._keys.append(keys[order])
+
+    def _flip_masks(self, threshold: int) -> List[int]:
+        """每段需要探测的位翻转组合：翻转位数不超过 threshold // CHUNKS"""
+        radius = threshold // self.CHUNKS
+        masks = []
+        for flips in range(radius + 1):
+            for bits in combinations(range(self.CHUNK_BITS), flips):
+                masks.append(sum(1 << bit for bit in bits))
+        return masks
+
+    def query(self, value: int, threshold: int) -> np.ndarray:
+        """返回与 value 的汉明距离不超过 threshold 的下标"""
+        found = []
+        for chunk in range(self.CHUNKS):
+            key = (value >> (chunk * self.CHUNK_BITS)) & ((1 << self.CHUNK_BITS) - 1)
+            keys = self._keys[chunk]
+            for flip in self._flip_masks(threshold):
+                # 用与键相同的类型查找，避免整个键数组被转换
+                probe = np.uint32(key ^ flip)
+                left = np.searchsorted(keys, probe, 'left')
+                right = np.searchsorted(keys, probe, 'right')
+                found.append(self._orders[chunk][left:right])
+        if not found:
+            return np.empty(0, dtype=np.int64)
+        candidates = np.unique(np.concatenate(found))
+        distances = popcount(self.hashes[candidates] ^ np.uint64(value))
+        return candidates[distances <= threshold]
+
+    def pairs(self, threshold: int, block: int = 1 << 18) -> Tuple[np.ndarray, np.ndarray, np.ndarray]:
+        """
+        找出所有汉明距离不超过 threshold 的下标对
+
+        Returns:
+            (i, j, 距离)，i < j，每对只出现一次
+        """
+        count = len(self.hashes)
+        found = []
+        for chunk in range(self.CHUNKS):
+            order, keys = self._orders[chunk], self._keys[chunk]
+            # 按排序后的位置处理，探测结果同样落在有序数组上
+            for flip in self._flip_masks(threshold):
+                for start in range(0, count, block):
+                    probe = keys[start:start + block] ^ np.uint32(flip)
+                    left = np.searchsorted(keys, probe, 'left')
+                    right = np.searchsorted(keys, probe, 'right')
+                    counts = right - left
+                    total = int(counts.sum())
+                    if total == 0:
+                        continue
+                    # 展开每个探测命中的区间 [left, right)
+                    sources = np.repeat(np.arange(start, start + len(probe)), counts)
+                    offsets = np.arange(total) - np.repeat(np.cumsum(counts) - counts, counts)
+                    targets = np.repeat(left, counts) + offsets
+                    i, j = order[sources], order[targets]
+                    keep = i < j
+                    i, j = i[keep], j[keep]
+                    distances = popcount(self.hashes[i] ^ self.hashes[j])
+                    close = distances <= threshold
+                    found.append(i[close].astype(np.int64) * count + j[close])
+        if not found:
+            empty = np.empty(0, dtype=np.int64)
+            return empty, empty, empty
+        combined = np.unique(np.concatenate(found))
+        i, j = combined // count, combined % count
+        return i, j, popcount(self.hashes[i] ^ self.hashes[j]).astype(np.int64)
+
+
+def group_pairs(count: int, i: np.ndarray, j: np.ndarray) -> List[List[int]]:
+    """把相似对合并为连通分量，返回至少含两个元素的组"""
+    parent = list(range(count))
+
+    def find(x: int) -> int:
+        while parent[x] != x:
+            parent[x] = parent[parent[x]]
+            x = parent[x]
+        return x
+
+    for a, b in zip(i.tolist(), j.tolist()):
+        root_a, root_b = find(a), find(b)
+        if root_a != root_b:
+            parent[max(root_a, root_b)] = min(root_a, root_b)
+
+    groups = {}
+    for index in set(i.tolist()) | set(j.tolist()):
+        groups.setdefault(find(index), []).append(index)
+    return [sorted(group) for group in groups.values()]
+
+
+class ImageHashIndex:
+    """按 (设备, inode, 大小, mtime) 持久化的感知哈希索引"""
+
+    METHODS = ('phash', 'dhash')
+
+    def __init__(self, db_path: str, method: str = 'phash', workers: int = 8, batch_size: int = 256):
+        """
+        Args:
+            db_path: SQLite 数据库路径
+            method: phash 或 dhash，两种哈希分表保存
+            workers: 解码图片的线程数
+            batch_size: 每批解码、计算哈希的图片数
+        """
+        if method not in self.METHODS:
+            raise ValueError(f"不支持的哈希方法: {method}")
+        os.makedirs(os.path.dirname(os.path.abspath(db_path)), exist_ok=True)
+        self.method = method
+        self.workers = workers
+        self.batch_size = batch_size
+        self.table = f"image_{method}"
+        self._lock = threading.Lock()
+        self._conn = sqlite3.connect(db_path, check_same_thread=False)
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.execute("PRAGMA synchronous=NORMAL")
+        columns = {row[1] for row in self._conn.execute(f"PRAGMA table_info({self.table})")}
+        if columns and 'ino' not in columns:
+            # 旧版按路径索引的表，只是缓存，直接重建
+            self._conn.execute(f"DROP TABLE {self.table}")
+        self._conn.execute(f"""
+            CREATE TABLE IF NOT EXISTS {self.table} (
+                dev INTEGER NOT NULL,
+                ino INTEGER NOT NULL,
+                path TEXT NOT NULL,
+                size INTEGER NOT NULL,
+                mtime_ns INTEGER NOT NULL,
+                hash INTEGER,
+                PRIMARY KEY (dev, ino)
+            )
+        """)
+        self._conn.commit()
+        self.stats = {'cached': 0, 'hashed': 0, 'errors': 0, 'moved': 0, 'pruned': 0}
+
+    def _decode(self, path: str) -> Optional[np.ndarray]:
+        size = (PHASH_SIZE, PHASH_SIZE) if self.method == 'phash' else (9, 8)
+        try:
+            return load_gray(path, size)
+        except Exception:
+            # 无法解码（损坏、格式不支持）的图片不参与比较
+            return None
+
+    def _hash_batch(self, pixels: List[np.ndarray]) -> np.ndarray:
+        stacked = np.stack(pixels)
+        return phash_batch(stacked) if self.method == 'phash' else dhash_batch(stacked)
+
+    def update(self, paths: Iterable[str]) -> Tuple[np.ndarray, List[str]]:
+        """
+        确保给定图片都有哈希，只解码新增或变化的文件
+
+        改名或移动过的文件按 inode 命中并更新记录的路径；
+        本次没有命中、记录的路径也已不存在的行会被删除。
+
+        Returns:
+            (哈希数组, 对应的路径列表)，无法读取或解码的图片不包含在内
+        """
+        paths = list(paths)
+        with ThreadPoolExecutor(max_workers=self.workers, thread_name_prefix='phash') as executor:
+            stats = list(executor.map(_safe_stat, paths))
+            with self._lock:
+                cached = {(row[0], row[1]): row[2:] for row in self._conn.execute(
+                    f"SELECT dev, ino, path, size, mtime_ns, hash FROM {self.table}")}
+
+            results: List[Tuple[str, int]] = []
+            missing: List[Tuple[int, int, str, int, int]] = []
+            moved: List[Tuple[str, int, int]] = []
+            seen = set()
+            for path, st in zip(paths, stats):
+                if st is None:
+                    self.stats['errors'] += 1
+                    continue
+                key = st[:2]
+                seen.add(key)
+                row = cached.get(key)
+                if row is not None and row[1] == st[2] and row[2] == st[3]:
+                    self.stats['cached'] += 1
+                    if row[0] != path:
+                        moved.append((path,) + key)
+                    if row[3] is not None:
+                        results.append((path, row[3]))
+                else:
+                    missing.append(key + (path,) + st[2:])
+
+            # 命中但路径变了（例如上次运行后被重命名）的记录跟随新路径；
+            # 没有命中、原路径也已不存在的记录删除
+            stale = [key for key, row in cached.items() if key not in seen and not os.path.lexists(row[0])]
+            with self._lock:
+                self._conn.executemany(f"UPDATE {self.table} SET path = ? WHERE dev = ? AND ino = ?", moved)
+                self._conn.executemany(f"DELETE FROM {self.table} WHERE dev = ? AND ino = ?", stale)
+                self._conn.commit()
+            self.stats['moved'] += len(moved)
+            self.stats['pruned'] += len(stale)
+
+            if missing and Image is None:
+                raise RuntimeError("计算感知哈希需要安装 Pillow: pip install pillow")
+            for start in range(0, len(missing), self.batch_size):
+                batch = missing[start:start + self.batch_size]
+                decoded = list(executor.map(self._decode, [item[2] for item in batch]))
+                valid = [index for index, pixels in enumerate(decoded) if pixels is not None]
+                hashes = self._hash_batch([decoded[index] for index in valid]) if valid else []
+                signed = {batch[index][2]: int(value) for index, value in
+                          zip(valid, np.asarray(hashes, dtype=np.uint64).view(np.int64))}
+                rows = [item + (signed.get(item[2]),) for item in batch]
+                with self._lock:
+                    self._conn.executemany(
+                        f"INSERT OR REPLACE INTO {self.table} (dev, ino, path, size, mtime_ns, hash) "
+                        f"VALUES (?, ?, ?, ?, ?, ?)", rows)
+                    self._conn.commit()
+                self.stats['hashed'] += len(valid)
+                self.stats['errors'] += len(batch) - len(valid)
+                results.extend(signed.items())
+
+        result_paths = [path for path, _ in results]
+        hashes = np.array([value for _, value in results], dtype=np.int64).view(np.uint64)
+        return hashes, result_paths
+
+    def close(self):
+        with self._lock:
+            self._conn.close()
+
+
+def _as_int64(value: int) -> int:
+    """SQLite 整数是有符号 64 位，超出范围的 inode 按补码存放"""
+    return value - (1 << 64) if value >= 1 << 63 else value
+
+
+def _safe_stat(path: str) -> Optional[Tuple[int, int, int, int]]:
+    """(设备, inode, 大小, mtime_ns)，无法访问时返回 None"""
+    try:
+        st = os.stat(path)
+    except OSError:
+        return None
+    return _as_int64(st.st_dev), _as_int64(st.st_ino), st.st_size, st.st_mtime_ns
+
+
+def find_similar(paths: List[str], hashes: np.ndarray, threshold: int) -> List[List[Tuple[str, int]]]:
+    """
+    按汉明距离把图片分组
+
+    相似关系不传递（A~B、B~C 时 A 与 C 可能相差很远），连通分量只作为候选：
+    分量内按路径排序，第一张作为保留图，与它的距离不超过 threshold 的归为一组，
+    其余的再以剩下的第一张为保留图继续分组。
+
+    Returns:
+        每组为 [(路径, 与组内第一张的距离), ...]，组内按路径排序，距离都不超过 threshold
+    """
+    index = MultiIndexHash(hashes)
+    i, j, _ = index.pairs(threshold)
+    groups = []
+    for members in group_pairs(len(paths), i, j):
+        remaining = np.array(sorted(members, key=lambda member: paths[member]))
+        while len(remaining) > 1:
+            distances = popcount(hashes[remaining] ^ hashes[remaining[0]])
+            close = distances <= threshold
+            if close.sum() > 1:
+                groups.append([(paths[member], int(distance))
+                               for member, distance in zip(remaining[close], distances[close])])
+            remaining = remaining[~close]
+    groups.sort(key=lambda group: group[0][0])
+    return groups
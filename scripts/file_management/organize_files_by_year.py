@@ -1,14 +1,42 @@
 import argparse
 import os
-import shutil
 import sys
+import threading
+from collections import deque
+from concurrent.futures import Future, ThreadPoolExecutor
 from datetime import datetime
+from functools import partial
 from pathlib import Path
-from typing import Dict, List, Tuple
+from typing import Deque, Dict, Iterator, List, NamedTuple, Optional, Tuple
 from loguru import logger
 
+from capture_date import CaptureDateCache
+from file_dedupe import DuplicateFinder
+from file_journal import OperationJournal, load_journal, recover, undo_journal
+from file_transfer import TransferEngine
+
+
+class FileRecord(NamedTuple):
+    """扫描阶段得到的文件信息，整个流程只 stat 一次"""
+    path: str
+    name: str
+    year: int
+    size: int
+
+
 class FileOrganizerByYear:
-    def __init__(self, source_folder: str, dry_run: bool = False, use_creation_date: bool = False):
+    # 每个移动任务处理的文件数
+    MOVE_BATCH_SIZE = 256
+    # 递归模式下每累计多少个文件分发一次移动任务
+    STREAM_BATCH_SIZE = 1000
+    # 重复文件的处理方式：跳过不移动 / 移动后替换为硬链接 / 只记录
+    DEDUPE_MODES = ('skip', 'hardlink', 'report')
+    
+    def __init__(self, source_folder: str, dry_run: bool = False, use_creation_date: bool = False,
+                 workers: int = 8, recursive: bool = False, capture_date: bool = False,
+                 date_cache: Optional[str] = None, dedupe: Optional[str] = None,
+                 target_folder: Optional[str] = None, copy_workers: int = 4, verify: bool = False,
+                 journal: Optional[str] = None):
         """
         初始化文件整理器
         
@@ -16,19 +44,64 @@ class FileOrganizerByYear:
             source_folder: 源文件夹路径
             dry_run: 是否为试运行模式（不实际移动文件）
             use_creation_date: 是否使用文件创建时间而非修改时间
+            workers: 并行移动文件的线程数
+            recursive: 是否递归整理子文件夹中的文件（流式处理，边扫描边移动）
+            capture_date: 是否优先使用拍摄时间（EXIF、视频头、文件名），取不到时回退到文件时间
+            date_cache: 拍摄时间缓存数据库路径，默认放在日志目录下
+            dedupe: 重复文件处理方式（skip / hardlink / report），None 表示不查重；
+                需要完整的文件列表，不能与递归模式同时使用
+            target_folder: 年份文件夹所在的目录，默认为源文件夹；可以位于其他磁盘
+            copy_workers: 跨设备移动时同时复制的文件数
+            verify: 跨设备复制后是否校验哈希再删除源文件
+            journal: 操作日志路径，中断后用同一路径重新运行会先恢复未完成的操作，也可用于撤销
         """
+        if dedupe is not None and dedupe not in self.DEDUPE_MODES:
+            raise ValueError(f"不支持的去重方式: {dedupe}")
+        if dedupe is not None and recursive:
+            raise ValueError("去重需要完整的文件列表，不能与递归流式模式同时使用")
         self.source_folder = Path(source_folder).resolve()
+        self.target_folder = Path(target_folder).resolve() if target_folder else self.source_folder
         self.dry_run = dry_run
         self.use_creation_date = use_creation_date
+        self.workers = workers
+        self.recursive = recursive
         self.stats = {
             'total_files': 0,
             'moved_files': 0,
             'skipped_files': 0,
             'error_files': 0,
-            'created_folders': 0
+            'created_folders': 0,
+            'capture_dates': 0,
+            'duplicate_files': 0
         }
         self.year_folders = {}
+        # 多线程移动时保护统计计数和目标文件名分配
+        self._stats_lock = threading.Lock()
+        self._folder_paths: Dict[Path, str] = {}
+        self._folder_locks: Dict[Path, threading.Lock] = {}
+        # 每个目标文件夹的文件名索引：已有文件名，以及冲突时下一个尝试的数字后缀
+        self._folder_names: Dict[Path, set] = {}
+        self._next_suffix: Dict[Path, Dict[str, int]] = {}
         self.setup_logging()
+        self.capture_date = capture_date
+        self.dedupe = dedupe
+        self.transfer = TransferEngine(max_parallel=copy_workers, verify=verify)
+        # 目标在其他设备上时每次移动都是一次复制，按文件提交任务，
+        # 否则一个批次在单个线程中串行复制，copy_workers 不起作用
+        self.cross_device = self._on_other_device(self.target_folder)
+        self.move_workers = max(workers, copy_workers) if self.cross_device else workers
+        self.journal_path = journal
+        self.journal: Optional[OperationJournal] = None
+        # 硬链接去重时记录每个文件移动后的路径
+        self._destinations: Optional[Dict[str, str]] = {} if dedupe == 'hardlink' else None
+        self.date_cache: Optional[CaptureDateCache] = None
+        if capture_date:
+            self.date_cache = CaptureDateCache(date_cache or str(self.log_dir / 'capture_dates.db'))
+    
+    @property
+    def date_mode(self) -> str:
+        file_time = '创建时间' if self.use_creation_date else '修改时间'
+        return f"拍摄时间（取不到时用{file_time}）" if self.capture_date else file_time
     
     def setup_logging(self, log_dir='log'):
         """设置日志配置"""
@@ -38,6 +111,9 @@ class FileOrganizerByYear:
         if not os.path.exists(log_dir):
             os.makedirs(log_dir)
         
+        # 递归整理时跳过日志目录，避免移动正在写入的日志
+        self.log_dir = Path(log_dir).resolve()
+        
         log_file = os.path.join(log_dir, 'organize_files_{time:YYYY-MM-DD}.log')
         
         # 添加日志记录器，按天滚动，并保留30天的日志
@@ -78,19 +154,129 @@ class FileOrganizerByYear:
             文件的年份
         """
         try:
-            if self.use_creation_date:
-                # 使用创建时间
-                timestamp = file_path.stat().st_ctime
-            else:
-                # 使用修改时间
-                timestamp = file_path.stat().st_mtime
-            
-            return datetime.fromtimestamp(timestamp).year
+            return self.year_from_stat(file_path.stat())
         except Exception as e:
             logger.warning(f"无法获取文件时间 {file_path}: {e}")
             # 如果无法获取时间，使用当前年份
             return datetime.now().year
     
+    def year_from_stat(self, st: os.stat_result) -> int:
+        """根据已有的 stat 结果确定年份，不再访问文件系统"""
+        if self.use_creation_date:
+            # 使用创建时间
+            timestamp = st.st_ctime
+        else:
+            # 使用修改时间
+            timestamp = st.st_mtime
+        
+        return datetime.fromtimestamp(timestamp).year
+    
+    def year_from_capture(self, path: str, st: os.stat_result) -> Optional[int]:
+        """从缓存或文件头读取拍摄时间的年份，取不到时返回 None"""
+        captured, source = self.date_cache.lookup(path, st.st_size, st.st_mtime_ns)
+        if captured is None:
+            return None
+        self.stats['capture_dates'] += 1
+        logger.debug(f"拍摄时间 {path}: {captured:%Y-%m-%d %H:%M:%S} ({source})")
+        return captured.year
+    
+    def scan_files(self) -> List[FileRecord]:
+        """
+        用 os.scandir 扫描源文件夹顶层的文件，每个文件只 stat 一次
+        
+        Returns:
+            文件信息列表
+        """
+        records = []
+        with os.scandir(self.source_folder) as entries:
+            for entry in entries:
+                record = self._file_record(entry)
+                if record is not None:
+                    records.append(record)
+        return records
+    
+    def _file_record(self, entry: os.DirEntry):
+        """为单个目录项生成 FileRecord，非文件或无法访问时返回 None"""
+        try:
+            if not entry.is_file():
+                return None
+            st = entry.stat()
+        except OSError as e:
+            logger.warning(f"无法获取文件信息 {entry.path}: {e}")
+            self._count('error_files')
+            return None
+        
+        try:
+            year = self.year_from_capture(entry.path, st) if self.capture_date else None
+            if year is None:
+                year = self.year_from_stat(st)
+        except (OverflowError, OSError, ValueError) as e:
+            logger.warning(f"无法获取文件时间 {entry.path}: {e}")
+            # 如果无法获取时间，使用当前年份
+            year = datetime.now().year
+        
+        return FileRecord(entry.path, entry.name, year, st.st_size)
+    
+    def iter_files_recursive(self) -> Iterator[FileRecord]:
+        """
+        递归遍历源文件夹，边读取目录边逐个产出文件
+        
+        内存中只保留待访问的目录路径。不进入源文件夹下的年份文件夹（整理目标）、
+        日志目录和指向目录的符号链接。
+        """
+        stack = [str(self.source_folder)]
+        while stack:
+            directory = stack.pop()
+            try:
+                with os.scandir(directory) as entries:
+                    for entry in entries:
+                        try:
+                            is_dir = entry.is_dir(follow_symlinks=False)
+                        except OSError:
+                            is_dir = False
+                        if is_dir:
+                            if not self._is_excluded_dir(directory, entry):
+                                stack.append(entry.path)
+                            continue
+                        record = self._file_record(entry)
+                        if record is not None:
+                            yield record
+            except OSError as e:
+                logger.error(f"无法读取文件夹 {directory}: {e}")
+                self._count('error_files')
+    
+    def _is_excluded_dir(self, parent: str, entry: os.DirEntry) -> bool:
+        if parent == str(self.target_folder) and len(entry.name) == 4 and entry.name.isdigit():
+            return True
+        return entry.path in (str(self.log_dir), str(self.target_folder))
+    
+    def _in_year_folder(self, directory: str, year: int) -> bool:
+        """文件所在目录是否就是它应去的年份文件夹"""
+        if directory == os.path.join(str(self.target_folder), str(year)):
+            return True
+        # 与非递归模式一致：源文件夹本身就是该年份的文件夹
+        return (self.target_folder == self.source_folder and directory == str(self.source_folder)
+                and self.source_folder.name == str(year))
+    
+    def _on_other_device(self, path: Path) -> bool:
+        """path（不存在时取最近的已存在上级目录）是否与源文件夹位于不同设备"""
+        while not path.exists() and path.parent != path:
+            path = path.parent
+        try:
+            return path.stat().st_dev != self.source_folder.stat().st_dev
+        except OSError:
+            return False
+    
+    def _batches(self, group: List[FileRecord]) -> Iterator[List[FileRecord]]:
+        """把同一年份的文件切分为移动任务；跨设备时每个文件一个任务"""
+        size = 1 if self.cross_device else self.MOVE_BATCH_SIZE
+        for start in range(0, len(group), size):
+            yield group[start:start + size]
+    
+    def _count(self, key: str, amount: int = 1):
+        with self._stats_lock:
+            self.stats[key] += amount
+    
     def create_year_folder(self, year: int) -> Path:
         """
         创建年份文件夹
@@ -101,13 +287,13 @@ class FileOrganizerByYear:
         Returns:
             年份文件夹路径
         """
-        year_folder = self.source_folder / str(year)
+        year_folder = self.target_folder / str(year)
         
         if year not in self.year_folders:
             if not year_folder.exists():
                 if not self.dry_run:
                     try:
-                        year_folder.mkdir(exist_ok=True)
+                        year_folder.mkdir(parents=True, exist_ok=True)
                         logger.info(f"创建年份文件夹: {year_folder}")
                         self.stats['created_folders'] += 1
                     except Exception as e:
@@ -118,9 +304,22 @@ class FileOrganizerByYear:
                     self.stats['created_folders'] += 1
             
             self.year_folders[year] = year_folder
+            self._folder_paths[year_folder] = str(year_folder)
+            self._folder_locks[year_folder] = threading.Lock()
+            self._folder_names[year_folder] = self._index_folder(year_folder)
+            self._next_suffix[year_folder] = {}
         
         return self.year_folders[year]
     
+    def _index_folder(self, year_folder: Path) -> set:
+        """用一次 scandir 读取目标文件夹中已有的文件名"""
+        try:
+            with os.scandir(year_folder) as entries:
+                return {entry.name for entry in entries}
+        except FileNotFoundError:
+            # 试运行时文件夹尚未创建
+            return set()
+    
     def move_file(self, file_path: Path, year_folder: Path) -> bool:
         """
         移动文件到年份文件夹
@@ -132,35 +331,168 @@ class FileOrganizerByYear:
         Returns:
             是否移动成功
         """
-        destination = year_folder / file_path.name
-        
-        # 处理文件名冲突
-        counter = 1
-        original_destination = destination
-        while destination.exists():
-            name_parts = file_path.stem, counter, file_path.suffix
-            destination = year_folder / f"{name_parts[0]}_{name_parts[1]}{name_parts[2]}"
-            counter += 1
+        return self._move(str(file_path), file_path.name, year_folder)
+    
+    def _move(self, source: str, name: str, year_folder: Path, destination_name: Optional[str] = None,
+              op_id: Optional[int] = None) -> bool:
+        """move_file 的实现，热路径上只使用字符串路径，避免逐个构造 Path"""
+        if destination_name is None:
+            destination_name = self._claim_destination(name, year_folder)
+        destination = os.path.join(self._folder_paths[year_folder], destination_name)
         
         try:
             if not self.dry_run:
-                shutil.move(str(file_path), str(destination))
-                logger.info(f"移动文件: {file_path.name} -> {destination.parent.name}/{destination.name}")
+                try:
+                    self._transfer(source, destination, op_id)
+                except Exception:
+                    # 移动失败，目标文件名没有被占用
+                    self._release_destination(destination_name, year_folder)
+                    raise
+                if op_id is not None:
+                    self.journal.complete(op_id)
+                logger.info(f"移动文件: {name} -> {year_folder.name}/{destination_name}")
             else:
-                logger.info(f"[试运行] 移动文件: {file_path.name} -> {destination.parent.name}/{destination.name}")
+                logger.info(f"[试运行] 移动文件: {name} -> {year_folder.name}/{destination_name}")
             
-            self.stats['moved_files'] += 1
+            if self._destinations is not None:
+                self._destinations[source] = destination
+            self._count('moved_files')
             return True
             
         except Exception as e:
-            logger.error(f"移动文件失败 {file_path} -> {destination}: {e}")
-            self.stats['error_files'] += 1
+            logger.error(f"移动文件失败 {source} -> {destination}: {e}")
+            self._count('error_files')
             return False
     
+    def _claim_destination(self, name: str, year_folder: Path) -> str:
+        """
+        为文件分配目标文件名并登记到索引，同一文件夹的分配串行进行
+        
+        冲突只查内存中的文件名索引，不访问文件系统。每个原始文件名记住下一个
+        要尝试的数字后缀，大量同名文件时不必每次从 _1 重新探测。
+        索引在文件夹首次使用时建立，假定整理期间没有其他程序往年份文件夹写入。
+        """
+        with self._folder_locks[year_folder]:
+            names = self._folder_names[year_folder]
+            if name not in names:
+                names.add(name)
+                return name
+            
+            # 处理文件名冲突
+            next_suffix = self._next_suffix[year_folder]
+            stem, suffix = os.path.splitext(name)
+            counter = next_suffix.get(name, 1)
+            destination = f"{stem}_{counter}{suffix}"
+            while destination in names:
+                counter += 1
+                destination = f"{stem}_{counter}{suffix}"
+            next_suffix[name] = counter + 1
+            names.add(destination)
+        return destination
+    
+    def _release_destination(self, name: str, year_folder: Path):
+        with self._folder_locks[year_folder]:
+            self._folder_names[year_folder].discard(name)
+    
+    def _transfer(self, source: str, destination: str, op_id: Optional[int] = None):
+        """
+        同一文件系统内直接 os.rename，跨设备时由 TransferEngine 在内核中复制
+        
+        有日志时，跨设备复制在删除源文件前先记录"已复制"，恢复时据此补删源文件，
+        不会把源和目标都在的状态当作冲突
+        """
+        on_copied = partial(self.journal.copied, op_id) if op_id is not None else None
+        self.transfer.move(source, destination, on_copied)
+    
+    def find_duplicates(self, records_by_year: Dict[int, List[FileRecord]]) -> Dict[str, str]:
+        """
+        在待整理文件和目标年份文件夹的已有文件中查找内容相同的文件
+        
+        Returns:
+            重复的待整理文件 -> 保留的文件；年份文件夹中已有的文件优先保留
+        """
+        existing = []
+        for year in records_by_year:
+            folder = self.target_folder / str(year)
+            try:
+                with os.scandir(folder) as entries:
+                    for entry in entries:
+                        if entry.is_file(follow_symlinks=False):
+                            existing.append((entry.path, entry.stat(follow_symlinks=False).st_size))
+            except FileNotFoundError:
+                continue
+            except OSError as e:
+                logger.warning(f"无法读取文件夹 {folder}: {e}")
+        existing_paths = {path for path, _ in existing}
+        incoming = [(record.path, record.size) for group in records_by_year.values() for record in group]
+        
+        finder = DuplicateFinder(workers=self.workers)
+        duplicates: Dict[str, str] = {}
+        for group in finder.find(existing + incoming):
+            keeper = group[0]
+            for path in group[1:]:
+                # 年份文件夹中原本就重复的文件不处理
+                if path not in existing_paths:
+                    duplicates[path] = keeper
+                    logger.info(f"重复文件: {path} 与 {keeper} 内容相同")
+        
+        stats = finder.stats
+        logger.info(f"查重: {stats['files']} 个文件，同大小候选 {stats['size_candidates']}，"
+                    f"头尾哈希 {stats['partial_hashed']}，完整哈希 {stats['full_hashed']}，"
+                    f"共读取 {stats['bytes_read'] / 1024 / 1024:.1f} MB")
+        self.stats['duplicate_files'] = len(duplicates)
+        return duplicates
+    
+    def link_duplicates(self, duplicates: Dict[str, str]):
+        """把已移动的重复文件替换为指向保留文件的硬链接"""
+        linked = 0
+        for duplicate, keeper in duplicates.items():
+            target = self._destinations.get(duplicate)
+            if target is None:
+                # 移动失败的文件保持原样
+                continue
+            keeper_path = self._destinations.get(keeper, keeper)
+            if self.dry_run:
+                logger.info(f"[试运行] 以硬链接替换重复文件: {target} -> {keeper_path}")
+                continue
+            temporary = target + '.dedupe'
+            try:
+                if os.path.samefile(keeper_path, target):
+                    continue
+                # 先建临时链接再原子替换，失败时原文件不受影响
+                os.link(keeper_path, temporary)
+                os.replace(temporary, target)
+                linked += 1
+            except OSError as e:
+                logger.warning(f"无法以硬链接替换重复文件 {target}: {e}")
+                if os.path.lexists(temporary):
+                    os.unlink(temporary)
+        logger.info(f"以硬链接替换了 {linked} 个重复文件")
+    
+    def _move_batch(self, records: List[FileRecord], year_folder: Path):
+        """移动一批文件；启用日志时先分配好目标文件名，整批写入日志后再执行"""
+        names: List[Optional[str]] = [None] * len(records)
+        op_ids: List[Optional[int]] = [None] * len(records)
+        if self.journal is not None and not self.dry_run:
+            names = [self._claim_destination(record.name, year_folder) for record in records]
+            folder = self._folder_paths[year_folder]
+            op_ids = self.journal.plan([(record.path, os.path.join(folder, name))
+                                        for record, name in zip(records, names)])
+        
+        for record, name, op_id in zip(records, names, op_ids):
+            try:
+                self._move(record.path, record.name, year_folder, name, op_id)
+            except Exception as e:
+                logger.error(f"处理文件失败 {record.path}: {e}")
+                self._count('error_files')
+    
     def scan_and_organize_files(self) -> Dict[int, List[str]]:
         """
         扫描并整理文件
         
+        扫描时每个文件只 stat 一次；移动按目标年份文件夹分组，
+        分批提交到线程池并行执行。
+        
         Returns:
             按年份分组的文件列表
         """
@@ -168,32 +500,24 @@ class FileOrganizerByYear:
         
         try:
             # 获取所有文件（不包括子文件夹）
-            all_files = [f for f in self.source_folder.iterdir() if f.is_file()]
-            self.stats['total_files'] = len(all_files)
+            records = self.scan_files()
+            self.stats['total_files'] = len(records)
             
             if self.stats['total_files'] == 0:
                 logger.info("文件夹中没有找到任何文件")
                 return file_groups
             
             logger.info(f"找到 {self.stats['total_files']} 个文件")
-            logger.info(f"整理模式: {'创建时间' if self.use_creation_date else '修改时间'}")
+            logger.info(f"整理模式: {self.date_mode}")
             
             if self.dry_run:
                 logger.info("*** 试运行模式 - 不会实际移动文件 ***\n")
             
-            # 首先扫描所有文件，按年份分组
-            for file_path in all_files:
-                try:
-                    year = self.get_file_year(file_path)
-                    
-                    if year not in file_groups:
-                        file_groups[year] = []
-                    
-                    file_groups[year].append(file_path.name)
-                    
-                except Exception as e:
-                    logger.error(f"处理文件失败 {file_path}: {e}")
-                    self.stats['error_files'] += 1
+            # 按年份分组
+            records_by_year: Dict[int, List[FileRecord]] = {}
+            for record in records:
+                records_by_year.setdefault(record.year, []).append(record)
+            file_groups = {year: [record.name for record in group] for year, group in records_by_year.items()}
             
             # 显示分组统计
             logger.info("文件分组统计:")
@@ -203,26 +527,43 @@ class FileOrganizerByYear:
             
             logger.info("")
             
-            # 执行文件移动
-            for file_path in all_files:
-                try:
-                    year = self.get_file_year(file_path)
+            duplicates: Dict[str, str] = {}
+            if self.dedupe:
+                duplicates = self.find_duplicates(records_by_year)
+                if self.dedupe == 'skip':
+                    for year, group in records_by_year.items():
+                        records_by_year[year] = [record for record in group if record.path not in duplicates]
+                    self.stats['skipped_files'] += len(duplicates)
+            
+            # 执行文件移动：年份文件夹在主线程中创建，移动分批并行
+            with ThreadPoolExecutor(max_workers=self.move_workers, thread_name_prefix='move') as executor:
+                futures = []
+                for year in sorted(records_by_year):
+                    group = records_by_year[year]
                     
                     # 跳过已经在年份文件夹中的文件
-                    if file_path.parent.name == str(year):
-                        logger.debug(f"跳过文件（已在正确位置）: {file_path.name}")
-                        self.stats['skipped_files'] += 1
+                    if self.target_folder == self.source_folder and self.source_folder.name == str(year):
+                        for record in group:
+                            logger.debug(f"跳过文件（已在正确位置）: {record.name}")
+                        self.stats['skipped_files'] += len(group)
                         continue
                     
                     # 创建年份文件夹
-                    year_folder = self.create_year_folder(year)
-                    
-                    # 移动文件
-                    self.move_file(file_path, year_folder)
+                    try:
+                        year_folder = self.create_year_folder(year)
+                    except Exception as e:
+                        logger.error(f"处理 {year} 年文件失败: {e}")
+                        self._count('error_files', len(group))
+                        continue
                     
-                except Exception as e:
-                    logger.error(f"处理文件失败 {file_path}: {e}")
-                    self.stats['error_files'] += 1
+                    for batch in self._batches(group):
+                        futures.append(executor.submit(self._move_batch, batch, year_folder))
+                
+                for future in futures:
+                    future.result()
+            
+            if self.dedupe == 'hardlink' and duplicates:
+                self.link_duplicates(duplicates)
         
         except Exception as e:
             logger.error(f"扫描文件夹失败: {e}")
@@ -230,16 +571,87 @@ class FileOrganizerByYear:
         
         return file_groups
     
+    def organize_streaming(self) -> Dict[int, int]:
+        """
+        递归流式整理：生成器遍历目录树，文件按批分发到线程池
+        
+        扫描尚未结束时移动就已开始；同时在途的批次数有上限，
+        内存占用与文件总数无关。
+        
+        Returns:
+            各年份的文件数量
+        """
+        year_counts: Dict[int, int] = {}
+        logger.info(f"递归整理模式: 按{self.date_mode}边扫描边移动")
+        if self.dry_run:
+            logger.info("*** 试运行模式 - 不会实际移动文件 ***\n")
+        
+        pending: Deque[Future] = deque()
+        max_pending = self.move_workers * 2
+        batches: Dict[int, List[FileRecord]] = {}
+        buffered = 0
+        
+        with ThreadPoolExecutor(max_workers=self.move_workers, thread_name_prefix='move') as executor:
+            def dispatch():
+                for year, group in batches.items():
+                    try:
+                        year_folder = self.create_year_folder(year)
+                    except Exception as e:
+                        logger.error(f"处理 {year} 年文件失败: {e}")
+                        self._count('error_files', len(group))
+                        continue
+                    for batch in self._batches(group):
+                        pending.append(executor.submit(self._move_batch, batch, year_folder))
+                batches.clear()
+                # 在途批次过多时等待最早的批次完成，形成背压
+                while len(pending) > max_pending:
+                    pending.popleft().result()
+            
+            for record in self.iter_files_recursive():
+                self.stats['total_files'] += 1
+                year_counts[record.year] = year_counts.get(record.year, 0) + 1
+                
+                # 跳过已经在年份文件夹中的文件：按完整路径比较，
+                # 子文件夹中同名的年份文件夹（如 trip/2026）不算已整理
+                if self._in_year_folder(os.path.dirname(record.path), record.year):
+                    logger.debug(f"跳过文件（已在正确位置）: {record.path}")
+                    self.stats['skipped_files'] += 1
+                    continue
+                
+                batches.setdefault(record.year, []).append(record)
+                buffered += 1
+                if buffered >= self.STREAM_BATCH_SIZE:
+                    dispatch()
+                    buffered = 0
+            
+            dispatch()
+            while pending:
+                pending.popleft().result()
+        
+        logger.info(f"共扫描 {self.stats['total_files']} 个文件")
+        for year in sorted(year_counts):
+            logger.info(f"  {year}年: {year_counts[year]} 个文件")
+        return year_counts
+    
     def print_summary(self):
         """打印整理摘要"""
         logger.info("\n" + "="*50)
         logger.info("整理摘要:")
         logger.info(f"源文件夹: {self.source_folder}")
+        if self.target_folder != self.source_folder:
+            logger.info(f"目标文件夹: {self.target_folder}")
         logger.info(f"总文件数: {self.stats['total_files']}")
         logger.info(f"移动文件数: {self.stats['moved_files']}")
         logger.info(f"跳过文件数: {self.stats['skipped_files']}")
         logger.info(f"错误文件数: {self.stats['error_files']}")
         logger.info(f"创建文件夹数: {self.stats['created_folders']}")
+        if self.transfer.stats['copied']:
+            logger.info(f"文件传输: {self.transfer.report()}")
+        if self.dedupe is not None:
+            logger.info(f"重复文件数: {self.stats['duplicate_files']} ({self.dedupe})")
+        if self.date_cache is not None:
+            logger.info(f"按拍摄时间归类: {self.stats['capture_dates']} 个文件 "
+                        f"(缓存命中 {self.date_cache.hits}，读取文件头 {self.date_cache.misses})")
         
         if self.dry_run:
             logger.info("\n*** 这是试运行结果，没有实际移动文件 ***")
@@ -247,15 +659,40 @@ class FileOrganizerByYear:
         if self.stats['error_files'] > 0:
             logger.warning(f"\n注意: 有 {self.stats['error_files']} 个文件处理失败")
     
+    def open_journal(self):
+        """打开操作日志；上次任务未正常结束时先恢复中断的操作，再继续整理剩下的文件"""
+        self.journal = OperationJournal(self.journal_path)
+        state = load_journal(self.journal_path)
+        if state is None or state.finished or state.undone:
+            self.journal.begin('organize', str(self.source_folder))
+            return
+        
+        if state.header.get('source') != str(self.source_folder):
+            raise ValueError(f"日志 {self.journal_path} 记录的是另一个文件夹的任务: {state.header.get('source')}")
+        
+        self.journal.reopen(state)
+        logger.info(f"发现未完成的任务：已完成 {len(state.done)} 个操作，待确认 {len(state.pending)} 个")
+        redone, confirmed, conflicts = recover(state, self.journal, self._transfer)
+        logger.info(f"恢复完成：重新执行 {redone} 个，确认已完成 {confirmed} 个，无法处理 {conflicts} 个")
+        self._count('moved_files', redone + confirmed)
+        self._count('error_files', conflicts)
+    
     def organize(self):
         """执行文件整理"""
         if not self.validate_source_folder():
             return False
         
+        completed = False
         try:
             logger.info(f"开始整理文件夹: {self.source_folder}")
-            file_groups = self.scan_and_organize_files()
+            if self.journal_path and not self.dry_run:
+                self.open_journal()
+            if self.recursive:
+                self.organize_streaming()
+            else:
+                self.scan_and_organize_files()
             self.print_summary()
+            completed = True
             return True
             
         except KeyboardInterrupt:
@@ -264,6 +701,41 @@ class FileOrganizerByYear:
         except Exception as e:
             logger.error(f"整理过程中发生错误: {e}")
             return False
+        finally:
+            if self.date_cache is not None:
+                self.date_cache.close()
+            if self.journal is not None:
+                if completed:
+                    self.journal.finish()
+                else:
+                    self.journal.close()
+
+
+def undo(journal_path: str, dry_run: bool = False) -> bool:
+    """按操作日志把文件移回原位置，并删除因此变空的年份文件夹"""
+    state = load_journal(journal_path)
+    if state is None:
+        logger.error(f"日志不存在: {journal_path}")
+        return False
+    if state.header.get('tool') != 'organize':
+        logger.error(f"日志不是由本脚本生成的: {journal_path}")
+        return False
+    
+    try:
+        undone, skipped = undo_journal(journal_path, TransferEngine().move, dry_run)
+    except ValueError as e:
+        logger.error(str(e))
+        return False
+    
+    if not dry_run:
+        for folder in sorted({os.path.dirname(dst) for _, dst in state.operations.values()}):
+            try:
+                os.rmdir(folder)
+                logger.info(f"删除空的年份文件夹: {folder}")
+            except OSError:
+                pass
+    logger.info(f"撤销完成：移回 {undone} 个文件，跳过 {skipped} 个")
+    return skipped == 0
 
 def parse_args():
     """解析命令行参数"""
@@ -282,11 +754,28 @@ def parse_args():
   使用文件创建时间而非修改时间:
     python organize_files_by_year.py "C:\\temp" --use-creation-date
   
+  递归整理子文件夹中的文件（边扫描边移动，适合数百万文件）:
+    python organize_files_by_year.py "D:\\Photos" --recursive
+  
+  按照片/视频的拍摄时间整理（EXIF、视频头或文件名中的日期，结果会缓存）:
+    python organize_files_by_year.py "D:\\Photos" --capture-date
+  
+  整理时查找内容相同的文件，跳过重复文件（或 hardlink 替换为硬链接、report 只记录）:
+    python organize_files_by_year.py "D:\\Photos" --dedupe skip
+  
+  年份文件夹放到另一块磁盘（跨设备时用 copy_file_range 并行复制，--verify 校验后再删除源文件）:
+    python organize_files_by_year.py "D:\\Downloads" --target "E:\\Archive" --copy-workers 4 --verify
+  
+  记录操作日志，中断后用相同命令重新运行会从中断处继续；也可以按日志撤销:
+    python organize_files_by_year.py "D:\\Photos" --journal log/photos.journal
+    python organize_files_by_year.py --undo log/photos.journal
+  
   组合选项:
     python organize_files_by_year.py "C:\\temp" --dry-run --use-creation-date
 
 注意事项:
   - 脚本只会移动文件，不会移动子文件夹
+  - 递归模式会把子文件夹中的文件移动到顶层年份文件夹，不进入已有的年份文件夹
   - 如果目标位置存在同名文件，会自动重命名（添加数字后缀）
   - 建议先使用 --dry-run 选项预览操作结果
         """
@@ -294,7 +783,8 @@ def parse_args():
     
     parser.add_argument(
         "folder_path",
-        help="要整理的文件夹路径"
+        nargs='?',
+        help="要整理的文件夹路径（--undo 时不需要）"
     )
     
     parser.add_argument(
@@ -309,13 +799,76 @@ def parse_args():
         help="使用文件创建时间而非修改时间来确定年份"
     )
     
+    parser.add_argument(
+        "--capture-date",
+        action="store_true",
+        help="优先使用拍摄时间（EXIF、视频头、文件名中的日期），只读取文件头，取不到时回退到文件时间"
+    )
+    
+    parser.add_argument(
+        "--date-cache",
+        help="拍摄时间缓存数据库路径 (默认: log/capture_dates.db)"
+    )
+    
+    parser.add_argument(
+        "--dedupe",
+        choices=FileOrganizerByYear.DEDUPE_MODES,
+        help="查找内容相同的文件（按大小、头尾哈希、完整哈希分阶段比较）："
+             "skip 不移动重复文件，hardlink 移动后替换为硬链接，report 只记录"
+    )
+    
+    parser.add_argument(
+        "-t", "--target",
+        help="年份文件夹所在的目录（默认: 源文件夹）"
+    )
+    
+    parser.add_argument(
+        "--copy-workers",
+        type=int,
+        default=4,
+        help="跨设备移动时同时复制的文件数 (默认: 4)"
+    )
+    
+    parser.add_argument(
+        "--verify",
+        action="store_true",
+        help="跨设备复制后比较哈希，一致才删除源文件"
+    )
+    
+    parser.add_argument(
+        "--journal",
+        help="操作日志文件；上次任务未完成时先恢复再继续"
+    )
+    
+    parser.add_argument(
+        "--undo",
+        metavar="JOURNAL",
+        help="按操作日志撤销一次整理，把文件移回原位置"
+    )
+    
+    parser.add_argument(
+        "-r", "--recursive",
+        action="store_true",
+        help="递归整理子文件夹中的文件，流式处理，扫描未结束时就开始移动"
+    )
+    
+    parser.add_argument(
+        "-w", "--workers",
+        type=int,
+        default=8,
+        help="并行移动文件的线程数 (默认: 8)"
+    )
+    
     parser.add_argument(
         "-v", "--verbose",
         action="store_true",
         help="显示详细输出"
     )
     
-    return parser.parse_args()
+    args = parser.parse_args()
+    if not args.folder_path and not args.undo:
+        parser.error("需要指定要整理的文件夹路径")
+    return args
 
 def main():
     """主函数"""
@@ -327,11 +880,37 @@ def main():
             logger.remove()
             logger.add(sys.stderr, level="DEBUG")
         
+        if args.undo:
+            success = undo(args.undo, args.dry_run)
+            print("\n撤销完成！" if success else "\n撤销未全部完成，请查看日志")
+            sys.exit(0 if success else 1)
+        
+        if args.workers < 1:
+            print("错误：线程数必须大于0")
+            sys.exit(1)
+        
+        if args.copy_workers < 1:
+            print("错误：复制并发数必须大于0")
+            sys.exit(1)
+        
+        if args.dedupe and args.recursive:
+            print("错误：--dedupe 需要完整的文件列表，不能与 --recursive 同时使用")
+            sys.exit(1)
+        
         # 创建整理器实例
         organizer = FileOrganizerByYear(
             source_folder=args.folder_path,
             dry_run=args.dry_run,
-            use_creation_date=args.use_creation_date
+            use_creation_date=args.use_creation_date,
+            workers=args.workers,
+            recursive=args.recursive,
+            capture_date=args.capture_date,
+            date_cache=args.date_cache,
+            dedupe=args.dedupe,
+            target_folder=args.target,
+            copy_workers=args.copy_workers,
+            verify=args.verify,
+            journal=args.journal
         )
         
         # 执行整理
@@ -1,15 +1,38 @@
 import argparse
 import os
 import sys
+from concurrent.futures import ThreadPoolExecutor
 from datetime import datetime
 from pathlib import Path
-from typing import Dict, List, Tuple, Set
+from typing import Dict, FrozenSet, List, NamedTuple, Optional, Tuple, Set
 from loguru import logger
 import re
 
+from file_journal import OperationJournal, load_journal, recover, undo_journal
+from rename_planner import plan_renames
+
+try:
+    from image_hash import ImageHashIndex, find_similar
+except ImportError:  # 近似重复检查需要 NumPy，计算新哈希还需要 Pillow
+    ImageHashIndex = None
+
+class FolderWork(NamedTuple):
+    """遍历时记录的单个文件夹内容，预览统计和重命名共用"""
+    path: Path
+    # 图片文件名（未排序）
+    images: List[str]
+    # 文件夹中的全部名称，生成重命名计划时用于判断名称是否被占用
+    names: Set[str]
+    # 近似重复、排在最后编号的图片
+    similar: FrozenSet[str] = frozenset()
+
+
 class ImageRenamer:
     def __init__(self, source_folder: str, dry_run: bool = False, 
-                 image_extensions: List[str] = None, start_number: int = 1):
+                 image_extensions: List[str] = None, start_number: int = 1,
+                 journal: Optional[str] = None, workers: int = 8,
+                 similar_index: Optional[str] = None, similar_threshold: int = 3,
+                 similar_action: str = 'report'):
         """
         初始化图片重命名器
         
@@ -18,10 +41,21 @@ class ImageRenamer:
             dry_run: 是否为试运行模式（不实际重命名文件）
             image_extensions: 图片文件扩展名列表
             start_number: 起始编号
+            journal: 操作日志路径，中断后用同一路径重新运行会先完成未完成的重命名，也可用于撤销
+            workers: 并行处理文件夹的线程数
+            similar_index: 感知哈希索引路径，提供时在重命名前查找近似重复的图片
+            similar_threshold: 判为近似重复的最大汉明距离（64 位 pHash）
+            similar_action: report 只记录；last 每组第一张按原顺序编号，其余排到所在文件夹的最后编号
         """
         self.source_folder = Path(source_folder).resolve()
         self.dry_run = dry_run
         self.start_number = start_number
+        self.journal_path = journal
+        self.journal: Optional[OperationJournal] = None
+        self.workers = workers
+        self.similar_index = similar_index
+        self.similar_threshold = similar_threshold
+        self.similar_action = similar_action
         
         # 默认图片扩展名
         if image_extensions is None:
@@ -35,7 +69,8 @@ class ImageRenamer:
             'total_images': 0,
             'renamed_images': 0,
             'skipped_images': 0,
-            'error_images': 0
+            'error_images': 0,
+            'similar_images': 0
         }
         
         self.setup_logging()
@@ -143,7 +178,11 @@ class ImageRenamer:
         Returns:
             排序键元组
         """
-        filename = file_path.stem.lower()
+        return self.name_sort_key(file_path.name)
+    
+    def name_sort_key(self, name: str) -> tuple:
+        """natural_sort_key 的字符串版本，直接对文件名排序，不构造 Path"""
+        filename = os.path.splitext(name)[0].lower()
         
         # 将文件名分解为文本和数字部分
         parts = re.split(r'(\d+)', filename)
@@ -169,31 +208,82 @@ class ImageRenamer:
             图片文件路径列表（已排序）
         """
         try:
-            image_files = []
-            for file_path in folder_path.iterdir():
-                if file_path.is_file() and self.is_image_file(file_path):
-                    image_files.append(file_path)
-            
-            # 使用自然排序
-            image_files.sort(key=self.natural_sort_key)
-            
-            # 调试输出排序结果
-            logger.debug(f"排序后的文件列表:")
-            for i, file_path in enumerate(image_files):
-                logger.debug(f"  {i+1}: {file_path.name}")
-            
-            return image_files
-            
-        except Exception as e:
+            work = self.read_folder(folder_path)
+        except OSError as e:
             logger.error(f"无法读取文件夹 {folder_path}: {e}")
             return []
+        return self.sorted_images(work)
+    
+    def sorted_images(self, work: FolderWork) -> List[Path]:
+        """按自然顺序排序文件夹中的图片"""
+        return [work.path / name for name in self.sorted_image_names(work)]
+    
+    def sorted_image_names(self, work: FolderWork) -> List[str]:
+        """按自然顺序排序文件夹中的图片文件名"""
+        # 使用自然排序
+        image_names = sorted(work.images, key=self.name_sort_key)
+        if work.similar:
+            # 近似重复的图片排在最后，不占用保留图片之间的序号
+            image_names = ([name for name in image_names if name not in work.similar]
+                           + [name for name in image_names if name in work.similar])
+        
+        # 调试输出排序结果，整个列表作为一条日志，多个文件夹并行时不会交错
+        listing = "\n".join(f"  {i+1}: {name}" for i, name in enumerate(image_names))
+        logger.debug(f"排序后的文件列表 {work.path}:\n{listing}")
+        
+        return image_names
+    
+    def read_folder(self, folder_path: Path, subfolders: Optional[List[Path]] = None) -> FolderWork:
+        """
+        用一次 scandir 读取文件夹：图片文件名、全部名称，以及（可选）子文件夹列表
+        
+        目录项类型来自 scandir 自带的信息，大多数平台上不需要额外 stat。
+        """
+        images = []
+        names = set()
+        with os.scandir(folder_path) as entries:
+            for entry in entries:
+                names.add(entry.name)
+                try:
+                    if entry.is_dir(follow_symlinks=False):
+                        if subfolders is not None:
+                            subfolders.append(folder_path / entry.name)
+                    elif entry.is_file() and os.path.splitext(entry.name)[1].lower() in self.image_extensions:
+                        images.append(entry.name)
+                except OSError:
+                    continue
+        return FolderWork(folder_path, images, names)
+    
+    def scan_folders(self, root: Path) -> List[FolderWork]:
+        """
+        一次遍历整个目录树，生成文件夹任务列表
+        
+        不进入指向目录的符号链接，避免循环。
+        """
+        work_list = []
+        stack = [root]
+        while stack:
+            folder_path = stack.pop()
+            subfolders: List[Path] = []
+            try:
+                work_list.append(self.read_folder(folder_path, subfolders))
+            except PermissionError:
+                logger.warning(f"没有权限访问子文件夹: {folder_path}")
+                continue
+            except OSError as e:
+                logger.error(f"处理子文件夹时出错 {folder_path}: {e}")
+                continue
+            # 逆序压栈，保持与原来相同的深度优先顺序
+            stack.extend(reversed(subfolders))
+        return work_list
     
-    def rename_images_in_folder(self, folder_path: Path) -> Dict[str, int]:
+    def rename_images_in_folder(self, folder_path: Path, work: Optional[FolderWork] = None) -> Dict[str, int]:
         """
         重命名单个文件夹中的图片文件
         
         Args:
             folder_path: 文件夹路径
+            work: 遍历时已读取的文件夹内容，None 时重新读取
             
         Returns:
             操作统计信息
@@ -205,7 +295,14 @@ class ImageRenamer:
         }
         
         # 获取所有图片文件（已排序）
-        image_files = self.get_image_files_in_folder(folder_path)
+        if work is None:
+            try:
+                work = self.read_folder(folder_path)
+            except OSError as e:
+                logger.error(f"无法读取文件夹 {folder_path}: {e}")
+                return folder_stats
+        # 热路径上只使用文件名字符串，避免逐个构造 Path
+        image_files = self.sorted_image_names(work)
         
         if not image_files:
             logger.debug(f"文件夹中没有图片文件: {folder_path}")
@@ -214,24 +311,21 @@ class ImageRenamer:
         # 计算需要的位数
         padding = self.calculate_padding(len(image_files))
         
-        logger.info(f"\n处理文件夹: {folder_path}")
-        logger.info(f"找到 {len(image_files)} 个图片文件，使用 {padding} 位数字编号")
-        
-        # 显示原始文件排序
-        logger.info("原始文件排序:")
-        for i, file_path in enumerate(image_files[:10]):  # 只显示前10个
-            logger.info(f"  {i+1}: {file_path.name}")
+        # 多个文件夹并行处理，文件夹信息和原始文件排序拼成一条日志，避免各文件夹的行交错
+        lines = [f"\n处理文件夹: {folder_path}",
+                 f"找到 {len(image_files)} 个图片文件，使用 {padding} 位数字编号",
+                 "原始文件排序:"]
+        lines.extend(f"  {i+1}: {name}" for i, name in enumerate(image_files[:10]))  # 只显示前10个
         if len(image_files) > 10:
-            logger.info(f"  ... 还有 {len(image_files) - 10} 个文件")
+            lines.append(f"  ... 还有 {len(image_files) - 10} 个文件")
+        logger.info("\n".join(lines))
         
         # 创建重命名映射
         rename_mapping = []
         current_number = self.start_number
         
-        for file_path in image_files:
-            old_name = file_path.name
-            old_stem = file_path.stem
-            extension = file_path.suffix
+        for old_name in image_files:
+            extension = os.path.splitext(old_name)[1]
             
             # 检查是否已经是正确的数字格式
             expected_name = self.generate_new_name(current_number, padding, extension)
@@ -241,40 +335,56 @@ class ImageRenamer:
                 folder_stats['skipped'] += 1
             else:
                 new_name = expected_name
-                rename_mapping.append((file_path, new_name))
+                rename_mapping.append((old_name, new_name))
             
             current_number += 1
         
-        # 执行重命名操作
-        for old_path, new_name in rename_mapping:
-            new_path = old_path.parent / new_name
-            
+        # 把映射当作置换处理：链从空闲的终点往回执行，环只借用一个临时名称
+        plan = plan_renames(dict(rename_mapping), work.names)
+        for old_name, new_name in plan.blocked:
+            logger.error(f"重命名失败 {folder_path / old_name} -> {new_name}: 目标名称已被其他文件占用")
+        folder_stats['errors'] += len(plan.blocked)
+        if plan.cycles:
+            logger.debug(f"重命名计划: {len(plan.operations)} 次 rename，其中 {plan.cycles} 个环各使用一个临时名称")
+        
+        # 启用日志时整个文件夹的计划先写入日志，再开始执行
+        folder = str(folder_path)
+        op_ids = [None] * len(plan.operations)
+        if self.journal is not None and not self.dry_run:
+            op_ids = self.journal.plan([(os.path.join(folder, old), os.path.join(folder, new))
+                                        for old, new in plan.operations])
+        
+        # 链和环中腾出的名称会被后续操作复用，这些操作的完成记录要先落盘，
+        # 否则中断后无法从文件是否存在判断它们是否已执行
+        refilled = {new for _, new in plan.operations}
+        
+        # 执行重命名操作，结果在文件夹处理完后作为一条日志输出
+        action = "[试运行] " if self.dry_run else ""
+        renamed = []
+        for index, ((old_name, new_name), op_id) in enumerate(zip(plan.operations, op_ids)):
             try:
-                # 检查目标文件是否已存在
-                if new_path.exists() and new_path != old_path:
-                    # 如果目标文件存在且不是同一个文件，需要特殊处理
-                    temp_name = f"temp_{new_name}"
-                    temp_path = old_path.parent / temp_name
-                    
-                    if not self.dry_run:
-                        # 先移动到临时名称，避免冲突
-                        old_path.rename(temp_path)
-                        temp_path.rename(new_path)
-                    
-                    logger.info(f"重命名: {old_path.name} -> {new_name} (通过临时文件)")
-                else:
-                    if not self.dry_run:
-                        old_path.rename(new_path)
-                    
-                    action = "[试运行]" if self.dry_run else ""
-                    logger.info(f"{action} 重命名: {old_path.name} -> {new_name}")
-                
-                folder_stats['renamed'] += 1
-                
+                if not self.dry_run:
+                    os.rename(os.path.join(folder, old_name), os.path.join(folder, new_name))
+                    if op_id is not None:
+                        self.journal.complete(op_id, sync=old_name in refilled)
             except Exception as e:
-                logger.error(f"重命名失败 {old_path.name} -> {new_name}: {e}")
-                folder_stats['errors'] += 1
+                # 后续操作依赖前面腾出的名称，出错后停止处理这个文件夹，避免覆盖文件
+                logger.error(f"重命名失败 {folder_path / old_name} -> {new_name}: {e}")
+                unfinished = plan.operations[index:]
+                folder_stats['errors'] += sum(1 for _, new in unfinished if new not in plan.temporaries)
+                break
+            
+            if new_name in plan.temporaries:
+                logger.debug(f"{action}暂存: {folder_path / old_name} -> {new_name}")
+            elif old_name in plan.temporaries:
+                renamed.append(f"  {plan.temporaries[old_name]} -> {new_name} (通过临时文件)")
+                folder_stats['renamed'] += 1
+            else:
+                renamed.append(f"  {old_name} -> {new_name}")
+                folder_stats['renamed'] += 1
         
+        if renamed:
+            logger.info(f"{action}重命名 {folder_path}:\n" + "\n".join(renamed))
         return folder_stats
     
     def process_folder_recursive(self, folder_path: Path):
@@ -284,30 +394,68 @@ class ImageRenamer:
         Args:
             folder_path: 文件夹路径
         """
-        try:
-            self.stats['total_folders'] += 1
-            
-            # 处理当前文件夹中的图片
-            folder_stats = self.rename_images_in_folder(folder_path)
-            
-            # 更新总体统计
-            self.stats['renamed_images'] += folder_stats['renamed']
-            self.stats['skipped_images'] += folder_stats['skipped']
-            self.stats['error_images'] += folder_stats['errors']
-            
-            # 递归处理子文件夹
+        self.process_folders(self.scan_folders(folder_path))
+    
+    def process_folders(self, work_list: List[FolderWork]):
+        """
+        在线程池中并行处理各文件夹，文件夹之间互不影响
+        
+        Args:
+            work_list: scan_folders 生成的文件夹任务列表
+        """
+        self.stats['total_folders'] += len(work_list)
+        
+        def process(work: FolderWork) -> Dict[str, int]:
             try:
-                for item in folder_path.iterdir():
-                    if item.is_dir():
-                        self.process_folder_recursive(item)
-            except PermissionError:
-                logger.warning(f"没有权限访问子文件夹: {folder_path}")
+                return self.rename_images_in_folder(work.path, work)
             except Exception as e:
-                logger.error(f"处理子文件夹时出错 {folder_path}: {e}")
-        
-        except Exception as e:
-            logger.error(f"处理文件夹失败 {folder_path}: {e}")
+                logger.error(f"处理文件夹失败 {work.path}: {e}")
+                return {'renamed': 0, 'skipped': 0, 'errors': len(work.images)}
+        
+        with ThreadPoolExecutor(max_workers=self.workers, thread_name_prefix='rename') as executor:
+            # 统计在主线程中汇总
+            for folder_stats in executor.map(process, [work for work in work_list if work.images]):
+                self.stats['renamed_images'] += folder_stats['renamed']
+                self.stats['skipped_images'] += folder_stats['skipped']
+                self.stats['error_images'] += folder_stats['errors']
     
+    def find_similar_images(self, work_list: List[FolderWork]):
+        """
+        用感知哈希查找近似重复的图片（缩放、重新压缩后的副本），跨文件夹比较
+
+        last 模式下每组按路径排序保留第一张，其余排到所在文件夹的最后编号：
+        它们仍然参与重命名，不会占着前面的序号挡住保留图片的编号。
+
+        Args:
+            work_list: scan_folders 生成的文件夹任务列表
+        """
+        paths = [os.path.join(str(work.path), name) for work in work_list for name in work.images]
+        index = ImageHashIndex(self.similar_index, workers=self.workers)
+        try:
+            hashes, hashed_paths = index.update(paths)
+        finally:
+            index.close()
+        logger.info(f"感知哈希：缓存命中 {index.stats['cached']} 个（其中改名后命中 {index.stats['moved']} 个），"
+                    f"新计算 {index.stats['hashed']} 个，无法解码 {index.stats['errors']} 个，"
+                    f"清理失效记录 {index.stats['pruned']} 个")
+
+        groups = find_similar(hashed_paths, hashes, self.similar_threshold)
+        duplicates = set()
+        for group in groups:
+            logger.info(f"近似重复的图片（{len(group)} 张）:")
+            for path, distance in group:
+                logger.info(f"  {path} (距离 {distance})")
+            duplicates.update(path for path, _ in group[1:])
+        self.stats['similar_images'] += len(duplicates)
+
+        if self.similar_action == 'last' and duplicates:
+            for position, work in enumerate(work_list):
+                folder = str(work.path)
+                similar = frozenset(name for name in work.images if os.path.join(folder, name) in duplicates)
+                if similar:
+                    work_list[position] = work._replace(similar=similar)
+            logger.info(f"{len(duplicates)} 张近似重复的图片排到所在文件夹的最后编号")
+
     def count_total_images(self, folder_path: Path) -> int:
         """
         统计总图片数量（用于预览）
@@ -318,17 +466,7 @@ class ImageRenamer:
         Returns:
             图片总数
         """
-        total = 0
-        try:
-            for item in folder_path.iterdir():
-                if item.is_file() and self.is_image_file(item):
-                    total += 1
-                elif item.is_dir():
-                    total += self.count_total_images(item)
-        except (PermissionError, OSError):
-            pass
-        
-        return total
+        return sum(len(work.images) for work in self.scan_folders(folder_path))
     
     def print_summary(self):
         """打印重命名摘要"""
@@ -339,6 +477,8 @@ class ImageRenamer:
         logger.info(f"重命名图片数: {self.stats['renamed_images']}")
         logger.info(f"跳过图片数: {self.stats['skipped_images']}")
         logger.info(f"错误图片数: {self.stats['error_images']}")
+        if self.similar_index:
+            logger.info(f"近似重复图片数: {self.stats['similar_images']}")
         logger.info(f"支持的图片格式: {', '.join(sorted(self.image_extensions))}")
         
         if self.dry_run:
@@ -347,26 +487,53 @@ class ImageRenamer:
         if self.stats['error_images'] > 0:
             logger.warning(f"\n注意: 有 {self.stats['error_images']} 个文件处理失败")
     
+    def open_journal(self):
+        """打开操作日志；上次任务未正常结束时先完成中断的重命名（包括停在临时名称的文件）"""
+        self.journal = OperationJournal(self.journal_path)
+        state = load_journal(self.journal_path)
+        if state is None or state.finished or state.undone:
+            self.journal.begin('rename', str(self.source_folder))
+            return
+        
+        if state.header.get('source') != str(self.source_folder):
+            raise ValueError(f"日志 {self.journal_path} 记录的是另一个文件夹的任务: {state.header.get('source')}")
+        
+        self.journal.reopen(state)
+        logger.info(f"发现未完成的任务：已完成 {len(state.done)} 个操作，待确认 {len(state.pending)} 个")
+        redone, confirmed, conflicts = recover(state, self.journal, lambda src, dst, op_id: os.rename(src, dst))
+        logger.info(f"恢复完成：重新执行 {redone} 个，确认已完成 {confirmed} 个，无法处理 {conflicts} 个")
+        self.stats['error_images'] += conflicts
+    
     def rename_images(self):
         """执行图片重命名"""
         if not self.validate_source_folder():
             return False
         
+        completed = False
         try:
             logger.info(f"开始处理文件夹: {self.source_folder}")
+            if self.journal_path and not self.dry_run:
+                self.open_journal()
             logger.info(f"起始编号: {self.start_number}")
             logger.info(f"排序方式: 自然数字排序")
             
+            # 一次遍历得到全部文件夹，预览统计和重命名共用
+            work_list = self.scan_folders(self.source_folder)
+
+            if self.similar_index:
+                self.find_similar_images(work_list)
+
             if self.dry_run:
                 logger.info("*** 试运行模式 - 不会实际重命名文件 ***")
                 # 预统计图片数量
-                total_images = self.count_total_images(self.source_folder)
+                total_images = sum(len(work.images) for work in work_list)
                 logger.info(f"预计处理 {total_images} 个图片文件\n")
             
-            # 开始递归处理
-            self.process_folder_recursive(self.source_folder)
+            # 并行处理各文件夹
+            self.process_folders(work_list)
             
             self.print_summary()
+            completed = True
             return True
             
         except KeyboardInterrupt:
@@ -375,6 +542,31 @@ class ImageRenamer:
         except Exception as e:
             logger.error(f"重命名过程中发生错误: {e}")
             return False
+        finally:
+            if self.journal is not None:
+                if completed:
+                    self.journal.finish()
+                else:
+                    self.journal.close()
+
+
+def undo(journal_path: str, dry_run: bool = False) -> bool:
+    """按操作日志逆序撤销一次重命名"""
+    state = load_journal(journal_path)
+    if state is None:
+        logger.error(f"日志不存在: {journal_path}")
+        return False
+    if state.header.get('tool') != 'rename':
+        logger.error(f"日志不是由本脚本生成的: {journal_path}")
+        return False
+    
+    try:
+        undone, skipped = undo_journal(journal_path, os.rename, dry_run)
+    except ValueError as e:
+        logger.error(str(e))
+        return False
+    logger.info(f"撤销完成：还原 {undone} 个重命名，跳过 {skipped} 个")
+    return skipped == 0
 
 def parse_args():
     """解析命令行参数"""
@@ -396,6 +588,13 @@ def parse_args():
   指定图片扩展名:
     python rename_images.py "C:\\temp" --extensions jpg png gif
   
+  记录操作日志，中断后用相同命令重新运行会从中断处继续；也可以按日志撤销:
+    python rename_images.py "C:\\Photos" --journal log/rename.journal
+    python rename_images.py --undo log/rename.journal
+  
+  查找近似重复的图片（感知哈希，哈希缓存在索引文件中，需要 NumPy 和 Pillow），每组第一张按原顺序编号，其余排到最后:
+    python rename_images.py "C:\\Photos" --similar-index log/phash.db --similar-action last
+  
   组合选项:
     python rename_images.py "C:\\temp" --dry-run --start-number 0 --verbose
 
@@ -406,7 +605,7 @@ def parse_args():
   - 文件按名称排序后依次编号
 
 注意事项:
-  - 脚本会递归处理所有子文件夹
+  - 脚本会递归处理所有子文件夹（只遍历一次目录树，各文件夹并行处理，不进入指向目录的符号链接）
   - 每个文件夹的图片独立编号，从起始数字开始
   - 建议先使用 --dry-run 选项预览操作结果
   - 支持的默认图片格式：jpg, jpeg, png, gif, bmp, tiff, tif, webp, ico, svg
@@ -438,6 +637,44 @@ def parse_args():
         help="指定图片文件扩展名（默认：常见图片格式）"
     )
     
+    parser.add_argument(
+        "-w", "--workers",
+        type=int,
+        default=8,
+        help="并行处理文件夹的线程数 (默认: 8)"
+    )
+    
+    parser.add_argument(
+        "--journal",
+        help="操作日志文件；上次任务未完成时先恢复再继续"
+    )
+    
+    parser.add_argument(
+        "--undo",
+        metavar="JOURNAL",
+        help="按操作日志撤销一次重命名"
+    )
+    
+    parser.add_argument(
+        "--similar-index",
+        metavar="DB",
+        help="感知哈希索引文件；提供时在重命名前查找近似重复的图片"
+    )
+    
+    parser.add_argument(
+        "--similar-threshold",
+        type=int,
+        default=3,
+        help="判为近似重复的最大汉明距离，0-16；超过 3 时每段需要探测翻转位，耗时明显增加 (默认: 3)"
+    )
+    
+    parser.add_argument(
+        "--similar-action",
+        choices=["report", "last"],
+        default="report",
+        help="近似重复的处理方式：report 只记录，last 每组第一张按原顺序编号，其余排到所在文件夹的最后编号 (默认: report)"
+    )
+    
     parser.add_argument(
         "-v", "--verbose",
         action="store_true",
@@ -499,6 +736,23 @@ def main():
             logger.remove()
             logger.add(sys.stderr, level="DEBUG")
         
+        if args.undo:
+            success = undo(args.undo, args.dry_run)
+            print("\n撤销完成！" if success else "\n撤销未全部完成，请查看日志")
+            sys.exit(0 if success else 1)
+        
+        if args.workers < 1:
+            print("错误：线程数必须大于0")
+            sys.exit(1)
+        
+        if args.similar_index:
+            if ImageHashIndex is None:
+                print("错误：查找近似重复图片需要安装 NumPy 和 Pillow: pip install numpy pillow")
+                sys.exit(1)
+            if not 0 <= args.similar_threshold <= 16:
+                print("错误：近似重复阈值必须在 0-16 之间")
+                sys.exit(1)
+        
         # 获取文件夹路径
         if args.folder_path:
             folder_path = args.folder_path
@@ -515,7 +769,12 @@ def main():
             source_folder=folder_path,
             dry_run=args.dry_run,
             image_extensions=args.extensions,
-            start_number=args.start_number
+            start_number=args.start_number,
+            journal=args.journal,
+            workers=args.workers,
+            similar_index=args.similar_index,
+            similar_threshold=args.similar_threshold,
+            similar_action=args.similar_action
         )
         
         # 执行重命名
@@ -0,0 +1,95 @@
+"""
+文件夹内批量重命名的执行计划
+
+重命名映射 old -> new 中源名称互不相同、目标名称互不相同，把每个映射看作一条边，
+整个映射由若干条链和若干个环组成：
+- 链的终点是空闲的名称：从终点往回依次重命名，每一步的目标都刚好已被腾空，不需要临时名称
+- 环（a -> b -> c -> a）：先把其中一个文件改为临时名称，腾出的位置让环变成链，
+  最后把临时文件改为它的目标名称，每个环只多一次 rename
+
+因此总的 rename 次数为 映射数 + 环数，是最少的。
+计划完全在内存中根据一次目录读取的结果生成，执行时不再逐个检查文件是否存在。
+链的终点被映射以外的文件占用时（例如同名的文件夹），整条链无法执行，作为阻塞项返回。
+"""
+
+from typing import Dict, List, NamedTuple, Set, Tuple
+
+
+class RenamePlan(NamedTuple):
+    """按顺序执行的 rename 操作及附加信息"""
+    operations: List[Tuple[str, str]]
+    # 临时名称 -> 原始文件名
+    temporaries: Dict[str, str]
+    # 目标被占用而无法执行的映射
+    blocked: List[Tuple[str, str]]
+    cycles: int
+
+
+def _temporary_name(name: str, taken: Set[str]) -> str:
+    candidate = f"temp_{name}"
+    counter = 1
+    while candidate in taken:
+        candidate = f"temp_{counter}_{name}"
+        counter += 1
+    taken.add(candidate)
+    return candidate
+
+
+def plan_renames(mapping: Dict[str, str], existing: Set[str]) -> RenamePlan:
+    """
+    生成重命名计划
+
+    Args:
+        mapping: 原文件名 -> 新文件名，不应包含 old == new 的项
+        existing: 文件夹中当前的全部名称（包括不参与重命名的文件和子文件夹）
+
+    Returns:
+        RenamePlan，operations 按顺序执行即可，每一步的目标名称都已空闲
+    """
+    source_of = {new: old for old, new in mapping.items()}
+    if len(source_of) != len(mapping):
+        raise ValueError("重命名映射中存在重复的目标名称")
+
+    operations: List[Tuple[str, str]] = []
+    blocked: List[Tuple[str, str]] = []
+    remaining = dict(mapping)
+
+    def unwind(free: str):
+        # free 已空闲：把以它为目标的文件改过去，腾出的名称继续往回处理
+        while free in source_of:
+            old = source_of[free]
+            if old not in remaining:
+                break
+            del remaining[old]
+            operations.append((old, free))
+            free = old
+
+    # 链：终点不是任何映射的源
+    for new in list(source_of):
+        if new in mapping:
+            continue
+        if new in existing:
+            # 终点被映射以外的文件占用，整条链都无法执行
+            old = source_of[new]
+            while old is not None and old in remaining:
+                blocked.append((old, remaining.pop(old)))
+                old = source_of.get(old)
+            continue
+        unwind(new)
+
+    # 剩下的都在环上
+    taken = set(existing) | set(mapping.values())
+    temporaries: Dict[str, str] = {}
+    cycles = 0
+    while remaining:
+        start, target = next(iter(remaining.items()))
+        del remaining[start]
+        temporary = _temporary_name(target, taken)
+        temporaries[temporary] = start
+        operations.append((start, temporary))
+        unwind(start)
+        operations.append((temporary, target))
+        cycles += 1
+
+    return RenamePlan(operations, temporaries, blocked, cycles)
+